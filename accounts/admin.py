@@ -1,4 +1,11 @@
 from django.contrib import admin
-from .models import User
+from .models import User, EmailOutbox
 
-admin.site.register(User)
\ No newline at end of file
+admin.site.register(User)
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'sent_at')
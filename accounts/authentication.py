@@ -0,0 +1,127 @@
+import hashlib
+import hmac
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BasicAuthentication,
+    TokenAuthentication,
+    get_authorization_header
+)
+from .cache import basic_auth_cache, token_cache
+
+
+def token_expired(token):
+    """True se o token passou do prazo `TOKEN_EXPIRY` (None: não expira)"""
+    expiry = getattr(settings, 'TOKEN_EXPIRY', None)
+    return expiry is not None and token.created + expiry <= timezone.now()
+
+
+class AsyncTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication com uma variante assíncrona (`aauthenticate`) para
+    as views async, que busca o token com o ORM assíncrono.
+    """
+
+    def get_key(self, request):
+        """Chave do cabeçalho `Authorization: Token <chave>` (ou None)"""
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) == 1:
+            msg = _('Invalid token header. No credentials provided.')
+            raise exceptions.AuthenticationFailed(msg)
+        elif len(auth) > 2:
+            msg = _('Invalid token header. Token string should not contain spaces.')
+            raise exceptions.AuthenticationFailed(msg)
+
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            msg = _('Invalid token header. Token string should not contain invalid characters.')
+            raise exceptions.AuthenticationFailed(msg)
+
+    async def aauthenticate(self, request):
+        key = self.get_key(request)
+        if key is None:
+            return None
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related('user').aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
+
+
+class CachedTokenAuthentication(AsyncTokenAuthentication):
+    """
+    Autenticação por token com cache em memória (ver `cache.py`) e prazo de
+    validade: com o token em cache, a requisição não consulta o banco.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+        else:
+            user, token = cached
+
+        if token_expired(token):
+            # O sinal de exclusão também descarta a entrada do cache
+            token.delete()
+            raise exceptions.AuthenticationFailed('Token expirado.')
+
+        if cached is None:
+            token_cache.set(key, user, token)
+        return (user, token)
+
+    async def aauthenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = await super().aauthenticate_credentials(key)
+        else:
+            user, token = cached
+
+        if token_expired(token):
+            await token.adelete()
+            raise exceptions.AuthenticationFailed('Token expirado.')
+
+        if cached is None:
+            token_cache.set(key, user, token)
+        return (user, token)
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    BasicAuthentication que, com `BASIC_AUTH_CACHE` ligado, lembra as
+    credenciais já conferidas (ver `cache.py`) em vez de recalcular o hash
+    da senha a cada requisição. Desligado, funciona como o original.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        if not getattr(settings, 'BASIC_AUTH_CACHE', False):
+            return super().authenticate_credentials(userid, password, request)
+
+        # A chave não guarda a senha: HMAC das credenciais com a SECRET_KEY
+        key = hmac.new(
+            settings.SECRET_KEY.encode(),
+            f'{userid}\0{password}'.encode(),
+            hashlib.sha256
+        ).hexdigest()
+        cached = basic_auth_cache.get(key)
+        if cached is not None:
+            return cached
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        basic_auth_cache.set(key, user, auth)
+        return (user, auth)
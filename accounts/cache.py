@@ -0,0 +1,80 @@
+"""
+Cache em memória da autenticação por token (e, opcionalmente, Basic).
+
+Guarda o par (usuário, token) de cada chave por `TOKEN_CACHE_TIMEOUT`
+segundos, num LRU limitado a `TOKEN_CACHE_SIZE` entradas, evitando a
+consulta Token+User em toda requisição. Cada processo tem o seu cache: as
+entradas são descartadas pelos sinais de `Token` e `User` (ver
+`handlers.py`) e, nos demais processos, pelo próprio TTL.
+
+No Basic, a chave é um HMAC das credenciais e não há token: uma senha já
+conferida não passa de novo pelo hash enquanto a entrada valer.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+
+
+class TokenCache:
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'TOKEN_CACHE_SIZE', 1024)
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'TOKEN_CACHE_TIMEOUT', 60)
+
+    def get(self, key):
+        """(usuário, token) da chave, ou None se ausente ou vencido"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, token, cached_until = entry
+            if cached_until <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        # Cópias: alterações feitas por uma requisição não vazam para as outras
+        user = copy.copy(user)
+        if token is not None:
+            token = copy.copy(token)
+            token.user = user
+        return user, token
+
+    def set(self, key, user, token):
+        if self.max_size <= 0 or self.timeout <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (user, token, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        """Descarta todas as entradas de um usuário"""
+        with self._lock:
+            for key in [key for key, (user, _, _) in self._entries.items() if user.pk == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+basic_auth_cache = TokenCache()
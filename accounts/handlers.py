@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .cache import basic_auth_cache, token_cache
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Logout (ou token expirado): a chave deixa de valer imediatamente"""
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, created, raw=False, **kwargs):
+    """Troca de senha ou de status: o usuário em cache fica desatualizado"""
+    if raw or created:
+        return
+    token_cache.invalidate_user(instance.pk)
+    basic_auth_cache.invalidate_user(instance.pk)
@@ -0,0 +1,81 @@
+import base64
+import json
+import os
+from django.contrib.auth import authenticate, get_user_model
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+from accounts import views
+from accounts.cache import basic_auth_cache
+from invoices.benchmark import benchmark_database, measure, percentile
+
+EMAIL = 'bench@email.com'
+PASSWORD = 'benchpass123'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede logins por segundo por núcleo (fluxo antigo com dois hashes x '
+        'fluxo atual) e o custo do Basic auth com e sem cache (usa um banco de testes)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20, help='Logins por cenário (padrão: 20)')
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requisições com Basic auth por cenário (padrão: 200)'
+        )
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+
+        with benchmark_database():
+            user = get_user_model().objects.create_user(
+                username=EMAIL, email=EMAIL, cnpj='11.222.333/0001-81',
+                name='Benchmark', password=PASSWORD
+            )
+
+            def legacy_login():
+                # Fluxo anterior: o serializer e a view autenticavam cada um
+                authenticate(username=EMAIL, password=PASSWORD)
+                authenticate(username=EMAIL, password=PASSWORD)
+                Token.objects.get_or_create(user=user)
+
+            def login():
+                request = factory.post(
+                    '/api/accounts/login/', {'email': EMAIL, 'password': PASSWORD}, format='json'
+                )
+                response = views.login(request)
+                assert response.status_code == 200, response.data
+
+            credentials = base64.b64encode(f'{EMAIL}:{PASSWORD}'.encode()).decode()
+
+            def basic_request():
+                request = factory.get('/api/accounts/user/', HTTP_AUTHORIZATION=f'Basic {credentials}')
+                response = views.get_user_details(request)
+                assert response.status_code == 200, response.data
+
+            results = {
+                'login (antigo, 2 hashes)': self.report(measure(legacy_login, options['logins'])),
+                'login': self.report(measure(login, options['logins'])),
+                'basic auth': self.report(measure(basic_request, options['requests'])),
+            }
+            with override_settings(BASIC_AUTH_CACHE=True):
+                basic_auth_cache.clear()
+                results['basic auth (BASIC_AUTH_CACHE)'] = self.report(
+                    measure(basic_request, options['requests'])
+                )
+                basic_auth_cache.clear()
+
+        results['cpu_count'] = os.cpu_count()
+        self.stdout.write(json.dumps(results, indent=2, ensure_ascii=False))
+
+    @staticmethod
+    def report(timings):
+        """Vazão de uma única thread (por núcleo) e latências"""
+        return {
+            'per_second_per_core': round(len(timings) / sum(timings), 1),
+            'p50_ms': round(percentile(timings, 50) * 1000, 2),
+            'p95_ms': round(percentile(timings, 95) * 1000, 2),
+        }
@@ -0,0 +1,103 @@
+import logging
+import time
+from datetime import timedelta
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from accounts.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Envia os emails da fila (EmailOutbox) em lotes por uma única conexão SMTP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails por lote (padrão: 50)')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Segundos entre consultas quando a fila está vazia (padrão: 5)'
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Tentativas antes de marcar o email como falho (padrão: 5)'
+        )
+        parser.add_argument(
+            '--backoff', type=float, default=30,
+            help='Espera (s) após a 1ª falha; dobra a cada nova falha (padrão: 30)'
+        )
+        parser.add_argument(
+            '--max-backoff', type=float, default=3600,
+            help='Espera máxima (s) entre tentativas (padrão: 3600)'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Envia o que estiver pendente e termina, em vez de continuar aguardando'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        # Reserva do lote: tempo suficiente para enviá-lo antes de voltar à fila
+        self.lease = timedelta(minutes=5)
+        sent = failed = 0
+        connection = None
+
+        try:
+            while True:
+                batch = EmailOutbox.claim(options['batch_size'], self.lease)
+                if not batch:
+                    # Fila vazia: libera a conexão até chegar mais trabalho
+                    if connection is not None:
+                        connection.close()
+                        connection = None
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                if connection is None:
+                    connection = get_connection(fail_silently=False)
+                batch_sent, batch_failed = self.send_batch(connection, batch)
+                sent += batch_sent
+                failed += batch_failed
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f'Lote: {batch_sent} enviado(s), {batch_failed} com falha')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if connection is not None:
+                connection.close()
+
+        self.stdout.write(self.style.SUCCESS(f'{sent} email(s) enviado(s), {failed} falha(s).'))
+
+    def send_batch(self, connection, batch):
+        """Envia um lote reaproveitando a conexão; retorna (enviados, falhas)"""
+        sent_ids = []
+        failed = 0
+        for item in batch:
+            try:
+                # Aberta explicitamente, a conexão segue aberta entre os envios
+                # (send_messages fecha as conexões que ele mesmo abre); não faz
+                # nada se já estiver aberta
+                connection.open()
+                connection.send_messages([item.as_message(connection)])
+            except Exception as exc:
+                logger.warning('Falha ao enviar o email %s: %s', item.pk, exc)
+                item.retry_later(
+                    str(exc),
+                    self.options['max_attempts'],
+                    self.options['backoff'],
+                    self.options['max_backoff']
+                )
+                failed += 1
+                # A conexão pode ter ficado em estado inválido
+                connection.close()
+            else:
+                sent_ids.append(item.pk)
+
+        EmailOutbox.objects.filter(pk__in=sent_ids).update(
+            status='sent',
+            sent_at=timezone.now(),
+            last_error=''
+        )
+        return len(sent_ids), failed
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:13
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Assunto')),
+                ('body', models.TextField(verbose_name='Texto')),
+                ('html_body', models.TextField(blank=True, verbose_name='HTML')),
+                ('from_email', models.CharField(blank=True, max_length=254, verbose_name='Remetente')),
+                ('to', models.JSONField(default=list, verbose_name='Destinatários')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('sent', 'Enviado'), ('failed', 'Falhou')], default='pending', max_length=10, verbose_name='Situação')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próxima Tentativa')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+            ],
+            options={
+                'verbose_name': 'Email na Fila',
+                'verbose_name_plural': 'Fila de Emails',
+                'db_table': 'email_outbox',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt_at'], name='email_outbox_pending_idx')],
+            },
+        ),
+    ]
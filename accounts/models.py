@@ -1,5 +1,9 @@
+from datetime import timedelta
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.mail import EmailMultiAlternatives
+from django.db import models, transaction
+from django.utils import timezone
 
 class User(AbstractUser):
     name = models.CharField(max_length=255)
@@ -14,3 +18,101 @@ class User(AbstractUser):
         if not self.username: # Se username não for fornecido
             self.username = self.email # Ou use outro método para gerá-lo
         super().save(*args, **kwargs)
+
+
+class EmailOutbox(models.Model):
+    """
+    Fila de emails enviados em segundo plano pelo comando `run_mail_worker`.
+
+    As views apenas gravam a mensagem; o worker envia em lotes por uma única
+    conexão SMTP e reagenda as falhas com espera exponencial.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('sent', 'Enviado'),
+        ('failed', 'Falhou'),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name="Assunto")
+    body = models.TextField(verbose_name="Texto")
+    html_body = models.TextField(blank=True, verbose_name="HTML")
+    from_email = models.CharField(max_length=254, blank=True, verbose_name="Remetente")
+    to = models.JSONField(default=list, verbose_name="Destinatários")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Situação")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Próxima Tentativa")
+    last_error = models.TextField(blank=True, verbose_name="Último Erro")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Enviado em")
+
+    class Meta:
+        db_table = 'email_outbox'
+        verbose_name = 'Email na Fila'
+        verbose_name_plural = 'Fila de Emails'
+        ordering = ['next_attempt_at']
+        indexes = [
+            # Busca do worker: pendentes cuja próxima tentativa já venceu
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=models.Q(status='pending'),
+                name='email_outbox_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
+
+    @classmethod
+    def enqueue(cls, subject, body, to, from_email=None, html_body=''):
+        """Grava um email para envio pelo worker"""
+        return cls.objects.create(
+            subject=subject,
+            body=body,
+            html_body=html_body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+            to=list(to)
+        )
+
+    @classmethod
+    def claim(cls, batch_size, lease):
+        """
+        Reserva um lote de emails vencidos para este worker.
+
+        A próxima tentativa é adiada pelo tempo de `lease`: outro worker não
+        pega o mesmo lote, e se este morrer no meio os emails voltam à fila.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=now)
+                .order_by('next_attempt_at')[:batch_size]
+            )
+            if batch:
+                cls.objects.filter(pk__in=[item.pk for item in batch]).update(
+                    next_attempt_at=now + lease
+                )
+        return batch
+
+    def as_message(self, connection=None):
+        message = EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email or None,
+            to=self.to,
+            connection=connection
+        )
+        if self.html_body:
+            message.attach_alternative(self.html_body, 'text/html')
+        return message
+
+    def retry_later(self, error, max_attempts, backoff, max_backoff):
+        """Registra a falha e reagenda com espera exponencial (ou desiste)"""
+        self.attempts += 1
+        self.last_error = error
+        if self.attempts >= max_attempts:
+            self.status = 'failed'
+        else:
+            delay = min(backoff * 2 ** (self.attempts - 1), max_backoff)
+            self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        self.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
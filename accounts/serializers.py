@@ -24,9 +24,15 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField()
 
     def validate(self, data):
-        user = authenticate(username=data['email'], password=data['password'])
+        # Única verificação da senha no login: o usuário segue em validated_data
+        user = authenticate(
+            self.context.get('request'),
+            username=data['email'],
+            password=data['password']
+        )
         if user is None:
             raise serializers.ValidationError("Credenciais inválidas.")
+        data['user'] = user
         return data
     
 
@@ -1,3 +1,282 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+import base64
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from .cache import TokenCache, basic_auth_cache, token_cache
+from .models import User, EmailOutbox
 
-# Create your tests here.
+
+class CountingBackend(EmailBackend):
+    """Backend em memória que conta as conexões abertas"""
+    opened = 0
+
+    def open(self):
+        if getattr(self, 'is_open', False):
+            return None
+        self.is_open = True
+        CountingBackend.opened += 1
+        return True
+
+    def close(self):
+        self.is_open = False
+
+
+class FailingBackend(EmailBackend):
+    """Backend em memória que recusa todos os envios"""
+
+    def send_messages(self, messages):
+        raise SMTPException('servidor indisponível')
+
+
+class ForgotPasswordTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='maria@email.com',
+            email='maria@email.com',
+            cnpj='11.222.333/0001-81',
+            name='Maria',
+            password='testpass123'
+        )
+
+    def test_forgot_password_only_enqueues(self):
+        """Test the endpoint stores the email instead of sending it"""
+        response = self.client.post(reverse('forgot_password'), {'email': 'maria@email.com'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = EmailOutbox.objects.get()
+        self.assertEqual(queued.to, ['maria@email.com'])
+        self.assertEqual(queued.status, 'pending')
+        self.assertIn('/reset-password/', queued.body)
+
+    def test_forgot_password_unknown_email(self):
+        """Test unknown emails get the same answer and nothing is queued"""
+        response = self.client.post(reverse('forgot_password'), {'email': 'ninguem@email.com'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+class MailWorkerTest(TestCase):
+    def run_worker(self, *args):
+        out = StringIO()
+        call_command('run_mail_worker', '--once', *args, stdout=out)
+        return out.getvalue()
+
+    @override_settings(EMAIL_BACKEND='accounts.tests.CountingBackend')
+    def test_worker_sends_batches_over_one_connection(self):
+        """Test pending emails are sent in batches reusing the connection"""
+        for index in range(5):
+            EmailOutbox.enqueue('Assunto', f'Mensagem {index}', [f'cliente{index}@email.com'])
+        later = EmailOutbox.enqueue('Depois', 'Ainda não', ['depois@email.com'])
+        later.next_attempt_at = timezone.now() + timedelta(hours=1)
+        later.save()
+        CountingBackend.opened = 0
+
+        output = self.run_worker('--batch-size', '2')
+
+        self.assertIn('5 email(s) enviado(s), 0 falha(s)', output)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(EmailOutbox.objects.filter(status='sent').count(), 5)
+        self.assertEqual(EmailOutbox.objects.get(status='pending'), later)
+
+        # Nada pendente: nenhum envio novo
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(EMAIL_BACKEND='accounts.tests.FailingBackend')
+    def test_worker_retries_with_backoff(self):
+        """Test failures are rescheduled with exponential backoff, then given up"""
+        queued = EmailOutbox.enqueue('Assunto', 'Mensagem', ['cliente@email.com'])
+
+        before = timezone.now()
+        with self.assertLogs('accounts.management.commands.run_mail_worker', 'WARNING'):
+            output = self.run_worker('--backoff', '60', '--max-attempts', '3')
+        queued.refresh_from_db()
+        self.assertIn('0 email(s) enviado(s), 1 falha(s)', output)
+        self.assertEqual(queued.status, 'pending')
+        self.assertEqual(queued.attempts, 1)
+        self.assertEqual(queued.last_error, 'servidor indisponível')
+        self.assertGreaterEqual(queued.next_attempt_at, before + timedelta(seconds=60))
+
+        # Ainda em espera: o worker não tenta de novo
+        self.run_worker('--backoff', '60', '--max-attempts', '3')
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 1)
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        before = timezone.now()
+        with self.assertLogs('accounts.management.commands.run_mail_worker', 'WARNING'):
+            self.run_worker('--backoff', '60', '--max-attempts', '3')
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 2)
+        self.assertGreaterEqual(queued.next_attempt_at, before + timedelta(seconds=120))
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        with self.assertLogs('accounts.management.commands.run_mail_worker', 'WARNING'):
+            self.run_worker('--backoff', '60', '--max-attempts', '3')
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'failed')
+        self.assertEqual(queued.attempts, 3)
+
+
+class CachedTokenAuthenticationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='maria@email.com',
+            email='maria@email.com',
+            cnpj='11.222.333/0001-81',
+            name='Maria',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+
+    def test_cached_token_skips_the_query(self):
+        """Test only the first request looks the token up in the database"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('get_user_details'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('get_user_details'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], 'maria@email.com')
+
+    def test_logout_invalidates_the_cache(self):
+        """Test a cached token stops working right after logout"""
+        self.client.get(reverse('get_user_details'))
+        response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse('get_user_details'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_reset_invalidates_the_cache(self):
+        """Test the cached user is dropped when the password changes"""
+        self.client.get(reverse('get_user_details'))
+        self.assertIsNotNone(token_cache.get(self.token.key))
+
+        response = self.client.post(reverse('reset_password_confirm'), {
+            'uid': urlsafe_base64_encode(force_bytes(self.user.pk)),
+            'token': default_token_generator.make_token(self.user),
+            'new_password': 'novasenha123',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    @override_settings(TOKEN_EXPIRY=timedelta(hours=1))
+    def test_expired_token_is_rejected_and_replaced_on_login(self):
+        """Test expired tokens are deleted and login issues a new one"""
+        self.client.get(reverse('get_user_details'))
+        Token.objects.filter(pk=self.token.pk).update(created=timezone.now() - timedelta(hours=2))
+        token_cache.clear()
+
+        response = self.client.get(reverse('get_user_details'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Token.objects.filter(pk=self.token.pk).exists())
+
+        self.client.credentials()
+        response = self.client.post(reverse('login'), {
+            'email': 'maria@email.com', 'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['token'], self.token.key)
+
+    @override_settings(TOKEN_CACHE_SIZE=2)
+    def test_cache_is_bounded_lru(self):
+        """Test the least recently used entry is evicted first"""
+        cache = TokenCache()
+        for key in ('a', 'b'):
+            cache.set(key, self.user, self.token)
+        cache.get('a')
+        cache.set('c', self.user, self.token)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+
+class LoginTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='maria@email.com',
+            email='maria@email.com',
+            cnpj='11.222.333/0001-81',
+            name='Maria',
+            password='testpass123'
+        )
+        basic_auth_cache.clear()
+        self.addCleanup(basic_auth_cache.clear)
+
+    def count_hashes(self):
+        return mock.patch.object(
+            User, 'check_password', autospec=True, side_effect=User.check_password
+        )
+
+    def basic_auth(self, password='testpass123'):
+        credentials = base64.b64encode(f'maria@email.com:{password}'.encode()).decode()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Basic {credentials}')
+        return self.client.get(reverse('get_user_details'))
+
+    def test_login_hashes_the_password_once(self):
+        """Test login verifies the password a single time"""
+        with self.count_hashes() as check_password:
+            response = self.client.post(reverse('login'), {
+                'email': 'maria@email.com', 'password': 'testpass123'
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(check_password.call_count, 1)
+        self.assertEqual(response.data['token'], Token.objects.get(user=self.user).key)
+        self.assertEqual(response.data['email'], 'maria@email.com')
+
+    def test_login_invalid_credentials(self):
+        """Test wrong passwords are rejected by the serializer"""
+        response = self.client.post(reverse('login'), {
+            'email': 'maria@email.com', 'password': 'errada123'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['non_field_errors'], ['Credenciais inválidas.'])
+        self.assertFalse(Token.objects.exists())
+
+    def test_basic_auth_hashes_every_request_by_default(self):
+        """Test Basic auth keeps the original behavior unless opted in"""
+        with self.count_hashes() as check_password:
+            self.basic_auth()
+            self.basic_auth()
+        self.assertEqual(check_password.call_count, 2)
+
+    @override_settings(BASIC_AUTH_CACHE=True)
+    def test_basic_auth_cache(self):
+        """Test cached Basic credentials skip the hash until the user changes"""
+        with self.count_hashes() as check_password:
+            self.assertEqual(self.basic_auth().status_code, status.HTTP_200_OK)
+            self.assertEqual(self.basic_auth().status_code, status.HTTP_200_OK)
+            self.assertEqual(check_password.call_count, 1)
+
+            # Senha errada nunca vem do cache
+            self.assertEqual(self.basic_auth('errada123').status_code, status.HTTP_401_UNAUTHORIZED)
+
+            self.user.set_password('novasenha123')
+            self.user.save()
+            self.assertEqual(self.basic_auth().status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(self.basic_auth('novasenha123').status_code, status.HTTP_200_OK)
@@ -1,9 +1,9 @@
 from django.shortcuts import render
-from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.core.mail import send_mail
 from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -12,6 +12,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from .serializers import UserSerializer, LoginSerializer
+from .models import EmailOutbox
+from .authentication import token_expired
 from rest_framework.authtoken.models import Token
 import logging
 import json
@@ -34,18 +36,17 @@ def register(request):
 @api_view(['POST'])
 def login(request):
     if request.method == 'POST':
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            email = serializer.validated_data['email']
-            password = serializer.validated_data['password']
-            user = authenticate(request, username=email, password=password)
-            if user is not None:
-                # Gere ou recupere o token do usuário
-                token, created = Token.objects.get_or_create(user=user)
-                user_data = UserSerializer(user).data
-                return Response({'token': token.key, **user_data}, status=status.HTTP_200_OK)
-            else:
-                return Response({'error': 'Credenciais inválidas.'}, status=status.HTTP_400_BAD_REQUEST)
+            # O serializer já autenticou (um único hash da senha)
+            user = serializer.validated_data['user']
+            # Gere ou recupere o token do usuário (um novo, se o atual expirou)
+            token, created = Token.objects.get_or_create(user=user)
+            if not created and token_expired(token):
+                token.delete()
+                token = Token.objects.create(user=user)
+            user_data = UserSerializer(user).data
+            return Response({'token': token.key, **user_data}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     
@@ -123,7 +124,7 @@ def forgot_password(request):
         reset_url = f"{frontend_url}/reset-password/{uid}/{token}/"
         logger.info(f"Reset URL: {reset_url}")
 
-        # Enviar email
+        # Montar email
         subject = 'Recuperação de Senha'
         
         # Versão em texto simples
@@ -141,41 +142,20 @@ def forgot_password(request):
         Atenciosamente,
         Equipe de Suporte'''
 
-        try:
-            # Verificar configurações de email
-            from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
-            logger.info(f"Enviando email de: {from_email} para: {user.email}")
-            
-            # Para desenvolvimento, usar console backend se configurado
-            email_backend = getattr(settings, 'EMAIL_BACKEND', '')
-            logger.info(f"Email backend: {email_backend}")
-            
-            email_obj = EmailMultiAlternatives(
-                subject=subject,
-                body=text_message,
-                from_email=from_email,
-                to=[user.email]
-            )
-
-            email_obj.send()
-            logger.info("Email enviado com sucesso")
+        # O envio é feito pelo worker (manage.py run_mail_worker); aqui só
+        # entra na fila, sem esperar pelo servidor SMTP
+        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
+        EmailOutbox.enqueue(
+            subject=subject,
+            body=text_message,
+            to=[user.email],
+            from_email=from_email
+        )
+        logger.info(f"Email de recuperação enfileirado para: {user.email}")
 
-            return Response({
-                'message': 'Email de recuperação enviado com sucesso. Verifique sua caixa de entrada.'
-            }, status=status.HTTP_200_OK)
-        
-        except Exception as e:
-            logger.error(f"Erro ao enviar email: {str(e)}")
-            # Para desenvolvimento, ainda retornar sucesso se for console backend
-            if 'console' in getattr(settings, 'EMAIL_BACKEND', ''):
-                logger.info("Email backend é console, considerando como sucesso")
-                return Response({
-                    'message': 'Email de recuperação enviado com sucesso. Verifique sua caixa de entrada (console).'
-                }, status=status.HTTP_200_OK)
-            
-            return Response({
-                'message': 'Erro ao enviar email. Tente novamente mais tarde.'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({
+            'message': 'Email de recuperação enviado com sucesso. Verifique sua caixa de entrada.'
+        }, status=status.HTTP_200_OK)
         
     except json.JSONDecodeError as e:
         logger.error(f"Erro JSON: {str(e)}")
@@ -1,11 +1,16 @@
 # invoices/admin.py
 
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
-from django.urls import reverse
+from django.core.exceptions import PermissionDenied
+from django.urls import path, reverse
 from django.utils.safestring import mark_safe
 from decimal import Decimal, InvalidOperation
-from .models import Invoice
+from .models import Invoice, PaymentReminder, ROLLUP_FIELDS
+from .exports import admin_csv_response
+from .pagination import EstimatedCountPaginator
+from .utils import format_currency
 
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
@@ -30,9 +35,13 @@ class InvoiceAdmin(admin.ModelAdmin):
         'payment_method',
         'state',
         'is_active',
-        'issue_date',
         'due_date'
     )
+    # Contagens por opção de filtro varreriam a tabela inteira
+    show_facets = admin.ShowFacets.NEVER
+
+    # Navegação por período de emissão (índice invoices_issue_date_idx)
+    date_hierarchy = 'issue_date'
     
     # Campos de busca
     search_fields = (
@@ -59,8 +68,10 @@ class InvoiceAdmin(admin.ModelAdmin):
     # Campos editáveis na lista
     list_editable = ('is_active',)
     
-    # Paginação
+    # Paginação: sem COUNT(*) da tabela inteira (ver EstimatedCountPaginator)
     list_per_page = 25
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     # Organização dos campos no formulário
     fieldsets = (
@@ -117,25 +128,24 @@ class InvoiceAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            # Na lista, só as colunas exibidas (o total já é calculado pelo
+            # banco) e as do rollup, usadas ao salvar pelo list_editable
+            queryset = queryset.only(
+                *(name for name in self.list_display if name != 'display_total'),
+                'total_value',
+                *ROLLUP_FIELDS
+            )
+        return queryset
+
     # Métodos para exibição customizada
     def display_total(self, obj):
-        """Exibe o total na lista"""
-        try:
-            total = obj.total_value
-            # Garantir que total é um Decimal e converter para float
-            if not isinstance(total, Decimal):
-                total = Decimal(str(total))
-            
-            return format_html(
-                '<strong style="color: #28a745;">R$ {}</strong>', 
-                f"{float(total):.2f}"
-            )
-        except (ValueError, TypeError, InvalidOperation) as e:
-            return format_html(
-                '<span style="color: #dc3545;">Erro</span>'
-            )
+        """Exibe o total na lista (coluna calculada pelo banco)"""
+        return format_html('<strong style="color: #28a745;">{}</strong>', format_currency(obj.total_value))
     display_total.short_description = 'Total'
-    display_total.admin_order_field = 'value'
+    display_total.admin_order_field = 'total_value'
     
     def display_total_detail(self, obj):
         """Exibe detalhes do total no formulário"""
@@ -195,11 +205,12 @@ class InvoiceAdmin(admin.ModelAdmin):
     display_tax_amount.short_description = 'Valor do Imposto'
     
     # Ações personalizadas
-    actions = ['mark_as_active', 'mark_as_inactive']
+    actions = ['mark_as_active', 'mark_as_inactive', 'export_selected_csv']
     
     def mark_as_active(self, request, queryset):
         """Marca faturas como ativas"""
-        updated = queryset.update(is_active=True)
+        # update() ignora auto_now: updated_at é informado
+        updated = queryset.update(is_active=True, updated_at=timezone.now())
         self.message_user(
             request,
             f'{updated} fatura(s) marcada(s) como ativa(s).'
@@ -208,9 +219,39 @@ class InvoiceAdmin(admin.ModelAdmin):
     
     def mark_as_inactive(self, request, queryset):
         """Marca faturas como inativas"""
-        updated = queryset.update(is_active=False)
+        # update() ignora auto_now: updated_at é informado
+        updated = queryset.update(is_active=False, updated_at=timezone.now())
         self.message_user(
             request,
             f'{updated} fatura(s) marcada(s) como inativa(s).'
         )
-    mark_as_inactive.short_description = 'Marcar como inativas'
\ No newline at end of file
+    mark_as_inactive.short_description = 'Marcar como inativas'
+
+    def export_selected_csv(self, request, queryset):
+        """Exporta as faturas selecionadas em CSV (streaming)"""
+        return admin_csv_response(queryset.order_by(*self.get_ordering(request)))
+    export_selected_csv.short_description = 'Exportar selecionadas (CSV)'
+
+    def get_urls(self):
+        urls = [
+            path(
+                'export-csv/',
+                self.admin_site.admin_view(self.export_csv_view),
+                name='invoices_invoice_export_csv'
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def export_csv_view(self, request):
+        """Exporta todas as faturas da lista com os filtros e a busca aplicados"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        changelist = self.get_changelist_instance(request)
+        return admin_csv_response(changelist.get_queryset(request))
+
+@admin.register(PaymentReminder)
+class PaymentReminderAdmin(admin.ModelAdmin):
+    list_display = ('invoice', 'kind', 'due_date', 'email', 'sent_at')
+    list_filter = ('kind',)
+    list_select_related = ('invoice',)
+    raw_id_fields = ('invoice',)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InvoicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'invoices'
+
+    def ready(self):
+        # Registra os receptores de sinais (rollup de estatísticas)
+        from . import handlers  # noqa: F401
@@ -0,0 +1,120 @@
+"""
+Versões assíncronas das leituras de notas fiscais (listagem, detalhe e
+estatísticas).
+
+Usam o ORM assíncrono e a autenticação por token assíncrona, então no deploy
+ASGI uma requisição esperando o banco não ocupa uma thread. Filtros, busca,
+ordenação, paginação, serialização e validadores de cache HTTP são os mesmos
+do `InvoiceViewSet`, e as respostas são idênticas às da API síncrona.
+"""
+from functools import wraps
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from accounts.authentication import CachedTokenAuthentication
+from .cache import statistics_cache
+from .conditional import alist_validators, instance_validators, not_modified_response, set_validators
+from .models import Invoice
+from .statistics import acompute_statistics
+from .views import InvoiceViewSet
+
+renderer = JSONRenderer()
+authentication = CachedTokenAuthentication()
+
+
+def render(data, status=200, headers=None):
+    """Resposta JSON com o mesmo renderer da API síncrona"""
+    response = HttpResponse(renderer.render(data), status=status, content_type=renderer.media_type)
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def error_response(request, exc):
+    """Resposta de erro no mesmo formato do exception handler do DRF"""
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = render(data, exc.status_code)
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        response['WWW-Authenticate'] = authentication.authenticate_header(request)
+    return response
+
+
+def invoice_read(action):
+    """
+    Monta a view assíncrona de uma leitura do `InvoiceViewSet`: autentica o
+    token e entrega ao handler a requisição do DRF e o viewset configurado
+    para a action, de onde vêm filtros, paginação e serializers.
+    """
+    def decorator(handler):
+        @require_GET
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            request = Request(request)
+            request.accepted_renderer = renderer
+            request.accepted_media_type = renderer.media_type
+            try:
+                user_auth = await authentication.aauthenticate(request)
+                if user_auth is None:
+                    raise NotAuthenticated()
+                request.user, request.auth = user_auth
+
+                viewset = InvoiceViewSet(
+                    action=action,
+                    request=request,
+                    args=args,
+                    kwargs=kwargs,
+                    format_kwarg=None
+                )
+                return await handler(request, viewset, *args, **kwargs)
+            except APIException as exc:
+                return error_response(request, exc)
+        return view
+    return decorator
+
+
+@invoice_read('list')
+async def invoice_list(request, viewset):
+    """Listar notas fiscais"""
+    serializer_class = viewset.get_serializer_class()
+    queryset = viewset.filter_queryset(viewset.get_queryset())
+    queryset = serializer_class.values_queryset(queryset)
+
+    paginator = viewset.paginator
+    queryset = paginator.get_page_queryset(queryset, request, view=viewset)
+
+    etag, last_modified = await alist_validators(request, queryset)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    page = paginator.build_page([row async for row in queryset.aiterator()])
+    serializer = serializer_class(page, many=True, context=viewset.get_serializer_context())
+    return set_validators(render(paginator.get_paginated_data(serializer.data)), etag, last_modified)
+
+
+@invoice_read('retrieve')
+async def invoice_detail(request, viewset, pk):
+    """Detalhar nota fiscal"""
+    queryset = viewset.filter_queryset(viewset.get_queryset())
+    try:
+        instance = await queryset.aget(pk=pk)
+    except Invoice.DoesNotExist:
+        raise NotFound(f'No {Invoice._meta.object_name} matches the given query.')
+
+    etag, last_modified = instance_validators(request, instance)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    serializer_class = viewset.get_serializer_class()
+    serializer = serializer_class(instance, context=viewset.get_serializer_context())
+    return set_validators(render(serializer.data), etag, last_modified)
+
+
+@invoice_read('statistics')
+async def invoice_statistics(request, viewset):
+    """Estatísticas das notas fiscais"""
+    data, hit = await statistics_cache.aget_or_compute(request.query_params, acompute_statistics)
+    return render(data, headers={'X-Cache': 'HIT' if hit else 'MISS'})
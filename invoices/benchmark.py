@@ -0,0 +1,132 @@
+"""
+Utilitários dos comandos de benchmark: geração de notas fiscais válidas e
+medição de tempo.
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Invoice
+from .utils import CNPJ_WEIGHTS, CPF_WEIGHTS, check_digit, format_document
+
+# (cidade, UF) usados nas notas geradas
+CITIES = [
+    ('São Paulo', 'SP'), ('Campinas', 'SP'), ('Rio de Janeiro', 'RJ'), ('Niterói', 'RJ'),
+    ('Belo Horizonte', 'MG'), ('Curitiba', 'PR'), ('Porto Alegre', 'RS'), ('Salvador', 'BA'),
+    ('Recife', 'PE'), ('Fortaleza', 'CE'), ('Brasília', 'DF'), ('Goiânia', 'GO'),
+    ('Florianópolis', 'SC'), ('Manaus', 'AM'), ('Belém', 'PA'), ('Vitória', 'ES'),
+]
+# Prazos de pagamento (dias), com mais peso nos usuais
+PAYMENT_TERMS = [7, 10, 15, 15, 30, 30, 30, 45, 60]
+
+
+class Rollback(Exception):
+    """Usada para desfazer os dados gerados ao final de um benchmark"""
+
+
+def random_document(rng, client_type):
+    """CPF (pf) ou CNPJ (pj) aleatório, com dígitos verificadores válidos e formatado"""
+    while True:
+        if client_type == 'pf':
+            digits, weights = bytes(rng.choices(b'0123456789', k=9)), CPF_WEIGHTS
+        else:
+            # Raiz aleatória e estabelecimento 0001 (matriz)
+            digits, weights = bytes(rng.choices(b'0123456789', k=8)) + b'0001', CNPJ_WEIGHTS
+        # Documentos com todos os dígitos iguais são inválidos
+        if digits.count(digits[0]) != len(digits):
+            break
+    for digit_weights in weights:
+        digits += bytes([check_digit(digits, digit_weights)])
+    return format_document(digits.decode())
+
+
+def sample_invoices(count, seed=0):
+    """
+    Gera `count` notas fiscais válidas (não salvas), de forma determinística.
+
+    Os CPFs/CNPJs têm dígitos verificadores corretos e as emissões cobrem os
+    últimos dois anos, mais concentradas nos meses recentes; com os prazos
+    usuais, parte das notas ativas fica vencida.
+    """
+    rng = random.Random(seed)
+    today = timezone.now().date()
+    services = [code for code, _ in Invoice.SERVICE_TYPE_CHOICES]
+    payments = [code for code, _ in Invoice.PAYMENT_METHOD_CHOICES]
+
+    for index in range(count):
+        client_type = rng.choice(['pf', 'pj'])
+        issue_date = today - timedelta(days=int(rng.triangular(0, 730, 0)))
+        city, state = rng.choice(CITIES)
+        yield Invoice(
+            client_type=client_type,
+            document=random_document(rng, client_type),
+            name=f'Cliente {index}',
+            email=f'cliente{index % 500}@email.com',
+            phone='(11) 99999-1234',
+            address=f'Rua Teste, {index}',
+            neighborhood='Centro',
+            city=city,
+            state=state,
+            zip_code='01234-567',
+            service_description=f'Serviço de {rng.choice(services)} número {index}',
+            service_type=rng.choice(services),
+            value=Decimal(rng.randrange(1000, 1000000)) / 100,
+            tax=Decimal(rng.randrange(0, 2000)) / 100,
+            payment_method=rng.choice(payments),
+            issue_date=issue_date,
+            due_date=issue_date + timedelta(days=rng.choice(PAYMENT_TERMS)),
+            is_active=rng.random() > 0.1,
+        )
+
+
+def seed_invoices(count, batch_size=1000, seed=0):
+    """Insere `count` notas fiscais com bulk_create"""
+    return Invoice.objects.bulk_create(sample_invoices(count, seed), batch_size=batch_size)
+
+
+def run_with_rollback(function):
+    """Executa `function` em uma transação que é sempre desfeita"""
+    result = None
+    try:
+        with transaction.atomic():
+            result = function()
+            raise Rollback
+    except Rollback:
+        pass
+    return result
+
+
+def measure(function, repeat=5):
+    """Tempos (em segundos) de `repeat` execuções de `function`"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(values, percent):
+    """Percentil (vizinho mais próximo) de uma lista de números"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Banco de testes descartável para benchmarks que precisam de dados
+    efetivados (ex.: consultas feitas por outras threads).
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
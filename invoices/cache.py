@@ -0,0 +1,118 @@
+"""
+Cache do endpoint de estatísticas.
+
+As entradas são indexadas pelos parâmetros normalizados (`start_date`,
+`end_date`, `overdue` e a data atual, da qual dependem as vencidas) e por um
+número de versão. Qualquer escrita em `Invoice` incrementa a versão, o que
+invalida todas as entradas de uma vez sem precisar conhecê-las.
+"""
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+VERSION_KEY = 'invoices:statistics:version'
+KEY_PREFIX = 'invoices:statistics'
+
+
+class StatisticsCache:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'STATISTICS_CACHE_ALIAS', 'default')]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'STATISTICS_CACHE_TIMEOUT', 300)
+
+    def version(self):
+        version = self.cache.get(VERSION_KEY)
+        if version is None:
+            # Começa de um valor novo para não reaproveitar entradas antigas
+            self.cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+            version = self.cache.get(VERSION_KEY, 0)
+        return version
+
+    async def aversion(self):
+        version = await self.cache.aget(VERSION_KEY)
+        if version is None:
+            await self.cache.aadd(VERSION_KEY, time.time_ns(), timeout=None)
+            version = await self.cache.aget(VERSION_KEY, 0)
+        return version
+
+    def invalidate(self):
+        """Incrementa a versão, descartando todas as entradas"""
+        try:
+            self.cache.incr(VERSION_KEY)
+        except ValueError:
+            self.cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+    @staticmethod
+    def normalize(params):
+        """Parâmetros que influenciam o resultado, em forma canônica"""
+        def normalize_date(value):
+            if not value:
+                return ''
+            try:
+                parsed = parse_date(value)
+            except ValueError:
+                parsed = None
+            return parsed.isoformat() if parsed else value
+
+        return (
+            normalize_date(params.get('start_date')),
+            normalize_date(params.get('end_date')),
+            'overdue' if params.get('overdue') == 'true' else '',
+            timezone.now().date().isoformat(),
+        )
+
+    def key(self, params, version=None):
+        digest = hashlib.sha1('|'.join(self.normalize(params)).encode()).hexdigest()
+        return f'{KEY_PREFIX}:{self.version() if version is None else version}:{digest}'
+
+    def get_or_compute(self, params, compute):
+        """Retorna (resultado, hit) usando o cache quando possível"""
+        key = self.key(params)
+        result = self.cache.get(key)
+        if result is not None:
+            self._count(hit=True)
+            return result, True
+
+        self._count(hit=False)
+        result = compute(params)
+        self.cache.set(key, result, self.timeout)
+        return result, False
+
+    async def aget_or_compute(self, params, compute):
+        """Versão assíncrona de `get_or_compute` (`compute` é uma corrotina)"""
+        key = self.key(params, await self.aversion())
+        result = await self.cache.aget(key)
+        if result is not None:
+            self._count(hit=True)
+            return result, True
+
+        self._count(hit=False)
+        result = await compute(params)
+        await self.cache.aset(key, result, self.timeout)
+        return result, False
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def counters(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+statistics_cache = StatisticsCache()
@@ -0,0 +1,73 @@
+"""
+Validadores de GET condicional (ETag / Last-Modified) das notas fiscais.
+
+Os validadores são calculados antes de qualquer serialização. Na listagem
+paginada vêm das chaves (id, updated_at) da página pedida, lidas com a mesma
+consulta keyset da página (custo constante); sem paginação, do maior
+`updated_at` e da quantidade de linhas do queryset filtrado. No detalhe vêm
+do `updated_at` da nota.
+"""
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """ETag forte a partir das partes que identificam a representação"""
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def list_validators(request, queryset):
+    """ETag e Last-Modified (timestamp) de uma página ou do queryset filtrado"""
+    if queryset.query.is_sliced:
+        return page_validators(request, list(queryset.values_list('pk', 'updated_at')))
+
+    stats = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    last_modified = stats['last_modified']
+    fingerprint = last_modified.isoformat() if last_modified else ''
+    return build_list_validators(request, stats['count'], last_modified, fingerprint)
+
+
+async def alist_validators(request, queryset):
+    """Versão assíncrona de `list_validators` para uma página (queryset fatiado)"""
+    # values_list().aiterator() executa a consulta direto no contexto assíncrono
+    # (o iterável de tuplas não é um gerador); o async for busca via sync_to_async
+    rows = [row async for row in queryset.values_list('pk', 'updated_at')]
+    return page_validators(request, rows)
+
+
+def page_validators(request, rows):
+    """Validadores a partir das chaves (pk, updated_at) das linhas da página"""
+    last_modified = max((updated_at for _, updated_at in rows), default=None)
+    fingerprint = ','.join(f'{pk}:{updated_at.isoformat()}' for pk, updated_at in rows)
+    return build_list_validators(request, len(rows), last_modified, fingerprint)
+
+
+def build_list_validators(request, count, last_modified, fingerprint):
+    etag = make_etag(request.get_full_path(), request.accepted_renderer.format, count, fingerprint)
+    return etag, int(last_modified.timestamp()) if last_modified else None
+
+
+def instance_validators(request, instance):
+    """ETag e Last-Modified (timestamp) de uma nota"""
+    etag = make_etag(
+        instance.pk,
+        request.accepted_renderer.format,
+        instance.updated_at.isoformat(),
+    )
+    return etag, int(instance.updated_at.timestamp())
+
+
+def not_modified_response(request, etag, last_modified):
+    """Resposta 304 quando o cliente já tem a versão atual (ou None)"""
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    """Inclui ETag e Last-Modified na resposta"""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
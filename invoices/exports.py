@@ -0,0 +1,130 @@
+import csv
+import itertools
+import json
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from .models import Invoice
+from .serializers import InvoiceValuesSerializer
+from .utils import format_currency, format_document
+
+# Linhas lidas do banco por vez e linhas agrupadas em cada pedaço enviado
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_ROWS = 500
+
+STREAMING_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class Echo:
+    """Pseudo-buffer que devolve o que for escrito (para o csv.writer)"""
+
+    def write(self, value):
+        return value
+
+
+def iter_serialized(queryset, serializer_class=InvoiceValuesSerializer):
+    """Serializa as notas uma a uma, sem carregar o queryset inteiro"""
+    serializer = serializer_class()
+    if hasattr(serializer_class, 'values_queryset'):
+        queryset = serializer_class.values_queryset(queryset)
+    for invoice in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield serializer.to_representation(invoice)
+
+
+def buffered(lines, size=EXPORT_BUFFER_ROWS):
+    """Agrupa linhas em pedaços maiores para reduzir escritas no socket"""
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_csv(rows, fields, header=None):
+    """Gera o CSV linha a linha"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header or fields)
+    for row in rows:
+        yield writer.writerow(['' if row[field] is None else row[field] for field in fields])
+
+
+def iter_ndjson(rows):
+    """Gera um objeto JSON por linha"""
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+def streaming_export_response(queryset, export_format, serializer_class=InvoiceValuesSerializer):
+    """Resposta em streaming com as notas no formato `csv` ou `ndjson`"""
+    rows = iter_serialized(queryset, serializer_class)
+    if export_format == 'csv':
+        lines = iter_csv(rows, serializer_class.Meta.fields)
+    else:
+        lines = iter_ndjson(rows)
+
+    return attachment_response(buffered(lines), export_format)
+
+
+def attachment_response(chunks, export_format):
+    """StreamingHttpResponse para download do arquivo exportado"""
+    response = StreamingHttpResponse(chunks, content_type=STREAMING_CONTENT_TYPES[export_format])
+    filename = f"notas_fiscais_{timezone.now():%Y%m%d_%H%M%S}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def format_date(value):
+    return value.strftime('%d/%m/%Y')
+
+
+def format_choice(choices):
+    labels = dict(choices)
+    return lambda value: labels.get(value, value)
+
+
+# CSV do admin, para leitura por pessoas: (cabeçalho, campo, formatação)
+ADMIN_CSV_COLUMNS = [
+    ('Número', 'invoice_number', str),
+    ('Cliente', 'name', str),
+    ('Tipo de Cliente', 'client_type', format_choice(Invoice.CLIENT_TYPE_CHOICES)),
+    ('CPF/CNPJ', 'document', format_document),
+    ('Email', 'email', str),
+    ('Telefone', 'phone', str),
+    ('Cidade', 'city', str),
+    ('UF', 'state', str),
+    ('Serviço', 'service_type', format_choice(Invoice.SERVICE_TYPE_CHOICES)),
+    ('Valor', 'value', format_currency),
+    ('Imposto (%)', 'tax', lambda value: f'{value:.2f}'.replace('.', ',')),
+    ('Valor do Imposto', 'tax_amount', format_currency),
+    ('Total', 'total_value', format_currency),
+    ('Forma de Pagamento', 'payment_method', format_choice(Invoice.PAYMENT_METHOD_CHOICES)),
+    ('Emissão', 'issue_date', format_date),
+    ('Vencimento', 'due_date', format_date),
+    ('Ativa', 'is_active', lambda value: 'Sim' if value else 'Não'),
+]
+
+
+def iter_admin_rows(queryset):
+    """Linhas formatadas do CSV do admin, lidas do banco em pedaços"""
+    fields = [field for _, field, _ in ADMIN_CSV_COLUMNS]
+    formatters = [(field, formatter) for _, field, formatter in ADMIN_CSV_COLUMNS]
+    for row in queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            field: None if row[field] is None else formatter(row[field])
+            for field, formatter in formatters
+        }
+
+
+def admin_csv_response(queryset):
+    """CSV do admin em streaming; memória constante em qualquer volume"""
+    fields = [field for _, field, _ in ADMIN_CSV_COLUMNS]
+    header = [title for title, _, _ in ADMIN_CSV_COLUMNS]
+    # BOM: o Excel só reconhece o UTF-8 (acentos) com ele
+    lines = itertools.chain(['\ufeff'], iter_csv(iter_admin_rows(queryset), fields, header))
+    return attachment_response(buffered(lines), 'csv')
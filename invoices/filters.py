@@ -0,0 +1,22 @@
+from django.db.models import Value
+from django_filters import rest_framework as filters
+from .models import Invoice
+
+
+class InvoiceFilter(filters.FilterSet):
+    """Filtros da listagem de notas fiscais"""
+    # Faixas de valores sobre as colunas calculadas pelo banco
+    total_value__gte = filters.NumberFilter(field_name='total_value', lookup_expr='gte')
+    total_value__lte = filters.NumberFilter(field_name='total_value', lookup_expr='lte')
+    tax_amount__gte = filters.NumberFilter(field_name='tax_amount', lookup_expr='gte')
+    tax_amount__lte = filters.NumberFilter(field_name='tax_amount', lookup_expr='lte')
+    # Comparação explícita: `is_active=True` vira só "WHERE is_active", que o
+    # SQLite não usa para buscar no índice (is_active, -created_at, -id)
+    is_active = filters.BooleanFilter(method='filter_is_active')
+
+    def filter_is_active(self, queryset, name, value):
+        return queryset.filter(**{name: Value(value)})
+
+    class Meta:
+        model = Invoice
+        fields = ['client_type', 'service_type', 'payment_method', 'state', 'is_active']
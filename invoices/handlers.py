@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .cache import statistics_cache
+from .models import Invoice, InvoiceDailyStat, ROLLUP_FIELDS, ROLLUP_FIELD_ORDER
+from .signals import invoices_bulk_changed
+
+
+@receiver(pre_save, sender=Invoice)
+def capture_previous_rollup_state(sender, instance, raw=False, **kwargs):
+    """Garante o estado anterior da nota para o cálculo da diferença"""
+    if raw or instance._state.adding or hasattr(instance, '_rollup_loaded'):
+        return
+
+    # Instância criada fora do ORM (ex.: Invoice(pk=...)) ou carregada com
+    # campos do rollup adiados: busca os valores atuais
+    previous = sender.objects.filter(pk=instance.pk).values_list(*ROLLUP_FIELD_ORDER).first()
+    instance._rollup_loaded = previous
+
+
+@receiver(post_save, sender=Invoice)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    """Aplica a contribuição da nota salva no rollup diário"""
+    if raw:
+        return
+
+    current = instance.rollup_state()
+    previous = None if created else instance.loaded_rollup_state()
+
+    if previous != current:
+        if previous is not None:
+            key, value, tax_amount = previous
+            InvoiceDailyStat.apply_delta(key, -1, -value, -tax_amount)
+        key, value, tax_amount = current
+        InvoiceDailyStat.apply_delta(key, 1, value, tax_amount)
+
+    instance._rollup_loaded = instance.rollup_values()
+
+
+@receiver(post_delete, sender=Invoice)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    """Remove a contribuição da nota excluída do rollup diário"""
+    state = instance.loaded_rollup_state() or instance.rollup_state()
+    key, value, tax_amount = state
+    InvoiceDailyStat.apply_delta(key, -1, -value, -tax_amount)
+
+
+@receiver(invoices_bulk_changed, sender=Invoice)
+def rebuild_rollup_on_bulk_change(sender, days, fields, deltas=None, **kwargs):
+    """
+    Aplica as contribuições enviadas (bulk_create) ou, sem elas, recalcula
+    os dias afetados pela alteração em massa
+    """
+    if deltas is not None:
+        InvoiceDailyStat.apply_deltas(deltas)
+    elif set(fields) & ROLLUP_FIELDS:
+        InvoiceDailyStat.rebuild(days=days)
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(invoices_bulk_changed, sender=Invoice)
+def invalidate_statistics_cache(sender, using=None, raw=False, **kwargs):
+    """Invalida o cache de estatísticas em qualquer escrita de notas"""
+    if raw:
+        return
+    # Invalida já e de novo no commit, para que uma leitura feita durante a
+    # transação não deixe no cache um resultado anterior à escrita
+    statistics_cache.invalidate()
+    transaction.on_commit(statistics_cache.invalidate, using=using)
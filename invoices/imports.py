@@ -0,0 +1,48 @@
+"""
+Importação de notas fiscais a partir de CSV.
+
+As funções deste módulo rodam nos processos de validação do comando
+`import_invoices`, por isso recebem e devolvem apenas dados serializáveis.
+"""
+import json
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+from .serializers import InvoiceCreateSerializer
+
+# Linhas do CSV validadas por tarefa
+IMPORT_CHUNK_SIZE = 2000
+
+
+def clean_row(row):
+    """Descarta colunas vazias para que os campos opcionais usem o padrão"""
+    return {
+        field: value for field, value in row.items()
+        if field is not None and value not in ('', None)
+    }
+
+
+def validate_rows(chunk):
+    """
+    Valida um pedaço do CSV com as regras de `InvoiceCreateSerializer`.
+
+    Recebe (posição da primeira linha, linhas) e retorna (posição, dados
+    validados, rejeitadas), onde cada rejeitada é (número da linha, linha,
+    erros em JSON).
+    """
+    start, rows = chunk
+    # Uma única instância: montar os campos do ModelSerializer a cada linha
+    # custa mais que a própria validação
+    serializer = InvoiceCreateSerializer()
+    valid, rejected = [], []
+    for offset, row in enumerate(rows):
+        try:
+            data = serializer.run_validation(clean_row(row))
+        except ValidationError as exc:
+            rejected.append((
+                start + offset + 1,
+                row,
+                json.dumps(as_serializer_error(exc), ensure_ascii=False)
+            ))
+        else:
+            valid.append(InvoiceCreateSerializer.with_defaults(dict(data)))
+    return start, valid, rejected
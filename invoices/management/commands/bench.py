@@ -0,0 +1,125 @@
+import itertools
+import json
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from invoices.benchmark import benchmark_database, percentile, sample_invoices, seed_invoices
+from invoices.cache import statistics_cache
+from invoices.models import Invoice
+from mei_backend.metrics import QueryCollector
+
+# Campos enviados no POST de criação
+CREATE_FIELDS = [
+    'client_type', 'document', 'name', 'email', 'phone', 'address', 'neighborhood',
+    'city', 'state', 'zip_code', 'service_description', 'service_type', 'value',
+    'tax', 'payment_method', 'issue_date', 'due_date',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark das rotas de notas fiscais (listagem, detalhe, busca, '
+        'estatísticas, exportação e criação) sobre N notas geradas; imprime '
+        'p50/p95 e consultas por requisição em JSON (usa um banco de testes)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Notas geradas (padrão: 10000)')
+        parser.add_argument('--repeat', type=int, default=20, help='Requisições por rota (padrão: 20)')
+        parser.add_argument('--seed', type=int, default=0, help='Semente dos dados gerados (padrão: 0)')
+        parser.add_argument('--output', help='Também grava o JSON neste arquivo')
+
+    def handle(self, *args, **options):
+        # Como em produção: sem o log de consultas do DEBUG
+        with benchmark_database(), override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+            start = time.perf_counter()
+            seed_invoices(options['rows'], seed=options['seed'])
+            seed_seconds = time.perf_counter() - start
+
+            user = get_user_model().objects.create_user(
+                username='bench', email='bench@email.com', password='benchpass123'
+            )
+            self.client = APIClient()
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+
+            results = {
+                name: self.run(options['repeat'], requests)
+                for name, requests in self.scenarios(options).items()
+            }
+
+        report = {
+            'rows': options['rows'],
+            'seed': options['seed'],
+            'repeat': options['repeat'],
+            'seed_seconds': round(seed_seconds, 2),
+            'results': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
+
+    def scenarios(self, options):
+        """Geradores infinitos de requisições (função sem argumentos) por rota"""
+        pks = list(Invoice.objects.order_by('?').values_list('pk', flat=True)[:100])
+        names = list(Invoice.objects.order_by('?').values_list('name', flat=True)[:100])
+        new_invoices = sample_invoices(options['repeat'] + 1, seed=options['seed'] + 1)
+
+        def get(url, params=None):
+            return lambda: self.client.get(url, params)
+
+        def statistics():
+            # Sem o cache: mede a agregação, não a leitura do cache
+            statistics_cache.invalidate()
+            return self.client.get(reverse('invoice-statistics'))
+
+        def create(invoice):
+            data = {field: getattr(invoice, field) for field in CREATE_FIELDS}
+            # Notas novas: emitidas hoje, com o mesmo prazo de pagamento
+            today = timezone.now().date()
+            data['issue_date'] = today.isoformat()
+            data['due_date'] = (today + (invoice.due_date - invoice.issue_date)).isoformat()
+            return lambda: self.client.post(reverse('invoice-list'), data, format='json')
+
+        return {
+            'list': itertools.repeat(get(reverse('invoice-list'))),
+            'detail': (get(reverse('invoice-detail', kwargs={'pk': pk})) for pk in itertools.cycle(pks)),
+            'search': (get(reverse('invoice-list'), {'search': name}) for name in itertools.cycle(names)),
+            'statistics': itertools.repeat(statistics),
+            'export': itertools.repeat(get(reverse('invoice-export'), {'format': 'csv'})),
+            'create': (create(invoice) for invoice in new_invoices),
+        }
+
+    def run(self, repeat, requests):
+        """Faz uma requisição de aquecimento e mede as `repeat` seguintes"""
+        timings, queries = [], []
+        for index, request in enumerate(itertools.islice(requests, repeat + 1)):
+            collector = QueryCollector()
+            start = time.perf_counter()
+            with connection.execute_wrapper(collector):
+                response = request()
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+            elapsed = time.perf_counter() - start
+
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'{response.request["PATH_INFO"]}: status {response.status_code} {response.content[:500].decode(errors="replace")}'
+                )
+            if index:
+                timings.append(elapsed)
+                queries.append(collector.count)
+
+        return {
+            'p50_ms': round(percentile(timings, 50) * 1000, 2),
+            'p95_ms': round(percentile(timings, 95) * 1000, 2),
+            'queries': max(queries),
+        }
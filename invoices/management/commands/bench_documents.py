@@ -0,0 +1,91 @@
+import random
+import re
+from django.core.management.base import BaseCommand, CommandError
+from invoices import utils
+from invoices.benchmark import measure
+
+
+def legacy_validate_cpf(cpf):
+    """Implementação anterior de validate_cpf (referência do benchmark)"""
+    cpf = re.sub(r'[^\d]', '', cpf)
+
+    if len(cpf) != 11 or len(set(cpf)) == 1:
+        return False
+
+    for i in range(9, 11):
+        value = sum((int(cpf[num]) * ((i+1) - num) for num in range(0, i)))
+        digit = ((value * 10) % 11) % 10
+        if digit != int(cpf[i]):
+            return False
+    return True
+
+
+def legacy_validate_cnpj(cnpj):
+    """Implementação anterior de validate_cnpj (referência do benchmark)"""
+    cnpj = re.sub(r'[^\d]', '', cnpj)
+
+    if len(cnpj) != 14 or len(set(cnpj)) == 1:
+        return False
+
+    weights1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+    weights2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+
+    def calculate_digit(cnpj_digits, weights):
+        total = sum(int(digit) * weight for digit, weight in zip(cnpj_digits, weights))
+        remainder = total % 11
+        return 0 if remainder < 2 else 11 - remainder
+
+    digit1 = calculate_digit(cnpj[:12], weights1)
+    digit2 = calculate_digit(cnpj[:13], weights2)
+
+    return int(cnpj[12]) == digit1 and int(cnpj[13]) == digit2
+
+
+def sample_documents(count, seed=0):
+    """CPFs e CNPJs formatados, metade com dígitos verificadores corretos"""
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        kind, (first, second) = rng.choice(list(utils.DOCUMENT_TYPES.values()))
+        digits = bytes(rng.randrange(0x30, 0x3a) for _ in range(len(first)))
+        digits += bytes([utils.check_digit(digits, first)])
+        digits += bytes([utils.check_digit(digits, second)])
+        if rng.random() < 0.5:
+            digits = digits[:-1] + bytes([0x30 + (digits[-1] - 0x30 + 1) % 10])
+        text = digits.decode()
+        if kind == 'cpf':
+            documents.append(f'{text[:3]}.{text[3:6]}.{text[6:9]}-{text[9:]}')
+        else:
+            documents.append(f'{text[:2]}.{text[2:5]}.{text[5:8]}/{text[8:12]}-{text[12:]}')
+    return documents
+
+
+class Command(BaseCommand):
+    help = 'Compara a validação de CPF/CNPJ em lote com a implementação anterior'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000, help='Quantidade de documentos (padrão: 100000)')
+        parser.add_argument('--repeat', type=int, default=3, help='Execuções de cada caso (padrão: 3)')
+
+    def handle(self, *args, **options):
+        documents = sample_documents(options['count'])
+
+        def legacy():
+            return [
+                legacy_validate_cpf(document) or legacy_validate_cnpj(document)
+                for document in documents
+            ]
+
+        def batch():
+            return [valid for _, valid in utils.check_documents(documents)]
+
+        if legacy() != batch():
+            raise CommandError('A validação em lote diverge da implementação anterior')
+
+        before = min(measure(legacy, options['repeat']))
+        after = min(measure(batch, options['repeat']))
+        engine = 'NumPy' if utils.np is not None else 'Python'
+        self.stdout.write(
+            f'{len(documents)} documentos: anterior {len(documents) / before:,.0f}/s, '
+            f'lote ({engine}) {len(documents) / after:,.0f}/s ({before / after:.1f}x)'
+        )
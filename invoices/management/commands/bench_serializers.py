@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from invoices.benchmark import measure, run_with_rollback, seed_invoices
+from invoices.models import Invoice
+from invoices.serializers import (
+    InvoiceListSerializer,
+    InvoiceListValuesSerializer,
+    InvoiceSerializer,
+    InvoiceValuesSerializer
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a serialização por instâncias com a serialização por values() '
+        'na listagem e na exportação (os dados gerados são descartados)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Quantidade de notas (padrão: 10000)')
+        parser.add_argument('--repeat', type=int, default=3, help='Execuções de cada caso (padrão: 3)')
+
+    def handle(self, *args, **options):
+        run_with_rollback(lambda: self.run(options['rows'], options['repeat']))
+
+    def run(self, rows, repeat):
+        seed_invoices(rows)
+        queryset = Invoice.objects.order_by('-created_at', '-id')[:rows]
+
+        for label, model_serializer, values_serializer in [
+            ('listagem', InvoiceListSerializer, InvoiceListValuesSerializer),
+            ('exportação', InvoiceSerializer, InvoiceValuesSerializer),
+        ]:
+            def render_instances():
+                return JSONRenderer().render(model_serializer(list(queryset.all()), many=True).data)
+
+            def render_values():
+                values = values_serializer.values_queryset(queryset)
+                return JSONRenderer().render(values_serializer(list(values), many=True).data)
+
+            if render_instances() != render_values():
+                raise CommandError(f'O JSON da {label} por values() difere do original')
+
+            before = min(measure(render_instances, repeat))
+            after = min(measure(render_values, repeat))
+            self.stdout.write(
+                f'{label}: instâncias {rows / before:,.0f} linhas/s, '
+                f'values() {rows / after:,.0f} linhas/s ({before / after:.1f}x)'
+            )
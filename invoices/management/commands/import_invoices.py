@@ -0,0 +1,144 @@
+import csv
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from invoices.imports import IMPORT_CHUNK_SIZE, validate_rows
+from invoices.models import Invoice, InvoiceImport
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa notas fiscais de um arquivo CSV (uma coluna por campo da API), '
+        'validando em paralelo e gravando em lote'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo CSV com cabeçalho')
+        parser.add_argument(
+            '--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+            help=f'Linhas validadas e gravadas por vez (padrão: {IMPORT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Processos de validação (0 valida no próprio processo)'
+        )
+        parser.add_argument('--delimiter', default=',', help='Separador do CSV (padrão: ",")')
+        parser.add_argument('--rejects', help='Arquivo das linhas rejeitadas (padrão: <path>.rejects.csv)')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignora o progresso salvo e importa o arquivo desde o início'
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['path'])
+        if not os.path.exists(path):
+            raise CommandError(f'Arquivo não encontrado: {path}')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size deve ser maior que zero')
+
+        rejects_path = options['rejects'] or f'{path}.rejects.csv'
+        self.progress = self.load_progress(path, options['restart'])
+        skip = self.progress.rows
+
+        started = time.perf_counter()
+        processed = 0
+        with open(path, newline='', encoding='utf-8-sig') as source:
+            reader = csv.DictReader(source, delimiter=options['delimiter'])
+            if not reader.fieldnames:
+                raise CommandError('O arquivo não tem cabeçalho')
+
+            # Na retomada, as linhas já importadas são apenas lidas e descartadas
+            deque(islice(reader, skip), maxlen=0)
+            resuming = skip > 0 and os.path.exists(rejects_path)
+            with open(rejects_path, 'a' if resuming else 'w', newline='', encoding='utf-8') as rejects:
+                self.rejects_file = rejects
+                self.rejects = csv.writer(rejects)
+                if not resuming:
+                    self.rejects.writerow(['row', *reader.fieldnames, 'errors'])
+                self.fieldnames = reader.fieldnames
+
+                chunks = self.read_chunks(reader, options['chunk_size'], skip)
+                for result in self.validate(chunks, options['workers']):
+                    processed += self.store(result)
+                    if options['verbosity'] >= 2:
+                        self.stdout.write(f'{self.progress.rows} linha(s) processada(s)')
+
+        elapsed = time.perf_counter() - started
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{self.progress.imported} nota(s) importada(s), '
+            f'{self.progress.rejected} rejeitada(s); '
+            f'{processed} linha(s) nesta execução em {elapsed:.1f}s ({rate:,.0f} linhas/s).'
+        ))
+        if self.progress.rejected:
+            self.stdout.write(f'Linhas rejeitadas em {rejects_path}')
+
+    @staticmethod
+    def read_chunks(reader, chunk_size, start):
+        """Pedaços (posição da primeira linha, linhas) lidos sob demanda"""
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            yield start, rows
+            start += len(rows)
+
+    @staticmethod
+    def validate(chunks, workers):
+        """Resultados da validação na ordem do arquivo"""
+        if workers < 1:
+            yield from map(validate_rows, chunks)
+            return
+
+        # Processos novos (spawn) não herdam as conexões abertas com o banco
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=django.setup) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(validate_rows, chunk))
+                # Limita os pedaços em memória aguardando gravação
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def store(self, result):
+        """Grava as notas válidas e as rejeitadas de um pedaço"""
+        start, valid, rejected = result
+        # Rejeitadas primeiro: se a gravação falhar, a retomada as repete no
+        # arquivo, mas nenhuma se perde
+        for row_number, row, errors in rejected:
+            self.rejects.writerow([row_number, *(row.get(field) for field in self.fieldnames), errors])
+        self.rejects_file.flush()
+
+        progress = self.progress
+        progress.rows = start + len(valid) + len(rejected)
+        progress.imported += len(valid)
+        progress.rejected += len(rejected)
+        # Notas e progresso na mesma transação: uma interrupção nunca deixa
+        # um pedaço gravado sem registro. O bulk_create do queryset reserva a
+        # numeração em bloco e soma ao rollup só as contribuições do pedaço,
+        # sem recalcular os dias (que podem já ter muitas notas)
+        with transaction.atomic():
+            Invoice.objects.bulk_create(
+                [Invoice(**data) for data in valid],
+                batch_size=1000
+            )
+            progress.save(update_fields=['rows', 'imported', 'rejected', 'updated_at'])
+        return len(valid) + len(rejected)
+
+    def load_progress(self, path, restart):
+        """Progresso salvo da importação deste arquivo"""
+        progress, _ = InvoiceImport.objects.get_or_create(source=path)
+        if restart:
+            progress.rows = progress.imported = progress.rejected = 0
+            progress.save()
+        elif progress.rows:
+            self.stdout.write(f'Retomando a partir da linha {progress.rows + 1}')
+        return progress
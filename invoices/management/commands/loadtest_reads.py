@@ -0,0 +1,117 @@
+import asyncio
+import json
+import time
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from invoices.benchmark import benchmark_database, percentile, seed_invoices
+from invoices.models import Invoice
+
+
+class Command(BaseCommand):
+    help = (
+        'Teste de carga das leituras de notas fiscais pela aplicação ASGI, '
+        'comparando as views síncronas com as assíncronas (usa um banco de testes)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Notas geradas (padrão: 5000)')
+        parser.add_argument('--requests', type=int, default=500, help='Requisições por rota (padrão: 500)')
+        parser.add_argument('--concurrency', type=int, default=50, help='Clientes simultâneos (padrão: 50)')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            seed_invoices(options['rows'])
+            user = get_user_model().objects.create_user(
+                username='loadtest', email='loadtest@email.com', password='loadtest'
+            )
+            self.token = Token.objects.create(user=user).key
+            pk = Invoice.objects.values_list('pk', flat=True).first()
+
+            routes = [
+                ('listagem', reverse('invoice-list'), reverse('async-invoice-list')),
+                (
+                    'detalhe',
+                    reverse('invoice-detail', kwargs={'pk': pk}),
+                    reverse('async-invoice-detail', kwargs={'pk': pk})
+                ),
+                ('estatísticas', reverse('invoice-statistics'), reverse('async-invoice-statistics')),
+            ]
+            application = get_asgi_application()
+            results = {}
+            for name, sync_path, async_path in routes:
+                for mode, path in [('sync', sync_path), ('async', async_path)]:
+                    results[f'{name} ({mode})'] = asyncio.run(self.load(
+                        application, path, options['requests'], options['concurrency']
+                    ))
+
+        self.stdout.write(json.dumps(results, indent=2, ensure_ascii=False))
+
+    async def load(self, application, path, total, concurrency):
+        """Dispara `total` GETs com `concurrency` clientes simultâneos"""
+        latencies, statuses = [], {}
+        queue = asyncio.Queue()
+        for _ in range(total):
+            queue.put_nowait(path)
+
+        async def client():
+            while not queue.empty():
+                request_path = queue.get_nowait()
+                started = time.perf_counter()
+                status = await self.request(application, request_path)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return {
+            'requests_per_second': round(total / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'status': statuses,
+        }
+
+    async def request(self, application, path):
+        """GET direto na aplicação ASGI; retorna o status da resposta"""
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', b'localhost'),
+                (b'authorization', f'Token {self.token}'.encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        finished = asyncio.Event()
+        received = False
+        status = None
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Só desconecta depois da resposta, como um cliente real
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                finished.set()
+
+        await application(scope, receive, send)
+        return status
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from invoices.models import InvoiceDailyStat
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o rollup diário de estatísticas das notas fiscais'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start-date',
+            help='Reconstrói apenas a partir desta data de emissão (AAAA-MM-DD)'
+        )
+        parser.add_argument(
+            '--end-date',
+            help='Reconstrói apenas até esta data de emissão (AAAA-MM-DD)'
+        )
+
+    def handle(self, *args, **options):
+        rows = InvoiceDailyStat.rebuild(
+            start_date=options['start_date'],
+            end_date=options['end_date']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Rollup reconstruído: {rows} linha(s) gerada(s).'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from invoices.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = 'Recria o índice de busca textual das notas fiscais e reindexa todas as notas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Banco de dados (padrão: "default")'
+        )
+
+    def handle(self, *args, **options):
+        install_search_index(options['database'])
+        self.stdout.write(self.style.SUCCESS('Índice de busca recriado.'))
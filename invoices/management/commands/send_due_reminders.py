@@ -0,0 +1,137 @@
+import logging
+from itertools import groupby
+from operator import itemgetter
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from invoices.models import PaymentReminder
+from invoices.utils import format_currency
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Envia lembretes de pagamento das notas vencidas e a vencer, '
+        'um email por cliente, por uma única conexão SMTP'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=3,
+            help='Inclui as notas que vencem em até N dias (padrão: 3)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Emails enviados antes de registrar os lembretes (padrão: 100)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Notas lidas do banco por vez (padrão: 2000)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Apenas conta os emails que seriam enviados'
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        rows = PaymentReminder.pending(today, options['days']).iterator(
+            chunk_size=options['chunk_size']
+        )
+        self.from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None)
+        self.sent = self.failed = self.invoice_count = 0
+
+        # Notas ordenadas por email: só as de um cliente ficam em memória
+        # por vez, e o lote guarda no máximo `batch_size` mensagens
+        connection = None if options['dry_run'] else get_connection(fail_silently=False)
+        batch = []
+        try:
+            for email, group in groupby(rows, key=itemgetter('email')):
+                invoices = list(group)
+                if options['dry_run']:
+                    self.sent += 1
+                    self.invoice_count += len(invoices)
+                    continue
+
+                batch.append((self.build_message(email, invoices, today), invoices))
+                if len(batch) >= options['batch_size']:
+                    self.send_batch(connection, batch)
+                    batch = []
+            if batch:
+                self.send_batch(connection, batch)
+        finally:
+            if connection is not None:
+                connection.close()
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'{self.sent} email(s) seriam enviados ({self.invoice_count} nota(s)).'
+            )
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'{self.sent} email(s) enviado(s) ({self.invoice_count} nota(s)), '
+            f'{self.failed} falha(s).'
+        ))
+
+    def build_message(self, email, invoices, today):
+        """Um único email com todas as notas pendentes do cliente"""
+        lines = []
+        for invoice in invoices:
+            due_date = invoice['due_date'].strftime('%d/%m/%Y')
+            situation = f'vencida em {due_date}' if invoice['due_date'] < today else f'vence em {due_date}'
+            lines.append(
+                f"- NF {invoice['invoice_number']}: {format_currency(invoice['total_value'])} ({situation})"
+            )
+        total = sum(invoice['total_value'] for invoice in invoices)
+
+        body = f'''Olá, {invoices[0]['name']}!
+
+Este é um lembrete das suas notas fiscais com pagamento pendente:
+
+{chr(10).join(lines)}
+
+Total: {format_currency(total)}
+
+Se o pagamento já foi realizado, por favor desconsidere este email.
+
+Atenciosamente,
+Equipe MEI'''
+
+        return EmailMessage(
+            subject=f'Lembrete de pagamento: {len(invoices)} nota(s) fiscal(is)',
+            body=body,
+            from_email=self.from_email,
+            to=[email]
+        )
+
+    def send_batch(self, connection, batch):
+        """Envia um lote reaproveitando a conexão e registra os lembretes enviados"""
+        reminders = []
+        for message, invoices in batch:
+            try:
+                # Aberta explicitamente, a conexão segue aberta entre os envios
+                connection.open()
+                connection.send_messages([message])
+            except Exception as exc:
+                logger.warning('Falha ao enviar o lembrete para %s: %s', message.to[0], exc)
+                self.failed += 1
+                # A conexão pode ter ficado em estado inválido
+                connection.close()
+                continue
+
+            self.sent += 1
+            self.invoice_count += len(invoices)
+            reminders.extend(
+                PaymentReminder(
+                    invoice_id=invoice['id'],
+                    kind=invoice['reminder_kind'],
+                    due_date=invoice['due_date'],
+                    email=message.to[0]
+                )
+                for invoice in invoices
+            )
+
+        # Registrados após o envio: uma falha não marca o lembrete como enviado
+        PaymentReminder.objects.bulk_create(reminders, ignore_conflicts=True)
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0002_alter_invoice_tax_alter_invoice_value'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('year', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='Ano')),
+                ('last_number', models.PositiveIntegerField(default=0, verbose_name='Último Número')),
+            ],
+            options={
+                'verbose_name': 'Sequência de Notas Fiscais',
+                'verbose_name_plural': 'Sequências de Notas Fiscais',
+                'db_table': 'invoice_sequences',
+            },
+        ),
+    ]
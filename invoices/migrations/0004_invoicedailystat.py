@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:37
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_daily_stats(apps, schema_editor):
+    """Gera o rollup inicial a partir das notas já existentes"""
+    Invoice = apps.get_model('invoices', 'Invoice')
+    InvoiceDailyStat = apps.get_model('invoices', 'InvoiceDailyStat')
+    tax_field = DecimalField(max_digits=22, decimal_places=4)
+
+    rows = Invoice.objects.order_by().values(
+        'service_type', 'client_type', 'state', 'is_active', day=F('issue_date')
+    ).annotate(
+        invoice_count=Count('id'),
+        value_sum=Coalesce(Sum('value'), Value(Decimal('0.00'))),
+        tax_sum=Coalesce(
+            Sum(ExpressionWrapper(F('value') * F('tax'), output_field=tax_field)),
+            Value(Decimal('0.00')),
+            output_field=tax_field
+        ),
+    )
+    InvoiceDailyStat.objects.bulk_create(
+        (InvoiceDailyStat(**row) for row in rows.iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0003_invoicesequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Dia de Emissão')),
+                ('service_type', models.CharField(choices=[('dev', 'Desenvolvimento de Software'), ('design', 'Design Gráfico'), ('consulting', 'Consultoria')], max_length=20)),
+                ('client_type', models.CharField(choices=[('pf', 'Pessoa Física'), ('pj', 'Pessoa Jurídica')], max_length=2)),
+                ('state', models.CharField(choices=[('AC', 'Acre'), ('AL', 'Alagoas'), ('AP', 'Amapá'), ('AM', 'Amazonas'), ('BA', 'Bahia'), ('CE', 'Ceará'), ('DF', 'Distrito Federal'), ('ES', 'Espírito Santo'), ('GO', 'Goiás'), ('MA', 'Maranhão'), ('MT', 'Mato Grosso'), ('MS', 'Mato Grosso do Sul'), ('MG', 'Minas Gerais'), ('PA', 'Pará'), ('PB', 'Paraíba'), ('PR', 'Paraná'), ('PE', 'Pernambuco'), ('PI', 'Piauí'), ('RJ', 'Rio de Janeiro'), ('RN', 'Rio Grande do Norte'), ('RS', 'Rio Grande do Sul'), ('RO', 'Rondônia'), ('RR', 'Roraima'), ('SC', 'Santa Catarina'), ('SP', 'São Paulo'), ('SE', 'Sergipe'), ('TO', 'Tocantins')], max_length=2)),
+                ('is_active', models.BooleanField()),
+                ('invoice_count', models.IntegerField(default=0)),
+                ('value_sum', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20)),
+                ('tax_sum', models.DecimalField(decimal_places=4, default=Decimal('0.00'), max_digits=22)),
+            ],
+            options={
+                'verbose_name': 'Estatística Diária',
+                'verbose_name_plural': 'Estatísticas Diárias',
+                'db_table': 'invoice_daily_stats',
+                'constraints': [models.UniqueConstraint(fields=('day', 'service_type', 'client_type', 'state', 'is_active'), name='invoice_daily_stats_unique_key')],
+            },
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0004_invoicedailystat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['-created_at', '-id'], name='invoices_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['client_type', '-created_at', '-id'], name='invoices_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['service_type', '-created_at', '-id'], name='invoices_service_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['state', '-created_at', '-id'], name='invoices_state_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['is_active', '-created_at', '-id'], name='invoices_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['issue_date', 'id'], name='invoices_issue_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['due_date', 'id'], name='invoices_due_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['value', 'id'], name='invoices_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['due_date', 'issue_date'], name='invoices_active_due_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:10
+
+from django.db import migrations
+
+# SQL congelado nesta migração: alterações posteriores em invoices/search.py
+# não mudam o que ela cria
+SQLITE_INSTALL = [
+    'DROP TRIGGER IF EXISTS invoices_fts_ai',
+    'DROP TRIGGER IF EXISTS invoices_fts_ad',
+    'DROP TRIGGER IF EXISTS invoices_fts_au',
+    'DROP TABLE IF EXISTS invoices_fts',
+    "CREATE VIRTUAL TABLE invoices_fts USING fts5(name, email, document, document_digits, "
+    "invoice_number, service_description, tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER invoices_fts_ai AFTER INSERT ON invoices BEGIN "
+    "INSERT INTO invoices_fts(rowid, name, email, document, document_digits, invoice_number, service_description) "
+    "VALUES (new.rowid, new.name, new.email, new.document, "
+    "replace(replace(replace(new.document, '.', ''), '-', ''), '/', ''), new.invoice_number, new.service_description); END",
+    'CREATE TRIGGER invoices_fts_ad AFTER DELETE ON invoices BEGIN '
+    'DELETE FROM invoices_fts WHERE rowid = old.rowid; END',
+    "CREATE TRIGGER invoices_fts_au AFTER UPDATE OF name, email, document, invoice_number, service_description "
+    "ON invoices BEGIN UPDATE invoices_fts SET name = new.name, email = new.email, document = new.document, "
+    "document_digits = replace(replace(replace(new.document, '.', ''), '-', ''), '/', ''), "
+    "invoice_number = new.invoice_number, service_description = new.service_description "
+    "WHERE rowid = old.rowid; END",
+    "INSERT INTO invoices_fts(rowid, name, email, document, document_digits, invoice_number, service_description) "
+    "SELECT rowid, name, email, document, replace(replace(replace(invoices.document, '.', ''), '-', ''), '/', ''), "
+    "invoice_number, service_description FROM invoices",
+]
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS invoices_fts_ai',
+    'DROP TRIGGER IF EXISTS invoices_fts_ad',
+    'DROP TRIGGER IF EXISTS invoices_fts_au',
+    'DROP TABLE IF EXISTS invoices_fts',
+]
+PG_INSTALL = [
+    "CREATE INDEX IF NOT EXISTS invoices_search_gin_idx ON invoices USING gin ((to_tsvector('portuguese', "
+    "coalesce(\"name\", '') || ' ' || coalesce(\"email\", '') || ' ' || coalesce(\"document\", '') || ' ' || "
+    "regexp_replace(coalesce(\"document\", ''), '[^0-9]', '', 'g') || ' ' || "
+    "coalesce(\"invoice_number\", '') || ' ' || coalesce(\"service_description\", ''))))",
+]
+PG_UNINSTALL = ['DROP INDEX IF EXISTS invoices_search_gin_idx']
+
+
+def run(schema_editor, sqlite, postgresql):
+    statements = {'sqlite': sqlite, 'postgresql': postgresql}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def install(apps, schema_editor):
+    run(schema_editor, SQLITE_INSTALL, PG_INSTALL)
+
+
+def uninstall(apps, schema_editor):
+    run(schema_editor, SQLITE_UNINSTALL, PG_UNINSTALL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0005_invoice_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:53
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from decimal import Decimal
+from django.db import migrations, models
+
+# Recria os triggers do índice de busca de 0006 (SQL congelado, como lá)
+SQLITE_SEARCH_INDEX = [
+    'DROP TRIGGER IF EXISTS invoices_fts_ai',
+    'DROP TRIGGER IF EXISTS invoices_fts_ad',
+    'DROP TRIGGER IF EXISTS invoices_fts_au',
+    'DROP TABLE IF EXISTS invoices_fts',
+    "CREATE VIRTUAL TABLE invoices_fts USING fts5(name, email, document, document_digits, "
+    "invoice_number, service_description, tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER invoices_fts_ai AFTER INSERT ON invoices BEGIN "
+    "INSERT INTO invoices_fts(rowid, name, email, document, document_digits, invoice_number, service_description) "
+    "VALUES (new.rowid, new.name, new.email, new.document, "
+    "replace(replace(replace(new.document, '.', ''), '-', ''), '/', ''), new.invoice_number, new.service_description); END",
+    'CREATE TRIGGER invoices_fts_ad AFTER DELETE ON invoices BEGIN '
+    'DELETE FROM invoices_fts WHERE rowid = old.rowid; END',
+    "CREATE TRIGGER invoices_fts_au AFTER UPDATE OF name, email, document, invoice_number, service_description "
+    "ON invoices BEGIN UPDATE invoices_fts SET name = new.name, email = new.email, document = new.document, "
+    "document_digits = replace(replace(replace(new.document, '.', ''), '-', ''), '/', ''), "
+    "invoice_number = new.invoice_number, service_description = new.service_description "
+    "WHERE rowid = old.rowid; END",
+    "INSERT INTO invoices_fts(rowid, name, email, document, document_digits, invoice_number, service_description) "
+    "SELECT rowid, name, email, document, replace(replace(replace(invoices.document, '.', ''), '-', ''), '/', ''), "
+    "invoice_number, service_description FROM invoices",
+]
+
+
+def reinstall_search_index(apps, schema_editor):
+    # No SQLite a tabela é recriada para incluir as colunas geradas, o que
+    # remove os triggers do índice de busca (o índice GIN do PostgreSQL não muda)
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_SEARCH_INDEX:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0006_invoice_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search_index),
+        migrations.AddField(
+            model_name='invoice',
+            name='tax_amount',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce(django.db.models.expressions.CombinedExpression(models.F('value'), '*', models.F('tax')), models.Value(Decimal('0.00'))), output_field=models.DecimalField(decimal_places=4, max_digits=16), verbose_name='Valor do Imposto'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='total_value',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce(django.db.models.expressions.CombinedExpression(models.F('value'), '+', django.db.models.expressions.CombinedExpression(models.F('value'), '*', models.F('tax'))), models.Value(Decimal('0.00'))), output_field=models.DecimalField(decimal_places=4, max_digits=16), verbose_name='Valor Total'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['total_value', 'id'], name='invoices_total_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['tax_amount', 'id'], name='invoices_tax_amount_idx'),
+        ),
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+    ]
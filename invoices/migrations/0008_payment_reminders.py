@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0007_invoice_stored_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('due_soon', 'A vencer'), ('overdue', 'Vencida')], max_length=10, verbose_name='Tipo')),
+                ('due_date', models.DateField(verbose_name='Vencimento')),
+                ('email', models.EmailField(max_length=254, verbose_name='Destinatário')),
+                ('sent_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Enviado em')),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='invoices.invoice', verbose_name='Nota Fiscal')),
+            ],
+            options={
+                'verbose_name': 'Lembrete de Pagamento',
+                'verbose_name_plural': 'Lembretes de Pagamento',
+                'db_table': 'payment_reminders',
+                'ordering': ['-sent_at'],
+                'constraints': [models.UniqueConstraint(fields=('invoice', 'kind', 'due_date'), name='payment_reminders_unique_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0008_payment_reminders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=1024, unique=True, verbose_name='Arquivo')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Linhas Processadas')),
+                ('imported', models.PositiveIntegerField(default=0, verbose_name='Notas Importadas')),
+                ('rejected', models.PositiveIntegerField(default=0, verbose_name='Linhas Rejeitadas')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Importação de Notas Fiscais',
+                'verbose_name_plural': 'Importações de Notas Fiscais',
+                'db_table': 'invoice_imports',
+            },
+        ),
+    ]
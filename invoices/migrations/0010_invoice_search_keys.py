@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:30
+
+from django.db import migrations
+
+# O FTS5 passa a usar um inteiro estável por nota (invoices_search_keys) no
+# lugar do rowid implícito de `invoices`, que o VACUUM pode renumerar.
+# SQL congelado nesta migração (ver invoices/search.py para a versão atual).
+SQLITE_INSTALL = [
+    'DROP TRIGGER IF EXISTS invoices_fts_ai',
+    'DROP TRIGGER IF EXISTS invoices_fts_ad',
+    'DROP TRIGGER IF EXISTS invoices_fts_au',
+    'DROP TABLE IF EXISTS invoices_fts',
+    'DROP TABLE IF EXISTS invoices_search_keys',
+    'CREATE TABLE invoices_search_keys (search_rowid INTEGER PRIMARY KEY, invoice_id char(32) NOT NULL UNIQUE)',
+    "CREATE VIRTUAL TABLE invoices_fts USING fts5(name, email, document, document_digits, "
+    "invoice_number, service_description, tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER invoices_fts_ai AFTER INSERT ON invoices BEGIN "
+    "INSERT INTO invoices_search_keys(invoice_id) VALUES (new.id); "
+    "INSERT INTO invoices_fts(rowid, name, email, document, document_digits, invoice_number, service_description) "
+    "VALUES ((SELECT search_rowid FROM invoices_search_keys WHERE invoice_id = new.id), new.name, new.email, "
+    "new.document, replace(replace(replace(new.document, '.', ''), '-', ''), '/', ''), new.invoice_number, "
+    "new.service_description); END",
+    'CREATE TRIGGER invoices_fts_ad AFTER DELETE ON invoices BEGIN '
+    'DELETE FROM invoices_fts WHERE rowid = (SELECT search_rowid FROM invoices_search_keys WHERE invoice_id = old.id); '
+    'DELETE FROM invoices_search_keys WHERE invoice_id = old.id; END',
+    "CREATE TRIGGER invoices_fts_au AFTER UPDATE OF name, email, document, invoice_number, service_description "
+    "ON invoices BEGIN UPDATE invoices_fts SET name = new.name, email = new.email, document = new.document, "
+    "document_digits = replace(replace(replace(new.document, '.', ''), '-', ''), '/', ''), "
+    "invoice_number = new.invoice_number, service_description = new.service_description "
+    "WHERE rowid = (SELECT search_rowid FROM invoices_search_keys WHERE invoice_id = old.id); END",
+    'INSERT INTO invoices_search_keys(invoice_id) SELECT id FROM invoices',
+    "INSERT INTO invoices_fts(rowid, name, email, document, document_digits, invoice_number, service_description) "
+    "SELECT invoices_search_keys.search_rowid, invoices.name, invoices.email, invoices.document, "
+    "replace(replace(replace(invoices.document, '.', ''), '-', ''), '/', ''), invoices.invoice_number, "
+    "invoices.service_description FROM invoices JOIN invoices_search_keys ON invoices_search_keys.invoice_id = invoices.id",
+]
+
+# Volta à estrutura de 0006 (FTS5 ligado ao rowid de `invoices`)
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS invoices_fts_ai',
+    'DROP TRIGGER IF EXISTS invoices_fts_ad',
+    'DROP TRIGGER IF EXISTS invoices_fts_au',
+    'DROP TABLE IF EXISTS invoices_fts',
+    'DROP TABLE IF EXISTS invoices_search_keys',
+    "CREATE VIRTUAL TABLE invoices_fts USING fts5(name, email, document, document_digits, "
+    "invoice_number, service_description, tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER invoices_fts_ai AFTER INSERT ON invoices BEGIN "
+    "INSERT INTO invoices_fts(rowid, name, email, document, document_digits, invoice_number, service_description) "
+    "VALUES (new.rowid, new.name, new.email, new.document, "
+    "replace(replace(replace(new.document, '.', ''), '-', ''), '/', ''), new.invoice_number, new.service_description); END",
+    'CREATE TRIGGER invoices_fts_ad AFTER DELETE ON invoices BEGIN '
+    'DELETE FROM invoices_fts WHERE rowid = old.rowid; END',
+    "CREATE TRIGGER invoices_fts_au AFTER UPDATE OF name, email, document, invoice_number, service_description "
+    "ON invoices BEGIN UPDATE invoices_fts SET name = new.name, email = new.email, document = new.document, "
+    "document_digits = replace(replace(replace(new.document, '.', ''), '-', ''), '/', ''), "
+    "invoice_number = new.invoice_number, service_description = new.service_description "
+    "WHERE rowid = old.rowid; END",
+    "INSERT INTO invoices_fts(rowid, name, email, document, document_digits, invoice_number, service_description) "
+    "SELECT rowid, name, email, document, replace(replace(replace(invoices.document, '.', ''), '-', ''), '/', ''), "
+    "invoice_number, service_description FROM invoices",
+]
+
+
+def install(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_INSTALL:
+            schema_editor.execute(statement)
+
+
+def uninstall(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_UNINSTALL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0009_invoice_imports'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
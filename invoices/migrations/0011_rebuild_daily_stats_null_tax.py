@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:10
+
+from decimal import Decimal
+from django.db import migrations
+from django.db.models import Case, Count, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+def rebuild_daily_stats(apps, schema_editor):
+    """
+    Regera o rollup: notas sem alíquota passam a contar valor 0, como em
+    `total_value`, e não mais o valor cheio.
+    """
+    Invoice = apps.get_model('invoices', 'Invoice')
+    InvoiceDailyStat = apps.get_model('invoices', 'InvoiceDailyStat')
+    tax_field = DecimalField(max_digits=22, decimal_places=4)
+
+    rows = Invoice.objects.order_by().values(
+        'service_type', 'client_type', 'state', 'is_active', day=F('issue_date')
+    ).annotate(
+        invoice_count=Count('id'),
+        value_sum=Coalesce(
+            Sum(Case(
+                When(tax__isnull=True, then=Value(Decimal('0.00'))),
+                default=F('value'),
+                output_field=DecimalField(max_digits=10, decimal_places=2)
+            )),
+            Value(Decimal('0.00'))
+        ),
+        tax_sum=Coalesce(Sum('tax_amount'), Value(Decimal('0.00')), output_field=tax_field),
+    )
+    InvoiceDailyStat.objects.all().delete()
+    InvoiceDailyStat.objects.bulk_create(
+        (InvoiceDailyStat(**row) for row in rows.iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0010_invoice_search_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_daily_stats, migrations.RunPython.noop),
+    ]
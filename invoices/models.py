@@ -1,9 +1,114 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Q, Count, Sum, DecimalField, Value, Case, When, Exists, OuterRef
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.core.validators import RegexValidator, EmailValidator
-from decimal import Decimal, InvalidOperation
+from datetime import timedelta
+from decimal import Decimal
+import operator
 import uuid
 
+from .signals import invoices_bulk_changed
+
+# Campos que alimentam o rollup diário de estatísticas, na ordem usada por
+# `Invoice.rollup_values()` e `Invoice.rollup_state()`
+ROLLUP_FIELD_ORDER = (
+    'issue_date', 'service_type', 'client_type', 'state', 'is_active', 'value', 'tax',
+)
+ROLLUP_FIELDS = frozenset(ROLLUP_FIELD_ORDER)
+
+
+def rollup_value():
+    """
+    Valor da nota que entra no rollup: zero sem alíquota, já que
+    `total_value` (value + value * tax) é nulo e vira 0 nesse caso.
+    """
+    return Case(
+        When(tax__isnull=True, then=Value(Decimal('0.00'))),
+        default=F('value'),
+        output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+
+
+_rollup_values = operator.itemgetter(*ROLLUP_FIELD_ORDER)
+
+
+class InvoiceQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        INSERT em lote com numeração e rollup.
+
+        Notas sem número recebem um bloco contíguo reservado de uma vez na
+        sequência do ano, e as contribuições das notas criadas, somadas por
+        chave do rollup, são aplicadas via `invoices_bulk_changed`, tudo na
+        mesma transação. Com `ignore_conflicts`/`update_conflicts` não se
+        sabe o que foi inserido, e os dias afetados são recalculados.
+        """
+        objs = list(objs)
+        if not objs:
+            return objs
+
+        with transaction.atomic(using=self.db):
+            unnumbered = [obj for obj in objs if not obj.invoice_number]
+            if unnumbered:
+                year = timezone.now().year
+                numbers = InvoiceSequence.reserve(year, len(unnumbered))
+                for obj, number in zip(unnumbered, numbers):
+                    obj.invoice_number = InvoiceSequence.format_number(year, number)
+
+            created = super().bulk_create(objs, *args, **kwargs)
+            deltas = {}
+            for obj in created:
+                obj._rollup_loaded = obj.rollup_values()
+                key, value, tax_amount = obj.rollup_state(obj._rollup_loaded)
+                count, value_sum, tax_sum = deltas.get(key, (0, Decimal('0.00'), Decimal('0.00')))
+                deltas[key] = (count + 1, value_sum + value, tax_sum + tax_amount)
+
+            conflicts = kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts')
+            invoices_bulk_changed.send(
+                sender=self.model,
+                days={key[0] for key in deltas},
+                fields={field.name for field in self.model._meta.concrete_fields},
+                deltas=None if conflicts else deltas,
+                using=self.db
+            )
+        return created
+
+    def update(self, **kwargs):
+        """
+        UPDATE em massa que mantém o rollup de estatísticas consistente.
+
+        O `update()` padrão não dispara sinais por objeto, então as datas de
+        emissão afetadas são coletadas e enviadas em `invoices_bulk_changed`.
+        """
+        fields = set(kwargs)
+        if not fields & ROLLUP_FIELDS:
+            rows = super().update(**kwargs)
+            if rows:
+                invoices_bulk_changed.send(
+                    sender=self.model, days=set(), fields=fields, using=self.db
+                )
+            return rows
+
+        with transaction.atomic(using=self.db):
+            days = set(
+                self.order_by().values_list('issue_date', flat=True).distinct()
+            )
+            new_issue_date = kwargs.get('issue_date')
+            if new_issue_date is not None:
+                if hasattr(new_issue_date, 'resolve_expression'):
+                    days = None  # Expressão: não há como saber os dias de destino
+                else:
+                    days.add(self.model._meta.get_field('issue_date').to_python(new_issue_date))
+
+            rows = super().update(**kwargs)
+            if rows:
+                invoices_bulk_changed.send(
+                    sender=self.model, days=days, fields=fields, using=self.db
+                )
+        return rows
+
+
 class Invoice(models.Model):
     CLIENT_TYPE_CHOICES = [
         ('pf', 'Pessoa Física'),
@@ -112,6 +217,19 @@ class Invoice(models.Model):
         default=Decimal('0.00'),
         verbose_name="Imposto (%)"
     )
+    # Totais calculados e gravados pelo banco (filtro, ordenação e soma em SQL)
+    tax_amount = models.GeneratedField(
+        expression=Coalesce(F('value') * F('tax'), Value(Decimal('0.00'))),
+        output_field=models.DecimalField(max_digits=16, decimal_places=4),
+        db_persist=True,
+        verbose_name="Valor do Imposto"
+    )
+    total_value = models.GeneratedField(
+        expression=Coalesce(F('value') + F('value') * F('tax'), Value(Decimal('0.00'))),
+        output_field=models.DecimalField(max_digits=16, decimal_places=4),
+        db_persist=True,
+        verbose_name="Valor Total"
+    )
     
     # Informações Adicionais
     additional_info = models.TextField(
@@ -131,62 +249,412 @@ class Invoice(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+
+    objects = InvoiceQuerySet.as_manager()
     
     class Meta:
         db_table = 'invoices'
         verbose_name = 'Nota Fiscal'
         verbose_name_plural = 'Notas Fiscais'
         ordering = ['-created_at']
+        indexes = [
+            # Listagem padrão e paginação por cursor (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='invoices_created_id_idx'),
+            # Filtros do filterset combinados com a ordenação padrão
+            models.Index(fields=['client_type', '-created_at', '-id'], name='invoices_client_created_idx'),
+            models.Index(fields=['service_type', '-created_at', '-id'], name='invoices_service_created_idx'),
+            models.Index(fields=['state', '-created_at', '-id'], name='invoices_state_created_idx'),
+            models.Index(fields=['is_active', '-created_at', '-id'], name='invoices_active_created_idx'),
+            # Períodos de emissão e demais campos de ordenação
+            models.Index(fields=['issue_date', 'id'], name='invoices_issue_date_idx'),
+            models.Index(fields=['due_date', 'id'], name='invoices_due_date_idx'),
+            models.Index(fields=['value', 'id'], name='invoices_value_idx'),
+            models.Index(fields=['total_value', 'id'], name='invoices_total_value_idx'),
+            models.Index(fields=['tax_amount', 'id'], name='invoices_tax_amount_idx'),
+            # Notas vencidas: apenas as ativas, por vencimento
+            models.Index(
+                fields=['due_date', 'issue_date'],
+                condition=Q(is_active=True),
+                name='invoices_active_due_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"NF {self.invoice_number} - {self.name}"
     
-    def save(self, *args, **kwargs):
-        if not self.invoice_number:
-            # Gerar número da nota fiscal automaticamente
-            last_invoice = Invoice.objects.filter(
-                invoice_number__startswith=timezone.now().strftime('%Y')
-            ).order_by('invoice_number').last()
-            
-            if last_invoice:
-                last_number = int(last_invoice.invoice_number.split('-')[1])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-                
-            self.invoice_number = f"{timezone.now().strftime('%Y')}-{new_number:06d}"
-        
-        super().save(*args, **kwargs)
-    
-    @property
-    def total_value(self):
-        """Calcula o valor total com impostos"""
-        # Verifica se os valores não são None antes de calcular
-        if self.value is None or self.tax is None:
-            return Decimal('0.00')
-        
-        try: 
-            # Garantir que value e tax são Decimal
-            value = Decimal(str(self.value)) if not isinstance(self.value, Decimal) else self.value
-            tax = Decimal(str(self.tax)) if not isinstance(self.tax, Decimal) else self.tax
-            
-            tax_amount = value * tax
-            return value + tax_amount
-        except (TypeError, ValueError, InvalidOperation):
-            return Decimal('0.00')
-
-    @property
-    def tax_amount(self):
-        """Calcula o valor do imposto"""
-        # Tratamento seguro para valores None
-        if self.value is None or self.tax is None:
-            return Decimal('0.00')
-        
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda só os valores brutos carregados: o estado do rollup, que
+        # converte e multiplica, é calculado apenas se a nota for salva ou
+        # excluída, e não para cada linha lida
         try:
-            # Garantir que value e tax são Decimal
-            value = Decimal(str(self.value)) if not isinstance(self.value, Decimal) else self.value
-            tax = Decimal(str(self.tax)) if not isinstance(self.tax, Decimal) else self.tax
+            instance._rollup_loaded = _rollup_values(instance.__dict__)
+        except KeyError:
+            pass  # Algum campo do rollup foi adiado (only/defer)
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Numeração, nota e rollup são gravados na mesma transação
+        with transaction.atomic(using=kwargs.get('using')):
+            if not self.invoice_number:
+                # Gerar número da nota fiscal automaticamente
+                year = timezone.now().year
+                new_number = InvoiceSequence.reserve(year)[0]
+                self.invoice_number = InvoiceSequence.format_number(year, new_number)
             
-            return value * tax
-        except (TypeError, ValueError, InvalidOperation):
-            return Decimal('0.00')
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+
+        # O UPDATE não devolve as colunas geradas: descarta os totais antigos
+        # para que sejam relidos do banco no próximo acesso
+        if not adding:
+            for field in self._meta.concrete_fields:
+                if field.generated:
+                    self.__dict__.pop(field.attname, None)
+
+    def rollup_values(self):
+        """Valores atuais dos campos do rollup, na ordem de `ROLLUP_FIELD_ORDER`"""
+        return tuple(getattr(self, name) for name in ROLLUP_FIELD_ORDER)
+
+    def loaded_rollup_state(self):
+        """
+        Estado do rollup com os valores lidos do banco (ou do último save);
+        None se não foram guardados.
+        """
+        loaded = getattr(self, '_rollup_loaded', None)
+        return None if loaded is None else self.rollup_state(loaded)
+
+    def rollup_state(self, values=None):
+        """
+        Chave e valores com que a nota contribui para o rollup diário.
+
+        `values` (ver `rollup_values()`) permite calcular o estado de valores
+        guardados; por padrão usa os atuais. Como em `total_value`, uma nota
+        sem alíquota não soma valor algum.
+        """
+        opts = self._meta
+        issue_date, service_type, client_type, state, is_active, value, tax = (
+            values if values is not None else self.rollup_values()
+        )
+        key = (
+            opts.get_field('issue_date').to_python(issue_date),
+            service_type,
+            client_type,
+            state,
+            bool(is_active),
+        )
+        value = opts.get_field('value').to_python(value)
+        tax = opts.get_field('tax').to_python(tax)
+        if value is None or tax is None:
+            return key, Decimal('0.00'), Decimal('0.00')
+        return key, value, value * tax
+
+
+class InvoiceSequence(models.Model):
+    """Contador anual usado na numeração das notas fiscais"""
+    year = models.PositiveIntegerField(primary_key=True, verbose_name="Ano")
+    last_number = models.PositiveIntegerField(default=0, verbose_name="Último Número")
+
+    class Meta:
+        db_table = 'invoice_sequences'
+        verbose_name = 'Sequência de Notas Fiscais'
+        verbose_name_plural = 'Sequências de Notas Fiscais'
+
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+    @staticmethod
+    def format_number(year, number):
+        """Monta o número da nota fiscal no formato AAAA-NNNNNN"""
+        return f"{year}-{number:06d}"
+
+    @classmethod
+    def reserve(cls, year, count=1):
+        """
+        Reserva um bloco contíguo de `count` números para o ano informado.
+
+        O incremento é feito com um único UPDATE atômico, então requisições
+        concorrentes nunca recebem o mesmo número. Retorna um `range` com os
+        números reservados.
+        """
+        if count < 1:
+            raise ValueError("A quantidade de números reservados deve ser positiva")
+
+        with transaction.atomic():
+            updated = cls.objects.filter(year=year).update(
+                last_number=F('last_number') + count
+            )
+            if not updated:
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(
+                            year=year,
+                            last_number=cls._highest_issued(year) + count
+                        )
+                except IntegrityError:
+                    # Outra requisição criou a sequência do ano primeiro
+                    cls.objects.filter(year=year).update(
+                        last_number=F('last_number') + count
+                    )
+            last_number = cls.objects.filter(year=year).values_list(
+                'last_number', flat=True
+            ).get()
+
+        return range(last_number - count + 1, last_number + 1)
+
+    @staticmethod
+    def _highest_issued(year):
+        """Maior número já emitido no ano (usado só ao criar a sequência)"""
+        last_invoice_number = Invoice.objects.filter(
+            invoice_number__startswith=f"{year}-"
+        ).order_by('-invoice_number').values_list('invoice_number', flat=True).first()
+
+        if last_invoice_number:
+            try:
+                return int(last_invoice_number.split('-')[1])
+            except (IndexError, ValueError):
+                pass
+        return 0
+
+
+class InvoiceDailyStat(models.Model):
+    """
+    Rollup das notas fiscais por dia de emissão e dimensões de filtro.
+
+    Mantido incrementalmente pelos sinais de `Invoice` (ver `handlers.py`)
+    e reconstruível com `manage.py rebuild_invoice_stats`.
+    """
+    day = models.DateField(verbose_name="Dia de Emissão")
+    service_type = models.CharField(max_length=20, choices=Invoice.SERVICE_TYPE_CHOICES)
+    client_type = models.CharField(max_length=2, choices=Invoice.CLIENT_TYPE_CHOICES)
+    state = models.CharField(max_length=2, choices=Invoice.STATE_CHOICES)
+    is_active = models.BooleanField()
+    invoice_count = models.IntegerField(default=0)
+    value_sum = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+    tax_sum = models.DecimalField(max_digits=22, decimal_places=4, default=Decimal('0.00'))
+
+    KEY_FIELDS = ('day', 'service_type', 'client_type', 'state', 'is_active')
+
+    class Meta:
+        db_table = 'invoice_daily_stats'
+        verbose_name = 'Estatística Diária'
+        verbose_name_plural = 'Estatísticas Diárias'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'service_type', 'client_type', 'state', 'is_active'],
+                name='invoice_daily_stats_unique_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.service_type}/{self.client_type}/{self.state}: {self.invoice_count}"
+
+    @classmethod
+    def apply_delta(cls, key, count, value, tax_amount):
+        """Soma (ou subtrai, com valores negativos) uma contribuição ao rollup"""
+        lookup = dict(zip(cls.KEY_FIELDS, key))
+        changes = {
+            'invoice_count': F('invoice_count') + count,
+            'value_sum': F('value_sum') + value,
+            'tax_sum': F('tax_sum') + tax_amount,
+        }
+        with transaction.atomic():
+            updated = cls.objects.filter(**lookup).update(**changes)
+            if not updated:
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(
+                            **lookup,
+                            invoice_count=count,
+                            value_sum=value,
+                            tax_sum=tax_amount
+                        )
+                except IntegrityError:
+                    cls.objects.filter(**lookup).update(**changes)
+            if count < 0:
+                cls.objects.filter(**lookup, invoice_count__lte=0).delete()
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """
+        Aplica várias contribuições de uma vez, como as de um `bulk_create`.
+
+        `deltas` mapeia cada chave do rollup para (count, value, tax_amount).
+        Lê as linhas existentes dos dias envolvidos e grava tudo com um
+        `bulk_update` e um `bulk_create`, em vez de consultas por chave.
+        """
+        if not deltas:
+            return
+
+        with transaction.atomic():
+            existing = {
+                tuple(getattr(stat, field) for field in cls.KEY_FIELDS): stat
+                for stat in cls.objects.select_for_update().filter(
+                    day__in={key[0] for key in deltas}
+                )
+            }
+            changed, new = [], []
+            for key, (count, value, tax_amount) in deltas.items():
+                stat = existing.get(key)
+                if stat is None:
+                    new.append(cls(
+                        **dict(zip(cls.KEY_FIELDS, key)),
+                        invoice_count=count,
+                        value_sum=value,
+                        tax_sum=tax_amount
+                    ))
+                else:
+                    stat.invoice_count += count
+                    stat.value_sum += value
+                    stat.tax_sum += tax_amount
+                    changed.append(stat)
+
+            cls.objects.bulk_update(
+                changed, ['invoice_count', 'value_sum', 'tax_sum'], batch_size=1000
+            )
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create(new, batch_size=1000)
+            except IntegrityError:
+                # Outra transação criou alguma das chaves depois da leitura
+                for stat in new:
+                    cls.apply_delta(
+                        tuple(getattr(stat, field) for field in cls.KEY_FIELDS),
+                        stat.invoice_count, stat.value_sum, stat.tax_sum
+                    )
+            if any(count < 0 for count, _, _ in deltas.values()):
+                cls.objects.filter(
+                    day__in={key[0] for key in deltas}, invoice_count__lte=0
+                ).delete()
+
+    @classmethod
+    def rebuild(cls, days=None, start_date=None, end_date=None):
+        """
+        Recalcula o rollup a partir da tabela de notas.
+
+        Sem argumentos reconstrói tudo; `days` limita a um conjunto de datas e
+        `start_date`/`end_date` a um intervalo. Retorna o número de linhas geradas.
+        """
+        invoices = Invoice.objects.order_by()
+        stats = cls.objects.all()
+        if days is not None:
+            invoices = invoices.filter(issue_date__in=days)
+            stats = stats.filter(day__in=days)
+        if start_date:
+            invoices = invoices.filter(issue_date__gte=start_date)
+            stats = stats.filter(day__gte=start_date)
+        if end_date:
+            invoices = invoices.filter(issue_date__lte=end_date)
+            stats = stats.filter(day__lte=end_date)
+
+        rows = invoices.values(
+            'service_type', 'client_type', 'state', 'is_active', day=F('issue_date')
+        ).annotate(
+            invoice_count=Count('id'),
+            value_sum=Coalesce(Sum(rollup_value()), Value(Decimal('0.00'))),
+            tax_sum=Coalesce(
+                Sum('tax_amount'),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=22, decimal_places=4)
+            ),
+        )
+
+        with transaction.atomic():
+            stats.delete()
+            created = cls.objects.bulk_create(
+                (cls(**row) for row in rows.iterator()),
+                batch_size=1000
+            )
+        return len(created)
+
+
+class PaymentReminder(models.Model):
+    """
+    Lembrete de pagamento já enviado para uma nota fiscal.
+
+    Gravado pelo comando `send_due_reminders` depois de cada envio: a chave
+    (nota, tipo, vencimento) impede que uma nova execução repita o lembrete,
+    mas um novo vencimento gera um novo lembrete.
+    """
+    KIND_CHOICES = [
+        ('due_soon', 'A vencer'),
+        ('overdue', 'Vencida'),
+    ]
+
+    invoice = models.ForeignKey(
+        Invoice,
+        on_delete=models.CASCADE,
+        related_name='reminders',
+        verbose_name="Nota Fiscal"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Tipo")
+    due_date = models.DateField(verbose_name="Vencimento")
+    email = models.EmailField(verbose_name="Destinatário")
+    sent_at = models.DateTimeField(default=timezone.now, verbose_name="Enviado em")
+
+    class Meta:
+        db_table = 'payment_reminders'
+        verbose_name = 'Lembrete de Pagamento'
+        verbose_name_plural = 'Lembretes de Pagamento'
+        ordering = ['-sent_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['invoice', 'kind', 'due_date'],
+                name='payment_reminders_unique_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.invoice_id} -> {self.email}"
+
+    @classmethod
+    def pending(cls, today, days):
+        """
+        Notas ativas vencidas ou a vencer em até `days` dias ainda sem lembrete.
+
+        Devolve dicionários ordenados por email, prontos para agrupar por
+        cliente percorrendo o queryset com `iterator()`.
+        """
+        kind = Case(
+            When(due_date__lt=today, then=Value('overdue')),
+            default=Value('due_soon'),
+            output_field=models.CharField()
+        )
+        sent = cls.objects.filter(
+            invoice=OuterRef('pk'),
+            kind=OuterRef('reminder_kind'),
+            due_date=OuterRef('due_date')
+        )
+        return (
+            Invoice.objects
+            .filter(is_active=True, due_date__lte=today + timedelta(days=days))
+            .exclude(email='')
+            .annotate(reminder_kind=kind)
+            .filter(~Exists(sent))
+            .order_by('email', 'due_date', 'id')
+            .values('id', 'email', 'name', 'invoice_number', 'due_date', 'total_value', 'reminder_kind')
+        )
+
+
+class InvoiceImport(models.Model):
+    """
+    Progresso do comando `import_invoices` para um arquivo CSV.
+
+    Atualizado na mesma transação do `bulk_create` de cada pedaço: uma
+    importação interrompida retoma exatamente após o último pedaço gravado,
+    sem duplicar notas.
+    """
+    source = models.CharField(max_length=1024, unique=True, verbose_name="Arquivo")
+    rows = models.PositiveIntegerField(default=0, verbose_name="Linhas Processadas")
+    imported = models.PositiveIntegerField(default=0, verbose_name="Notas Importadas")
+    rejected = models.PositiveIntegerField(default=0, verbose_name="Linhas Rejeitadas")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        db_table = 'invoice_imports'
+        verbose_name = 'Importação de Notas Fiscais'
+        verbose_name_plural = 'Importações de Notas Fiscais'
+
+    def __str__(self):
+        return f"{self.source}: {self.rows} linha(s)"
@@ -0,0 +1,266 @@
+import base64
+import binascii
+import datetime
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) sobre (campo de ordenação, id).
+
+    O cursor guarda o valor do campo de ordenação e o id do último item da
+    página, e a próxima página é buscada com um WHERE sobre esse par em vez
+    de OFFSET. O custo de cada página é o mesmo em qualquer profundidade.
+    A ordenação vem do `OrderingFilter` da view (primeiro campo informado) e
+    o `id` é usado como desempate. NULLs seguem a ordem nativa do banco, para
+    que os índices simples possam ser usados na ordenação.
+    """
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    tiebreaker = 'id'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        return self.build_page(list(page_queryset))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Monta (sem executar) a consulta da página pedida.
+
+        Separado de `build_page` para que views assíncronas possam executar a
+        consulta com o ORM assíncrono.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+
+        ordering = self.get_ordering(request, queryset, view)
+        self.field = ordering.lstrip('-')
+        self.descending = ordering.startswith('-')
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor['reverse'])
+        self.nulls_largest = connections[queryset.db].features.nulls_order_largest
+
+        # Ao voltar uma página, percorre na direção oposta e inverte no final
+        descending = self.descending != self.reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}{self.tiebreaker}')
+        if self.cursor:
+            queryset = queryset.filter(
+                self.after_position(self.cursor['position'], descending)
+            )
+        return queryset[:self.page_size + 1]
+
+    def build_page(self, rows):
+        """Recorta a página e calcula os links a partir das linhas buscadas"""
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        """Primeiro campo de ordenação pedido (ou o padrão da view)"""
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, 'ordering', None) or queryset.model._meta.ordering
+        if isinstance(ordering, str):
+            ordering = [ordering]
+        if not ordering:
+            return f'-{self.tiebreaker}'
+        return str(ordering[0])
+
+    def after_position(self, position, descending):
+        """Condição para os itens depois de (valor, id) na direção percorrida"""
+        value, pk = position
+        beyond = 'lt' if descending else 'gt'
+        same_value = Q(**{self.field: value}) if value is not None else Q(**{f'{self.field}__isnull': True})
+        condition = same_value & Q(**{f'{self.tiebreaker}__{beyond}': pk})
+        nulls_first = self.nulls_largest == descending
+
+        if value is None:
+            if nulls_first:
+                condition |= Q(**{f'{self.field}__isnull': False})
+            return condition
+
+        condition |= Q(**{f'{self.field}__{beyond}': value})
+        if not nulls_first and self.is_nullable(self.field):
+            condition |= Q(**{f'{self.field}__isnull': True})
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        payload = {
+            'v': self.dump_value(self.get_value(row, self.field)),
+            'id': str(self.get_value(row, self.tiebreaker)),
+        }
+        if reverse:
+            payload['r'] = 1
+        cursor = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode()
+        ).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            value = self.load_value(self.field, payload['v'])
+            pk = self.load_value(self.tiebreaker, payload['id'])
+            return {'position': (value, pk), 'reverse': bool(payload.get('r'))}
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def get_value(row, name):
+        if isinstance(row, dict):
+            return row[name]
+        return getattr(row, name)
+
+    @staticmethod
+    def dump_value(value):
+        if value is None or isinstance(value, (int, float)):
+            return value
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        return str(value)
+
+    def load_value(self, name, value):
+        if value is None:
+            return None
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Anotações (ex.: relevância da busca) são números
+            return float(value)
+        if field.generated:
+            field = field.output_field
+        parsed = field.to_python(value)
+        if parsed is None:
+            raise ValueError(value)
+        return parsed
+
+    def is_nullable(self, name):
+        try:
+            return self.model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            return False
+
+
+def estimate_row_count(model, using='default'):
+    """
+    Quantidade aproximada de linhas da tabela, sem percorrê-la (ou None).
+
+    PostgreSQL: estatística do planner (`reltuples`); MySQL: `TABLE_ROWS`;
+    SQLite: maior rowid (não desconta exclusões).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql, params = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table]
+    elif connection.vendor == 'mysql':
+        sql = (
+            'SELECT TABLE_ROWS FROM information_schema.TABLES '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s'
+        )
+        params = [table]
+    elif connection.vendor == 'sqlite':
+        sql, params = f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}', []
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    # reltuples é -1 em tabelas nunca analisadas
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator do admin que evita o COUNT(*) da tabela inteira.
+
+    Sem filtros, o total vem de `estimate_row_count`; com filtros, ou quando
+    a estimativa indica uma tabela pequena, a contagem é exata.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.exact_count_threshold:
+                return estimate
+        return super().count
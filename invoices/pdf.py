@@ -0,0 +1,278 @@
+"""
+PDF das notas fiscais, gerado sem dependências externas.
+
+O layout é compilado uma única vez (`compiled_template`) em pedaços prontos
+do fluxo de conteúdo PDF, intercalados com os campos da nota; cada nota só
+preenche os campos e monta os objetos do arquivo. `render_invoice_pdf`
+recebe um dicionário simples (ver `PDF_FIELDS`), de modo que pode rodar nos
+processos do pool sem acesso ao banco.
+
+Os PDFs ficam no cache por (id, updated_at): uma nota que não mudou nunca é
+gerada de novo. Lotes grandes são distribuídos entre os processos do pool.
+"""
+import io
+import multiprocessing
+import textwrap
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+import django
+from django.conf import settings
+from django.core.cache import caches
+from .models import Invoice
+from .utils import format_currency, format_document
+
+# Colunas usadas no PDF (também a chave do cache: id e updated_at)
+PDF_FIELDS = [
+    'id', 'invoice_number', 'client_type', 'document', 'name', 'email', 'phone',
+    'address', 'neighborhood', 'city', 'state', 'zip_code', 'service_description',
+    'service_type', 'value', 'tax', 'tax_amount', 'total_value', 'additional_info',
+    'payment_method', 'due_date', 'issue_date', 'updated_at',
+]
+
+# Alterar o layout exige nova versão, para descartar os PDFs em cache
+TEMPLATE_VERSION = 1
+KEY_PREFIX = 'invoices:pdf'
+
+# Página A4 em pontos; Helvetica (F1) e Helvetica-Bold (F2) são fontes padrão
+PAGE_SIZE = (595, 842)
+
+# (x, y, fonte, tamanho, texto com {campos}) ou, para textos longos,
+# (x, y, fonte, tamanho, ('block', campo, caracteres por linha, máximo de linhas))
+LAYOUT = [
+    (50, 790, 'F2', 16, 'NOTA FISCAL DE SERVIÇO'),
+    (50, 772, 'F1', 10, 'Número: {invoice_number}'),
+    (330, 772, 'F1', 10, 'Emissão: {issue_date}    Vencimento: {due_date}'),
+    (50, 740, 'F2', 12, 'Tomador do serviço'),
+    (50, 722, 'F1', 10, 'Nome: {name}'),
+    (50, 708, 'F1', 10, '{document_label}: {document}'),
+    (50, 694, 'F1', 10, 'Email: {email}'),
+    (330, 694, 'F1', 10, 'Telefone: {phone}'),
+    (50, 680, 'F1', 10, 'Endereço: {address} - {neighborhood}'),
+    (50, 666, 'F1', 10, '{city}/{state} - CEP {zip_code}'),
+    (50, 632, 'F2', 12, 'Serviço'),
+    (50, 614, 'F1', 10, 'Tipo: {service_type}'),
+    (330, 614, 'F1', 10, 'Pagamento: {payment_method}'),
+    (50, 596, 'F1', 10, ('block', 'service_description', 95, 12)),
+    (50, 410, 'F2', 12, 'Valores'),
+    (50, 392, 'F1', 10, 'Valor do serviço: {value}'),
+    (50, 378, 'F1', 10, 'Imposto ({tax}): {tax_amount}'),
+    (50, 360, 'F2', 12, 'Total: {total_value}'),
+    (50, 326, 'F2', 12, 'Informações adicionais'),
+    (50, 308, 'F1', 10, ('block', 'additional_info', 95, 10)),
+    (50, 40, 'F1', 8, 'Documento gerado pelo sistema MEI'),
+]
+RULES = [760, 652, 430, 346]
+LEADING = 13
+
+SERVICE_TYPES = dict(Invoice.SERVICE_TYPE_CHOICES)
+PAYMENT_METHODS = dict(Invoice.PAYMENT_METHOD_CHOICES)
+
+
+# Quebras de linha e tabulações viram espaços (cada texto ocupa uma linha)
+WHITESPACE = str.maketrans('\r\n\t\f\v', '     ')
+
+
+def pdf_string(text):
+    """Texto como string literal do PDF (WinAnsiEncoding)"""
+    data = str(text).translate(WHITESPACE).encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+@lru_cache(maxsize=None)
+def compiled_template():
+    """
+    Layout compilado: pedaços fixos (bytes) e campos a preencher.
+
+    Os campos são ('text', nome) para valores de uma linha e ('block', nome,
+    largura, máximo de linhas) para textos quebrados em várias linhas.
+    """
+    parts = [b'0.5 w\n']
+    for y in RULES:
+        parts.append(b'50 %d m 545 %d l S\n' % (y, y))
+
+    for x, y, font, size, text in LAYOUT:
+        parts.append(b'BT /%s %d Tf %d TL %d %d Td ' % (font.encode(), size, LEADING, x, y))
+        if isinstance(text, tuple):
+            parts.append(text)
+            parts.append(b' ET\n')
+            continue
+
+        # Divide o texto em trechos fixos e campos: "Nome: {name}" -> "Nome: ", name
+        parts.append(b'[')
+        literal, _, rest = text.partition('{')
+        while True:
+            if literal:
+                parts.append(pdf_string(literal))
+            if not rest:
+                break
+            field, _, rest = rest.partition('}')
+            parts.append(('text', field))
+            literal, _, rest = rest.partition('{')
+        parts.append(b'] TJ ET\n')
+    return parts
+
+
+def invoice_context(row):
+    """Valores formatados para exibição no PDF"""
+    def format_date(value):
+        return value.strftime('%d/%m/%Y') if value else ''
+
+    def format_amount(value):
+        # Valor e imposto são opcionais (e, sem eles, os campos calculados)
+        return '-' if value is None else format_currency(value)
+
+    def format_percent(value):
+        return '-' if value is None else f'{value:.2f}%'.replace('.', ',')
+
+    return {
+        **row,
+        'document_label': 'CPF' if row['client_type'] == 'pf' else 'CNPJ',
+        'document': format_document(row['document']),
+        'service_type': SERVICE_TYPES.get(row['service_type'], row['service_type']),
+        'payment_method': PAYMENT_METHODS.get(row['payment_method'], row['payment_method']),
+        'value': format_amount(row['value']),
+        'tax': format_percent(row['tax']),
+        'tax_amount': format_amount(row['tax_amount']),
+        'total_value': format_amount(row['total_value']),
+        'issue_date': format_date(row['issue_date']),
+        'due_date': format_date(row['due_date']),
+        'additional_info': row['additional_info'] or '-',
+    }
+
+
+def render_invoice_pdf(row):
+    """PDF (bytes) de uma nota a partir das colunas de `PDF_FIELDS`"""
+    context = invoice_context(row)
+    stream = []
+    for part in compiled_template():
+        if isinstance(part, bytes):
+            stream.append(part)
+        elif part[0] == 'text':
+            stream.append(pdf_string(context[part[1]]))
+        else:
+            _, field, width, max_lines = part
+            lines = textwrap.wrap(str(context[field]), width) or ['']
+            if len(lines) > max_lines:
+                lines = lines[:max_lines]
+                lines[-1] = lines[-1][:width - 3] + '...'
+            stream.append(b' Tj T* '.join(pdf_string(line) for line in lines) + b' Tj')
+    content = zlib.compress(b''.join(stream))
+
+    title = pdf_string(f"Nota Fiscal {row['invoice_number']}")
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+        b'/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>' % PAGE_SIZE,
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(content), content),
+        b'<< /Title %s /Producer (mei_backend) >>' % title,
+    ]
+
+    output = io.BytesIO()
+    output.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+    xref = output.tell()
+    output.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b'%010d 00000 n \n' % offset)
+    output.write(
+        b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+        % (len(objects) + 1, len(objects), xref)
+    )
+    return output.getvalue()
+
+
+def pdf_filename(row):
+    return f"NF-{row['invoice_number']}.pdf"
+
+
+def pdf_cache_key(row):
+    return f"{KEY_PREFIX}:v{TEMPLATE_VERSION}:{row['id']}:{row['updated_at'].isoformat()}"
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Processos do pool por processo do servidor: cada worker do gunicorn tem o
+# seu pool, então o padrão é pequeno (e não o número de CPUs)
+DEFAULT_POOL_WORKERS = 2
+
+
+def pool_workers():
+    return getattr(settings, 'INVOICE_PDF_WORKERS', None) or DEFAULT_POOL_WORKERS
+
+
+def get_pool():
+    """Pool de processos do PDF, criado no primeiro lote grande"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Processos novos (spawn) não herdam as conexões abertas com o banco
+            _pool = ProcessPoolExecutor(
+                pool_workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup
+            )
+        return _pool
+
+
+def discard_pool(pool):
+    """Descarta um pool quebrado; o próximo lote grande cria outro"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_pdfs(rows):
+    """
+    PDFs das notas, na ordem recebida.
+
+    Os que já estão no cache (mesmo id e updated_at) são reaproveitados; os
+    demais são gerados aqui mesmo ou, a partir de `INVOICE_PDF_POOL_MIN_BATCH`
+    notas, no pool de processos, e então guardados no cache. Se um processo
+    do pool morrer (ex.: falta de memória), o pool é descartado e o lote é
+    gerado aqui mesmo.
+    """
+    cache = caches[getattr(settings, 'INVOICE_PDF_CACHE_ALIAS', 'default')]
+    keys = [pdf_cache_key(row) for row in rows]
+    found = cache.get_many(keys)
+
+    missing = [(key, row) for key, row in zip(keys, rows) if key not in found]
+    if missing:
+        missing_rows = [row for _, row in missing]
+        if len(missing) >= getattr(settings, 'INVOICE_PDF_POOL_MIN_BATCH', 8):
+            chunksize = max(1, len(missing) // (pool_workers() * 4))
+            pool = get_pool()
+            try:
+                rendered = list(pool.map(render_invoice_pdf, missing_rows, chunksize=chunksize))
+            except BrokenProcessPool:
+                discard_pool(pool)
+                rendered = [render_invoice_pdf(row) for row in missing_rows]
+        else:
+            rendered = [render_invoice_pdf(row) for row in missing_rows]
+        created = {key: content for (key, _), content in zip(missing, rendered)}
+        cache.set_many(created, timeout=getattr(settings, 'INVOICE_PDF_CACHE_TIMEOUT', 86400))
+        found.update(created)
+
+    return [found[key] for key in keys]
+
+
+def build_pdf_zip(rows):
+    """Arquivo zip com o PDF de cada nota"""
+    output = io.BytesIO()
+    # Os PDFs já têm o conteúdo comprimido: apenas armazena
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for row, content in zip(rows, render_pdfs(rows)):
+            archive.writestr(pdf_filename(row), content)
+    return output.getvalue()
@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renderer para `?format=csv`.
+
+    O conteúdo das exportações é enviado em streaming pela própria view; este
+    renderer só é usado para respostas comuns (ex.: erros).
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        if rows and isinstance(rows[0], dict):
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return buffer.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renderer para `?format=ndjson` (um objeto JSON por linha)"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(
+            json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + '\n'
+            for row in rows
+        ).encode(self.charset)
+
+
+class BinaryRenderer(BaseRenderer):
+    """
+    Base dos renderers de arquivos (`?format=pdf`, `?format=zip`).
+
+    Os arquivos são devolvidos prontos pela própria view; aqui só chegam
+    respostas comuns (ex.: erros), enviadas como JSON.
+    """
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, bytes):
+            return data
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False).encode('utf-8')
+
+
+class PDFRenderer(BinaryRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+
+class ZIPRenderer(BinaryRenderer):
+    media_type = 'application/zip'
+    format = 'zip'
@@ -0,0 +1,223 @@
+"""
+Busca textual das notas fiscais.
+
+No SQLite a busca usa uma tabela FTS5 (`invoices_fts`) mantida por triggers
+sobre a tabela `invoices`; no PostgreSQL usa `to_tsvector` com um índice GIN
+sobre a mesma expressão. Em outros bancos a busca volta ao `icontains` do
+`SearchFilter` do DRF.
+
+As linhas do FTS5 não usam o rowid de `invoices`: com chave primária UUID ele
+é implícito e o VACUUM pode renumerá-lo. A tabela `invoices_search_keys` dá a
+cada nota um inteiro estável (INTEGER PRIMARY KEY), que é o rowid da linha no
+FTS5. Se o índice divergir (ex.: dados carregados sem os triggers), o comando
+`rebuild_search_index` o recria.
+"""
+import re
+from django.db import connections, transaction
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+FTS_TABLE = 'invoices_fts'
+KEYS_TABLE = 'invoices_search_keys'
+SEARCH_COLUMNS = ('name', 'email', 'document', 'document_digits', 'invoice_number', 'service_description')
+# Pesos do bm25 por coluna (mesma ordem de SEARCH_COLUMNS)
+SQLITE_WEIGHTS = (10.0, 4.0, 6.0, 6.0, 8.0, 1.0)
+
+# Só dígitos do CPF/CNPJ, para buscas sem pontuação
+SQLITE_DOCUMENT_DIGITS = "replace(replace(replace({row}.document, '.', ''), '-', ''), '/', '')"
+
+PG_CONFIG = 'portuguese'
+PG_DOCUMENT_TEMPLATE = (
+    "to_tsvector('{config}', "
+    "coalesce({table}\"name\", '') || ' ' || "
+    "coalesce({table}\"email\", '') || ' ' || "
+    "coalesce({table}\"document\", '') || ' ' || "
+    "regexp_replace(coalesce({table}\"document\", ''), '[^0-9]', '', 'g') || ' ' || "
+    "coalesce({table}\"invoice_number\", '') || ' ' || "
+    "coalesce({table}\"service_description\", ''))"
+)
+# A expressão das consultas tem de ser a mesma do índice GIN
+PG_DOCUMENT_SQL = PG_DOCUMENT_TEMPLATE.format(config=PG_CONFIG, table='"invoices".')
+PG_INDEX = 'invoices_search_gin_idx'
+
+RANK_ANNOTATION = 'search_rank'
+
+
+def search_tokens(term):
+    """Palavras da busca (letras e dígitos), sem pontuação"""
+    return re.findall(r'[^\W_]+', term)
+
+
+def sqlite_match_expression(tokens):
+    """Consulta FTS5: todas as palavras, cada uma como prefixo"""
+    return ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+
+def pg_tsquery_expression(tokens):
+    """Consulta to_tsquery: todas as palavras, cada uma como prefixo"""
+    return ' & '.join(f'{token}:*' for token in tokens)
+
+
+def search_backend(using):
+    """Nome do backend de busca textual disponível para o banco"""
+    vendor = connections[using].vendor
+    if vendor in ('sqlite', 'postgresql'):
+        return vendor
+    return None
+
+
+def full_text_search(queryset, term):
+    """
+    Filtra o queryset pelas notas que casam com a busca e anota a relevância
+    em `search_rank` (maior é mais relevante). Retorna None se o banco não
+    tiver busca textual.
+
+    Uma busca sem nenhuma palavra (ex.: "---") não casa com nota alguma.
+    """
+    tokens = search_tokens(term)
+    if not tokens:
+        return queryset.none()
+
+    backend = search_backend(queryset.db)
+    if backend == 'sqlite':
+        match = sqlite_match_expression(tokens)
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+        # Notas que casam: o MATCH percorre o índice FTS5 e a tabela de
+        # chaves leva cada linha ao id da nota
+        matching = RawSQL(
+            f'SELECT {KEYS_TABLE}.invoice_id FROM {FTS_TABLE} '
+            f'JOIN {KEYS_TABLE} ON {KEYS_TABLE}.search_rowid = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s',
+            (match,)
+        )
+        # bm25 só existe dentro de uma consulta MATCH: a relevância de cada
+        # nota vem da mesma busca restrita ao rowid dela
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = '
+            f'(SELECT search_rowid FROM {KEYS_TABLE} WHERE invoice_id = invoices.id)',
+            (match,),
+            output_field=FloatField()
+        )
+        return queryset.filter(pk__in=matching).annotate(**{RANK_ANNOTATION: rank})
+
+    if backend == 'postgresql':
+        query = pg_tsquery_expression(tokens)
+        return queryset.filter(
+            RawSQL(
+                f"{PG_DOCUMENT_SQL} @@ to_tsquery('{PG_CONFIG}', %s)",
+                (query,),
+                output_field=BooleanField()
+            )
+        ).annotate(**{
+            RANK_ANNOTATION: RawSQL(
+                f"ts_rank({PG_DOCUMENT_SQL}, to_tsquery('{PG_CONFIG}', %s))",
+                (query,),
+                output_field=FloatField()
+            )
+        })
+
+    return None
+
+
+class InvoiceSearchFilter(filters.SearchFilter):
+    """`?search=` com busca textual ranqueada, quando o banco suporta"""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            # `?search=` em branco não filtra; só separadores não casam nada
+            if request.query_params.get(self.search_param, '').strip():
+                return queryset.none()
+            return queryset
+
+        results = full_text_search(queryset, ' '.join(terms))
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+        return results
+
+
+class InvoiceOrderingFilter(filters.OrderingFilter):
+    """Ordena por relevância quando há busca e nenhuma ordenação explícita"""
+
+    def get_ordering(self, request, queryset, view):
+        if (
+            not request.query_params.get(self.ordering_param)
+            and RANK_ANNOTATION in queryset.query.annotations
+        ):
+            return [f'-{RANK_ANNOTATION}']
+        return super().get_ordering(request, queryset, view)
+
+
+def sqlite_install_statements():
+    """Tabela de chaves, FTS5, triggers e reindexação das notas (SQLite)"""
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(
+        SQLITE_DOCUMENT_DIGITS.format(row='new') if column == 'document_digits' else f'new.{column}'
+        for column in SEARCH_COLUMNS
+    )
+    assignments = ', '.join(
+        f"{column} = {SQLITE_DOCUMENT_DIGITS.format(row='new')}" if column == 'document_digits'
+        else f'{column} = new.{column}'
+        for column in SEARCH_COLUMNS
+    )
+    select_values = ', '.join(
+        SQLITE_DOCUMENT_DIGITS.format(row='invoices') if column == 'document_digits' else f'invoices.{column}'
+        for column in SEARCH_COLUMNS
+    )
+    indexed = ', '.join(column for column in SEARCH_COLUMNS if column != 'document_digits')
+    key_of = f'(SELECT search_rowid FROM {KEYS_TABLE} WHERE invoice_id = {{row}}.id)'
+    return [
+        *sqlite_uninstall_statements(),
+        f'CREATE TABLE {KEYS_TABLE} ('
+        f'search_rowid INTEGER PRIMARY KEY, invoice_id char(32) NOT NULL UNIQUE)',
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        f"{columns}, tokenize = 'unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON invoices BEGIN '
+        f'INSERT INTO {KEYS_TABLE}(invoice_id) VALUES (new.id); '
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES ({key_of.format(row='new')}, {new_values}); END",
+        f'CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON invoices BEGIN '
+        f"DELETE FROM {FTS_TABLE} WHERE rowid = {key_of.format(row='old')}; "
+        f'DELETE FROM {KEYS_TABLE} WHERE invoice_id = old.id; END',
+        f'CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {indexed} ON invoices BEGIN '
+        f"UPDATE {FTS_TABLE} SET {assignments} WHERE rowid = {key_of.format(row='old')}; END",
+        f'INSERT INTO {KEYS_TABLE}(invoice_id) SELECT id FROM invoices',
+        f'INSERT INTO {FTS_TABLE}(rowid, {columns}) '
+        f'SELECT {KEYS_TABLE}.search_rowid, {select_values} '
+        f'FROM invoices JOIN {KEYS_TABLE} ON {KEYS_TABLE}.invoice_id = invoices.id',
+    ]
+
+
+def sqlite_uninstall_statements():
+    return [
+        f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+        f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+        f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+        f'DROP TABLE IF EXISTS {FTS_TABLE}',
+        f'DROP TABLE IF EXISTS {KEYS_TABLE}',
+    ]
+
+
+def install_search_index(using='default'):
+    """
+    Cria (ou recria) a estrutura de busca textual e reindexa as notas.
+
+    Usada pelo comando `rebuild_search_index`; as migrações têm o próprio
+    SQL, congelado na versão em que foram criadas.
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        statements = sqlite_install_statements()
+    elif connection.vendor == 'postgresql':
+        statements = [
+            f'DROP INDEX IF EXISTS {PG_INDEX}',
+            f'CREATE INDEX {PG_INDEX} ON invoices '
+            f'USING gin (({PG_DOCUMENT_TEMPLATE.format(config=PG_CONFIG, table="")}))',
+        ]
+    else:
+        return
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
@@ -1,8 +1,43 @@
+from collections.abc import Mapping
 from rest_framework import serializers
 from .models import Invoice
+from .utils import check_documents
 from django.utils import timezone
 import re
 
+
+class ValuesSerializerMixin:
+    """
+    Serialização somente leitura a partir de `queryset.values()`.
+
+    Evita montar uma instância do modelo por linha: cada linha passa direto
+    pelo `to_representation` dos campos declarados, gerando o mesmo JSON do
+    serializer original. Os totais já são colunas calculadas pelo banco.
+    """
+
+    @classmethod
+    def values_queryset(cls, queryset):
+        """Queryset de dicionários com as colunas usadas pelo serializer"""
+        annotations = [name for name in queryset.query.annotations if name not in cls.Meta.fields]
+        return queryset.values(*cls.Meta.fields, *annotations)
+
+    def to_representation(self, instance):
+        if not isinstance(instance, Mapping):
+            return super().to_representation(instance)
+        return {
+            name: None if (value := instance[source]) is None else to_representation(value)
+            for name, source, to_representation in self.row_fields
+        }
+
+    @property
+    def row_fields(self):
+        if not hasattr(self, '_row_fields'):
+            self._row_fields = [
+                (field.field_name, field.source, field.to_representation)
+                for field in self._readable_fields
+            ]
+        return self._row_fields
+
 class InvoiceSerializer(serializers.ModelSerializer):
     total_value = serializers.ReadOnlyField()
     tax_amount = serializers.ReadOnlyField()
@@ -20,20 +55,13 @@ class InvoiceSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'invoice_number', 'created_at', 'updated_at']
     
     def validate_document(self, value):
-        """Validação customizada para CPF/CNPJ"""
-        # Remove caracteres especiais
-        clean_doc = re.sub(r'[^\d]', '', value)
-        
-        if len(clean_doc) == 11:
-            # Validação básica CPF
-            if len(set(clean_doc)) == 1:
-                raise serializers.ValidationError("CPF inválido")
-        elif len(clean_doc) == 14:
-            # Validação básica CNPJ
-            if len(set(clean_doc)) == 1:
-                raise serializers.ValidationError("CNPJ inválido")
-        else:
+        """Validação customizada para CPF/CNPJ (inclui os dígitos verificadores)"""
+        kind, valid = check_documents([value])[0]
+
+        if kind is None:
             raise serializers.ValidationError("Documento deve ter 11 (CPF) ou 14 (CNPJ) dígitos")
+        if not valid:
+            raise serializers.ValidationError(f"{kind.upper()} inválido")
         
         return value
     
@@ -92,11 +120,15 @@ class InvoiceCreateSerializer(InvoiceSerializer):
     """Serializer específico para criação de notas fiscais"""
     
     def create(self, validated_data):
+        return super().create(self.with_defaults(validated_data))
+
+    @staticmethod
+    def with_defaults(validated_data):
+        """Completa os dados validados com os valores padrão da criação"""
         # Se não foi fornecida data de emissão, usa a data atual
         if not validated_data.get('issue_date'):
             validated_data['issue_date'] = timezone.now().date()
-        
-        return super().create(validated_data)
+        return validated_data
 
 class InvoiceListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listagem de notas fiscais"""
@@ -128,4 +160,77 @@ class InvoiceUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "A data de vencimento não pode ser anterior à data atual"
             )
-        return value
\ No newline at end of file
+        return value
+
+class InvoiceBulkChangesSerializer(serializers.ModelSerializer):
+    """Campos que podem ser alterados em massa"""
+
+    class Meta:
+        model = Invoice
+        fields = ['is_active', 'due_date', 'payment_method']
+        extra_kwargs = {field: {'required': False} for field in fields}
+
+    def validate_due_date(self, value):
+        """Validação para data de vencimento"""
+        if value < timezone.now().date():
+            raise serializers.ValidationError(
+                "A data de vencimento não pode ser anterior à data atual"
+            )
+        return value
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError("Informe ao menos um campo para alterar")
+        return data
+
+class InvoiceBulkUpdateSerializer(serializers.Serializer):
+    """Alteração em massa por lista de ids ou por filtro"""
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        allow_empty=False,
+        max_length=5000
+    )
+    filter = serializers.DictField(required=False, allow_empty=False)
+    changes = InvoiceBulkChangesSerializer()
+
+    def validate_filter(self, value):
+        """Valida o período antes de o filtro chegar ao queryset"""
+        errors = {}
+        for field in ['start_date', 'end_date']:
+            if value.get(field) in (None, ''):
+                continue
+            try:
+                value[field] = serializers.DateField().run_validation(value[field]).isoformat()
+            except serializers.ValidationError as exc:
+                errors[field] = exc.detail
+        if errors:
+            raise serializers.ValidationError(errors)
+        return value
+
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError("Informe 'ids' ou 'filter' (apenas um deles)")
+        return data
+
+class InvoiceValuesSerializer(ValuesSerializerMixin, InvoiceSerializer):
+    """InvoiceSerializer somente leitura sobre `values()` (exportação)"""
+
+class InvoiceListValuesSerializer(ValuesSerializerMixin, InvoiceListSerializer):
+    """InvoiceListSerializer somente leitura sobre `values()` (listagem)"""
+
+class DocumentValidationSerializer(serializers.Serializer):
+    """Lote de CPFs/CNPJs para validação"""
+    documents = serializers.ListField(
+        child=serializers.CharField(allow_blank=True, max_length=32, trim_whitespace=False),
+        allow_empty=False,
+        max_length=50000
+    )
+
+class InvoicePDFBatchSerializer(serializers.Serializer):
+    """Lote de notas fiscais para gerar os PDFs"""
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=500
+    )
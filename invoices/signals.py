@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+# Enviado após alterações em massa que não disparam sinais por objeto
+# (ex.: QuerySet.update). Argumentos:
+#   days   - datas de emissão afetadas (None quando não é possível saber)
+#   fields - nomes dos campos alterados
+#   deltas - opcional: contribuições ao rollup por chave, (count, value,
+#            tax_amount), quando já conhecidas (ex.: bulk_create); sem elas
+#            o rollup dos dias afetados é recalculado
+#   using  - alias do banco de dados
+invoices_bulk_changed = Signal()
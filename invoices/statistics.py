@@ -0,0 +1,133 @@
+from decimal import Decimal
+from django.db.models import Q, Count, Sum, F, DecimalField, ExpressionWrapper, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Invoice, InvoiceDailyStat
+
+TOTAL_FIELD = DecimalField(max_digits=22, decimal_places=4)
+
+
+def overdue_filter():
+    """Notas ativas com vencimento anterior à data atual"""
+    return Q(is_active=True, due_date__lt=timezone.now().date())
+
+
+def invoice_aggregates():
+    """Agregações calculadas diretamente sobre a tabela de notas"""
+    active = Q(is_active=True)
+    aggregates = {
+        'total_invoices': Count('id'),
+        'active_invoices': Count('id', filter=active),
+        'overdue_invoices': Count('id', filter=overdue_filter()),
+        'total_value': Coalesce(
+            Sum('total_value', filter=active),
+            Value(Decimal('0.00')),
+            output_field=TOTAL_FIELD
+        ),
+        'pf_count': Count('id', filter=active & Q(client_type='pf')),
+        'pj_count': Count('id', filter=active & Q(client_type='pj')),
+    }
+    for choice in Invoice.SERVICE_TYPE_CHOICES:
+        aggregates[f'service_{choice[0]}'] = Count(
+            'id',
+            filter=active & Q(service_type=choice[0])
+        )
+    return aggregates
+
+
+def rollup_aggregates():
+    """Mesmas agregações (exceto vencidas) lidas do rollup diário"""
+    active = Q(is_active=True)
+
+    def count(condition=None):
+        return Coalesce(Sum('invoice_count', filter=condition), 0)
+
+    aggregates = {
+        'total_invoices': count(),
+        'active_invoices': count(active),
+        'total_value': Coalesce(
+            Sum(
+                ExpressionWrapper(F('value_sum') + F('tax_sum'), output_field=TOTAL_FIELD),
+                filter=active
+            ),
+            Value(Decimal('0.00')),
+            output_field=TOTAL_FIELD
+        ),
+        'pf_count': count(active & Q(client_type='pf')),
+        'pj_count': count(active & Q(client_type='pj')),
+    }
+    for choice in Invoice.SERVICE_TYPE_CHOICES:
+        aggregates[f'service_{choice[0]}'] = count(active & Q(service_type=choice[0]))
+    return aggregates
+
+
+def rollup_queryset(start_date=None, end_date=None):
+    """Linhas do rollup no período de emissão informado"""
+    queryset = InvoiceDailyStat.objects.all()
+    if start_date:
+        queryset = queryset.filter(day__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(day__lte=end_date)
+    return queryset
+
+
+def overdue_queryset(start_date=None, end_date=None):
+    """Notas vencidas no período de emissão informado"""
+    queryset = Invoice.objects.filter(overdue_filter())
+    if start_date:
+        queryset = queryset.filter(issue_date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(issue_date__lte=end_date)
+    return queryset
+
+
+def build_statistics(stats):
+    """Monta a resposta do endpoint a partir do resultado agregado"""
+    return {
+        'total_invoices': stats['total_invoices'],
+        'active_invoices': stats['active_invoices'],
+        'overdue_invoices': stats['overdue_invoices'],
+        'total_value': stats['total_value'],
+        'client_types': {
+            'pessoa_fisica': stats['pf_count'],
+            'pessoa_juridica': stats['pj_count']
+        },
+        'service_types': {
+            choice[0]: stats[f'service_{choice[0]}']
+            for choice in Invoice.SERVICE_TYPE_CHOICES
+        }
+    }
+
+
+def compute_statistics(params):
+    """
+    Calcula as estatísticas para os parâmetros `start_date`, `end_date` e
+    `overdue` da requisição.
+
+    Sem o filtro de vencidas, os números vêm do rollup diário e só a contagem
+    de vencidas consulta a tabela de notas.
+    """
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+
+    if params.get('overdue') == 'true':
+        queryset = overdue_queryset(start_date, end_date)
+        return build_statistics(queryset.aggregate(**invoice_aggregates()))
+
+    stats = rollup_queryset(start_date, end_date).aggregate(**rollup_aggregates())
+    stats['overdue_invoices'] = overdue_queryset(start_date, end_date).count()
+    return build_statistics(stats)
+
+
+async def acompute_statistics(params):
+    """Versão assíncrona de `compute_statistics` (ORM assíncrono)"""
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+
+    if params.get('overdue') == 'true':
+        queryset = overdue_queryset(start_date, end_date)
+        return build_statistics(await queryset.aaggregate(**invoice_aggregates()))
+
+    stats = await rollup_queryset(start_date, end_date).aaggregate(**rollup_aggregates())
+    stats['overdue_invoices'] = await overdue_queryset(start_date, end_date).acount()
+    return build_statistics(stats)
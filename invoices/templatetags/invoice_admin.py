@@ -0,0 +1,59 @@
+import copy
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+
+register = template.Library()
+
+
+def invoice_date_hierarchy(cl):
+    """
+    `date_hierarchy` do admin sem o SELECT DISTINCT por ano.
+
+    Sem data escolhida, o Django calcula MIN/MAX e depois lista os anos com
+    um DISTINCT sobre `django_date_trunc('year', ...)`, que percorre todas as
+    notas. Aqui a primeira e a última data vêm de duas leituras com LIMIT 1
+    pelo índice de emissão e os anos são o intervalo entre elas (um ano sem
+    notas aparece, e só lista a página vazia). Com um só ano (ou mês), o
+    Django já desceria para os meses (ou dias): o nível é repassado a ele.
+    """
+    field_name = cl.date_hierarchy
+    if any(key.startswith(f'{field_name}__') for key in cl.params):
+        return date_hierarchy(cl)
+
+    dates = cl.queryset.order_by().values_list(field_name, flat=True)
+    first = dates.order_by(field_name).first()
+    last = dates.order_by(f'-{field_name}').first()
+    if first is None:
+        return {'show': True, 'back': None, 'choices': []}
+
+    if first.year == last.year:
+        params = {f'{field_name}__year': str(first.year)}
+        if first.month == last.month:
+            params[f'{field_name}__month'] = str(first.month)
+        cl = copy.copy(cl)
+        cl.params = {**cl.params, **params}
+        return date_hierarchy(cl)
+
+    return {
+        'show': True,
+        'back': None,
+        'choices': [
+            {
+                'link': cl.get_query_string({f'{field_name}__year': str(year)}, [f'{field_name}__']),
+                'title': str(year),
+            }
+            for year in range(first.year, last.year + 1)
+        ],
+    }
+
+
+@register.tag(name='invoice_date_hierarchy')
+def invoice_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=invoice_date_hierarchy,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
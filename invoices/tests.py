@@ -1,12 +1,45 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection
+from django.db.models import Sum
+from django.core.signals import request_finished
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from decimal import Decimal
+from io import BytesIO, StringIO
+import json
+import uuid
 from datetime import date, timedelta
-from .models import Invoice
+from unittest import mock, skipUnless
+import re
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import csv
+import os
+import tempfile
+import zipfile
+from django.core.management import call_command
+from django.core import mail
+from .models import Invoice, InvoiceSequence, InvoiceDailyStat, InvoiceImport, PaymentReminder
+from . import pdf, utils
+from .benchmark import sample_invoices, seed_invoices
+from .pagination import EstimatedCountPaginator
+from .statistics import compute_statistics
+from .utils import format_currency
+from .utils import check_documents, validate_cpf, validate_cnpj
+from mei_backend import metrics
+from .serializers import (
+    InvoiceSerializer,
+    InvoiceListSerializer,
+    InvoiceValuesSerializer,
+    InvoiceListValuesSerializer
+)
+from rest_framework.renderers import JSONRenderer
 
 # Get the custom user model
 User = get_user_model()
@@ -15,7 +48,7 @@ class InvoiceModelTest(TestCase):
     def setUp(self):
         self.invoice_data = {
             'client_type': 'pf',
-            'document': '123.456.789-00',
+            'document': '123.456.789-09',
             'name': 'João Silva',
             'email': 'joao@email.com',
             'phone': '(11) 99999-1234',
@@ -62,6 +95,885 @@ class InvoiceModelTest(TestCase):
         self.assertTrue(invoice1.invoice_number.startswith('2025'))
         self.assertTrue(invoice2.invoice_number.startswith('2025'))
 
+    def test_invoice_sequence_reserves_contiguous_block(self):
+        """Test block reservation for bulk numbering"""
+        Invoice.objects.create(**self.invoice_data)
+        year = date.today().year
+
+        block = InvoiceSequence.reserve(year, 5)
+        self.assertEqual(list(block), [2, 3, 4, 5, 6])
+
+        invoice = Invoice.objects.create(**self.invoice_data)
+        self.assertEqual(invoice.invoice_number, f"{year}-000007")
+
+    def test_invoice_sequence_continues_existing_numbering(self):
+        """Test the sequence starts after numbers issued before it existed"""
+        year = date.today().year
+        Invoice.objects.create(**self.invoice_data, invoice_number=f"{year}-000041")
+
+        invoice = Invoice.objects.create(**self.invoice_data)
+        self.assertEqual(invoice.invoice_number, f"{year}-000042")
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Planos de execução verificados no SQLite')
+class DocumentValidationTest(TestCase):
+    documents = [
+        '529.982.247-25', '123.456.789-09', '11.222.333/0001-81', '98.765.432/0001-98',
+        '529.982.247-24', '123.456.789-00', '11.222.333/0001-80', '111.111.111-11',
+        '00.000.000/0000-00', '', '123', ' 529 982 247 25 ', '５２９９８２２４７２５',
+    ]
+
+    def test_single_document_validation(self):
+        """Test CPF/CNPJ check digits"""
+        self.assertTrue(validate_cpf('529.982.247-25'))
+        self.assertTrue(validate_cpf('12345678909'))
+        self.assertFalse(validate_cpf('529.982.247-24'))
+        self.assertFalse(validate_cpf('111.111.111-11'))
+        self.assertFalse(validate_cpf('11.222.333/0001-81'))
+        self.assertTrue(validate_cnpj('11.222.333/0001-81'))
+        self.assertFalse(validate_cnpj('11.222.333/0001-80'))
+        self.assertFalse(validate_cnpj('00.000.000/0000-00'))
+
+    def test_batch_matches_single_document_checks(self):
+        """Test the batch engine agrees with the per-document check"""
+        documents = self.documents * (utils.NUMPY_MIN_BATCH // len(self.documents) + 1)
+        expected = [utils.check_clean_document(utils.clean_document(d)) for d in documents]
+
+        self.assertEqual(check_documents(documents), expected)
+        self.assertEqual(check_documents(self.documents), expected[:len(self.documents)])
+        self.assertEqual(
+            [valid for _, valid in expected[:len(self.documents)]],
+            [True] * 4 + [False] * 7 + [True, False]
+        )
+
+    def test_sample_invoices_are_valid(self):
+        """Test generated benchmark invoices have valid documents and dates"""
+        invoices = list(sample_invoices(200, seed=3))
+        self.assertEqual(
+            [(invoice.document, invoice.issue_date) for invoice in sample_invoices(200, seed=3)],
+            [(invoice.document, invoice.issue_date) for invoice in invoices]
+        )
+        kinds = {'pf': 'cpf', 'pj': 'cnpj'}
+        self.assertEqual(
+            check_documents([invoice.document for invoice in invoices]),
+            [(kinds[invoice.client_type], True) for invoice in invoices]
+        )
+        self.assertGreater(len({invoice.document for invoice in invoices}), 190)
+        today = timezone.now().date()
+        for invoice in invoices:
+            self.assertLessEqual(invoice.issue_date, today)
+            self.assertGreater(invoice.issue_date, today - timedelta(days=731))
+            self.assertGreater(invoice.due_date, invoice.issue_date)
+
+class InvoiceIndexUsageTest(APITestCase):
+    """Os planos das consultas dos endpoints principais devem usar índices"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='indexuser',
+            email='index@email.com',
+            cnpj='11.222.333/0001-81',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.invoice = Invoice.objects.create(
+            client_type='pf',
+            document='123.456.789-09',
+            name='João Silva',
+            email='joao@email.com',
+            phone='(11) 99999-1234',
+            address='Rua Teste, 123',
+            neighborhood='Centro',
+            city='São Paulo',
+            state='SP',
+            zip_code='01234-567',
+            service_description='Desenvolvimento de sistema',
+            service_type='dev',
+            value=Decimal('1000.00'),
+            tax=Decimal('0.15'),
+            payment_method='pix',
+            issue_date=date.today(),
+            due_date=date.today() + timedelta(days=30),
+        )
+
+    def assertQueriesUseIndexes(self, path, params=None, search=True):
+        """
+        Every read of invoices or the rollup goes through an index. With
+        `search`, it must be an index lookup (SEARCH): a SCAN ... USING INDEX,
+        which walks the whole index, is only accepted for unfiltered lists
+        read in index order.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, params or {})
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        selects = [q['sql'] for q in context.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        checked = 0
+        with connection.cursor() as cursor:
+            for sql in selects:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+                for step in plan:
+                    if not re.match(r'(SCAN|SEARCH) (invoices|invoice_daily_stats)\b', step):
+                        continue
+                    checked += 1
+                    message = f'{path} {params}: {step}\n{sql}'
+                    self.assertRegex(step, r' USING (COVERING )?INDEX |USING INTEGER PRIMARY KEY', message)
+                    if search:
+                        self.assertTrue(step.startswith('SEARCH '), message)
+        self.assertTrue(checked, f'{path} {params}: nenhuma leitura de notas')
+
+    def test_list_queries_use_indexes(self):
+        """Test list, filters, date ranges and orderings are index-backed"""
+        url = reverse('invoice-list')
+        today = date.today().isoformat()
+        # Filtros e períodos: busca no índice
+        for params in [
+            {'client_type': 'pf'},
+            {'service_type': 'dev'},
+            {'state': 'SP'},
+            {'is_active': 'true'},
+            {'start_date': today, 'end_date': today},
+            {'overdue': 'true'},
+        ]:
+            self.assertQueriesUseIndexes(url, params)
+        # Sem filtro: leitura na ordem de um índice
+        for params in [
+            {},
+            {'ordering': 'due_date'},
+            {'ordering': '-issue_date'},
+            {'ordering': 'value'},
+            {'ordering': '-total_value'},
+            {'ordering': 'tax_amount'},
+        ]:
+            self.assertQueriesUseIndexes(url, params, search=False)
+
+    def test_detail_statistics_and_export_use_indexes(self):
+        """Test detail, statistics and export are index-backed"""
+        today = date.today().isoformat()
+        self.assertQueriesUseIndexes(reverse('invoice-detail', kwargs={'pk': self.invoice.pk}))
+        self.assertQueriesUseIndexes(
+            reverse('invoice-statistics'),
+            {'start_date': today, 'end_date': today}
+        )
+        self.assertQueriesUseIndexes(reverse('invoice-statistics'), {'overdue': 'true'})
+        self.assertQueriesUseIndexes(reverse('invoice-export'), {'format': 'csv'}, search=False)
+
+
+class InvoiceSearchTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='searchuser',
+            email='search@email.com',
+            cnpj='11.222.333/0001-81',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.base = {
+            'client_type': 'pf',
+            'document': '123.456.789-09',
+            'name': 'Cliente Genérico',
+            'email': 'cliente@email.com',
+            'phone': '(11) 99999-1234',
+            'address': 'Rua Teste, 123',
+            'neighborhood': 'Centro',
+            'city': 'São Paulo',
+            'state': 'SP',
+            'zip_code': '01234-567',
+            'service_description': 'Serviço prestado',
+            'service_type': 'dev',
+            'value': Decimal('100.00'),
+            'tax': Decimal('0.10'),
+            'payment_method': 'pix',
+            'issue_date': date.today(),
+            'due_date': date.today() + timedelta(days=30),
+        }
+
+    def search(self, term, **params):
+        response = self.client.get(reverse('invoice-list'), {'search': term, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_search_matches_all_fields(self):
+        """Test search over name, email, document, number and description"""
+        invoice = Invoice.objects.create(**self.base | {
+            'name': 'Padaria São João',
+            'email': 'contato@padaria.com',
+            'document': '98.765.432/0001-98',
+            'service_description': 'Cardápio e identidade visual',
+        })
+        Invoice.objects.create(**self.base)
+
+        for term in ['padaria', 'Sao Joao', 'contato@padaria', '98765432000198',
+                     '98.765.432', invoice.invoice_number, 'cardapio', 'ident']:
+            self.assertEqual(self.search(term), [str(invoice.pk)], term)
+
+    def test_search_ranks_name_matches_first(self):
+        """Test results are ordered by relevance"""
+        in_description = Invoice.objects.create(**self.base | {
+            'service_description': 'Sistema para a Padaria Central',
+        })
+        in_name = Invoice.objects.create(**self.base | {'name': 'Padaria Central'})
+
+        self.assertEqual(self.search('padaria'), [str(in_name.pk), str(in_description.pk)])
+        # Ordenação explícita continua valendo
+        self.assertEqual(
+            self.search('padaria', ordering='created_at'),
+            [str(in_description.pk), str(in_name.pk)]
+        )
+
+    def test_search_index_follows_updates_and_deletes(self):
+        """Test the search index is kept in sync with the invoices table"""
+        invoice = Invoice.objects.create(**self.base | {'name': 'Oficina Mecânica'})
+        self.assertEqual(self.search('oficina'), [str(invoice.pk)])
+
+        invoice.name = 'Borracharia'
+        invoice.save()
+        self.assertEqual(self.search('oficina'), [])
+        self.assertEqual(self.search('borracharia'), [str(invoice.pk)])
+
+        invoice.delete()
+        self.assertEqual(self.search('borracharia'), [])
+
+    def test_search_results_paginate_by_rank(self):
+        """Test cursor pagination over ranked search results"""
+        for index in range(5):
+            Invoice.objects.create(**self.base | {
+                'name': 'Padaria ' * (index + 1) + 'Nova',
+            })
+        ids = []
+        response = self.client.get(reverse('invoice-list'), {'search': 'padaria', 'page_size': 2})
+        while True:
+            ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Rowid implícito só existe no SQLite')
+    def test_search_survives_rowid_renumbering(self):
+        """Test the index does not depend on the implicit rowid VACUUM may renumber"""
+        first = Invoice.objects.create(**self.base | {'name': 'Oficina Mecânica'})
+        second = Invoice.objects.create(**self.base | {'name': 'Borracharia'})
+        with connection.cursor() as cursor:
+            # Troca os rowids das duas notas, como um VACUUM poderia fazer
+            cursor.execute('UPDATE invoices SET rowid = rowid + 1000')
+            cursor.execute(
+                'UPDATE invoices SET rowid = CASE id WHEN %s THEN %s ELSE %s END',
+                [first.pk.hex, 2000, 1999]
+            )
+        self.assertEqual(self.search('oficina'), [str(first.pk)])
+        self.assertEqual(self.search('borracharia'), [str(second.pk)])
+
+        second.delete()
+        self.assertEqual(self.search('oficina'), [str(first.pk)])
+        self.assertEqual(self.search('borracharia'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Índice FTS5 do SQLite')
+    def test_rebuild_search_index(self):
+        """Test the rebuild command reindexes invoices missing from the index"""
+        invoice = Invoice.objects.create(**self.base | {'name': 'Oficina Mecânica'})
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM invoices_fts')
+        self.assertEqual(self.search('oficina'), [])
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('oficina'), [str(invoice.pk)])
+        Invoice.objects.create(**self.base | {'name': 'Oficina Nova'})
+        self.assertEqual(len(self.search('oficina')), 2)
+
+    def test_search_without_words_matches_nothing(self):
+        """Test punctuation-only searches return no invoices, while a blank one doesn't filter"""
+        invoice = Invoice.objects.create(**self.base)
+        self.assertEqual(self.search('---'), [])
+        self.assertEqual(self.search('.-/'), [])
+        self.assertEqual(self.search(',,'), [])
+        self.assertEqual(self.search(''), [str(invoice.pk)])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plano de execução verificado no SQLite')
+    def test_search_uses_fts_index(self):
+        """Test the search query is driven by the FTS index, not a table scan"""
+        Invoice.objects.create(**self.base)
+        with CaptureQueriesContext(connection) as context:
+            self.search('cliente')
+        sql = [q['sql'] for q in context.captured_queries if 'invoices_fts' in q['sql']][-1]
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertTrue(any('VIRTUAL TABLE INDEX' in step for step in plan), plan)
+        self.assertFalse(any(re.match(r'SCAN invoices\b', step) for step in plan), plan)
+
+
+class InvoiceImportTest(TestCase):
+    fields = [
+        'client_type', 'document', 'name', 'email', 'phone', 'address', 'neighborhood',
+        'city', 'state', 'zip_code', 'service_description', 'service_type', 'value',
+        'tax', 'payment_method', 'due_date', 'issue_date', 'additional_info',
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'notas.csv')
+        due_date = (date.today() + timedelta(days=30)).isoformat()
+        self.row = {
+            'client_type': 'pf', 'document': '123.456.789-09', 'name': 'João Silva',
+            'email': 'joao@email.com', 'phone': '(11) 99999-1234', 'address': 'Rua Teste, 123',
+            'neighborhood': 'Centro', 'city': 'São Paulo', 'state': 'SP', 'zip_code': '01234-567',
+            'service_description': 'Desenvolvimento', 'service_type': 'dev', 'value': '1000.00',
+            'tax': '0.15', 'payment_method': 'pix', 'due_date': due_date,
+            'issue_date': date.today().isoformat(), 'additional_info': '',
+        }
+
+    def write_csv(self, rows):
+        with open(self.path, 'w', newline='', encoding='utf-8') as target:
+            writer = csv.DictWriter(target, fieldnames=self.fields)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def import_csv(self, *args):
+        out = StringIO()
+        call_command('import_invoices', self.path, '--chunk-size', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_with_rejects_and_checkpoint(self):
+        """Test valid rows are bulk inserted and invalid ones go to the reject file"""
+        self.write_csv([
+            self.row | {'name': 'Primeira'},
+            self.row | {'document': '123.456.789-00'},
+            self.row | {'name': 'Segunda', 'client_type': 'pj', 'document': '11.222.333/0001-81'},
+            self.row | {'value': '-1'},
+            self.row | {'name': 'Terceira'},
+        ])
+
+        output = self.import_csv('--workers', '0')
+
+        self.assertIn('3 nota(s) importada(s), 2 rejeitada(s)', output)
+        self.assertEqual(
+            sorted(Invoice.objects.values_list('name', flat=True)),
+            ['Primeira', 'Segunda', 'Terceira']
+        )
+        self.assertEqual(len(set(Invoice.objects.values_list('invoice_number', flat=True))), 3)
+        with open(f'{self.path}.rejects.csv', encoding='utf-8') as rejects:
+            rejected = list(csv.DictReader(rejects))
+        self.assertEqual([row['row'] for row in rejected], ['2', '4'])
+        self.assertIn('CPF inválido', rejected[0]['errors'])
+        progress = InvoiceImport.objects.get(source=self.path)
+        self.assertEqual((progress.rows, progress.imported, progress.rejected), (5, 3, 2))
+
+        # Rodar de novo não duplica: o progresso indica que tudo já foi lido
+        self.import_csv('--workers', '0')
+        self.assertEqual(Invoice.objects.count(), 3)
+
+    def test_import_updates_rollup_per_chunk_without_rebuild(self):
+        """Test each stored chunk adds its deltas to the rollup instead of rebuilding the day"""
+        self.write_csv([self.row | {'name': f'Cliente {index}'} for index in range(5)])
+
+        with mock.patch.object(InvoiceDailyStat, 'rebuild') as rebuild, \
+                mock.patch.object(InvoiceDailyStat, 'apply_deltas', wraps=InvoiceDailyStat.apply_deltas) as apply_deltas:
+            self.import_csv('--workers', '0')
+        rebuild.assert_not_called()
+        self.assertEqual(apply_deltas.call_count, 3)  # Pedaços de 2, 2 e 1 linhas
+
+        stat = InvoiceDailyStat.objects.get()
+        self.assertEqual(stat.invoice_count, 5)
+        self.assertEqual(stat.value_sum, Decimal('5000.00'))
+        self.assertEqual(stat.tax_sum, Decimal('750.00'))
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test an interrupted import continues after the last stored chunk"""
+        self.write_csv([self.row | {'name': f'Cliente {index}'} for index in range(5)])
+        InvoiceImport.objects.create(source=self.path, rows=2, imported=2)
+
+        output = self.import_csv('--workers', '0')
+
+        self.assertIn('Retomando a partir da linha 3', output)
+        self.assertEqual(
+            sorted(Invoice.objects.values_list('name', flat=True)),
+            ['Cliente 2', 'Cliente 3', 'Cliente 4']
+        )
+
+        self.import_csv('--workers', '0', '--restart')
+        self.assertEqual(Invoice.objects.count(), 8)
+
+    def test_import_interrupted_mid_chunk_does_not_duplicate(self):
+        """Test a chunk is stored together with its progress, or not at all"""
+        self.write_csv([self.row | {'name': f'Cliente {index}'} for index in range(5)])
+        save = InvoiceImport.save
+        calls = []
+
+        def crash_on_second_chunk(progress, *args, **kwargs):
+            calls.append(progress.rows)
+            if len(calls) == 3:  # get_or_create, 1º pedaço, 2º pedaço
+                raise KeyboardInterrupt
+            return save(progress, *args, **kwargs)
+
+        with mock.patch.object(InvoiceImport, 'save', crash_on_second_chunk):
+            with self.assertRaises(KeyboardInterrupt):
+                self.import_csv('--workers', '0')
+        self.assertEqual(Invoice.objects.count(), 2)
+        self.assertEqual(InvoiceImport.objects.get(source=self.path).rows, 2)
+
+        output = self.import_csv('--workers', '0')
+        self.assertIn('Retomando a partir da linha 3', output)
+        self.assertEqual(
+            sorted(Invoice.objects.values_list('name', flat=True)),
+            [f'Cliente {index}' for index in range(5)]
+        )
+
+    def test_import_validates_in_process_pool(self):
+        """Test chunks validated by worker processes are stored in file order"""
+        self.write_csv([self.row | {'name': f'Cliente {index}'} for index in range(5)])
+
+        output = self.import_csv('--workers', '2')
+
+        self.assertIn('5 nota(s) importada(s), 0 rejeitada(s)', output)
+        self.assertEqual(
+            list(Invoice.objects.order_by('invoice_number').values_list('name', flat=True)),
+            [f'Cliente {index}' for index in range(5)]
+        )
+
+class PaymentReminderTest(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.base = {
+            'client_type': 'pf', 'document': '123.456.789-09', 'phone': '(11) 99999-1234',
+            'address': 'Rua Teste, 123', 'neighborhood': 'Centro', 'city': 'São Paulo',
+            'state': 'SP', 'zip_code': '01234-567', 'service_description': 'Desenvolvimento',
+            'service_type': 'dev', 'value': Decimal('1000.00'), 'tax': Decimal('0.10'),
+            'payment_method': 'pix', 'issue_date': today - timedelta(days=30),
+        }
+        self.overdue = self.create('joao@email.com', today - timedelta(days=5))
+        self.due_soon = self.create('joao@email.com', today + timedelta(days=2))
+        self.other = self.create('maria@email.com', today - timedelta(days=1), name='Maria')
+        # Fora do período e inativa: não recebem lembrete
+        self.create('joao@email.com', today + timedelta(days=20))
+        self.create('ana@email.com', today - timedelta(days=1), is_active=False)
+
+    def create(self, email, due_date, name='João Silva', **extra):
+        return Invoice.objects.create(
+            **self.base, email=email, name=name, due_date=due_date, **extra
+        )
+
+    def send(self, *args):
+        out = StringIO()
+        call_command('send_due_reminders', *args, stdout=out)
+        return out.getvalue()
+
+    def test_one_message_per_client(self):
+        output = self.send('--days', '3', '--batch-size', '1')
+        self.assertIn('2 email(s) enviado(s) (3 nota(s))', output)
+
+        messages = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(set(messages), {'joao@email.com', 'maria@email.com'})
+        body = messages['joao@email.com'].body
+        self.assertIn(self.overdue.invoice_number, body)
+        self.assertIn(self.due_soon.invoice_number, body)
+        self.assertIn('Total: R$ 2.200,00', body)
+        self.assertIn('Maria', messages['maria@email.com'].body)
+
+        self.assertEqual(
+            set(PaymentReminder.objects.values_list('invoice_id', 'kind')),
+            {
+                (self.overdue.pk, 'overdue'),
+                (self.due_soon.pk, 'due_soon'),
+                (self.other.pk, 'overdue'),
+            }
+        )
+
+    def test_rerun_is_idempotent(self):
+        self.send()
+        self.assertEqual(len(mail.outbox), 2)
+
+        output = self.send()
+        self.assertIn('0 email(s) enviado(s)', output)
+        self.assertEqual(len(mail.outbox), 2)
+
+        # Depois de vencer, a nota "a vencer" recebe o lembrete de vencida
+        self.due_soon.due_date = date.today() - timedelta(days=1)
+        self.due_soon.save()
+        self.send()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[-1].to, ['joao@email.com'])
+        self.assertIn(self.due_soon.invoice_number, mail.outbox[-1].body)
+        self.assertNotIn(self.overdue.invoice_number, mail.outbox[-1].body)
+
+    def test_dry_run_sends_nothing(self):
+        output = self.send('--dry-run')
+        self.assertIn('2 email(s) seriam enviados (3 nota(s))', output)
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(PaymentReminder.objects.exists())
+
+    def test_failed_message_is_not_recorded(self):
+        with self.settings(EMAIL_BACKEND='accounts.tests.FailingBackend'):
+            with self.assertLogs('invoices.management.commands.send_due_reminders', 'WARNING'):
+                output = self.send()
+        self.assertIn('0 email(s) enviado(s) (0 nota(s)), 2 falha(s)', output)
+        self.assertFalse(PaymentReminder.objects.exists())
+
+        self.send()
+        self.assertEqual(len(mail.outbox), 2)
+
+class InvoiceAdminTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@email.com', cnpj='11.222.333/0001-81',
+            password='testpass123'
+        )
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:invoices_invoice_changelist')
+
+    def changelist_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response, queries.captured_queries
+
+    def test_changelist_query_budget(self):
+        """Test the changelist runs a fixed number of queries at any size"""
+        seed_invoices(30)
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 10):
+            response, small = self.changelist_queries()
+            self.assertContains(response, format_currency(Invoice.objects.first().total_value))
+
+            seed_invoices(60, seed=1)
+            _, large = self.changelist_queries()
+            _, by_year = self.changelist_queries({'issue_date__year': date.today().year})
+
+        # Sessão, usuário, estimativa, página e os dois do date_hierarchy
+        self.assertLessEqual(len(small), 6)
+        self.assertEqual(len(large), len(small))
+        # Com o ano escolhido: contagem exata no lugar da estimativa, e os meses
+        self.assertLessEqual(len(by_year), 5)
+        for query in small + large:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('"service_description"', query['sql'])
+
+    def test_date_hierarchy_years_from_index_range(self):
+        """Test year links come from the first/last issue dates read through the index"""
+        first, *_, last = seed_invoices(5)
+        this_year = date.today().year
+        Invoice.objects.filter(pk=first.pk).update(issue_date=date(this_year - 3, 6, 1))
+        Invoice.objects.filter(pk=last.pk).update(issue_date=date(this_year, 1, 1))
+
+        response, queries = self.changelist_queries()
+        for year in range(this_year - 3, this_year + 1):
+            self.assertContains(response, f'?issue_date__year={year}"')
+        self.assertFalse(any('django_date_trunc' in query['sql'] for query in queries))
+
+        # Primeira e última datas: LIMIT 1 pelo índice, sem ordenar a tabela
+        bounds = [query['sql'] for query in queries if query['sql'].startswith('SELECT "invoices"."issue_date" AS')]
+        self.assertEqual(len(bounds), 2)
+        with connection.cursor() as cursor:
+            for sql in bounds:
+                self.assertIn('LIMIT 1', sql)
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+                self.assertTrue(any('invoices_issue_date_idx' in step for step in plan), plan)
+                self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+
+    def test_date_hierarchy_single_year_lists_months(self):
+        """Test invoices from a single year still drill down to months as Django does"""
+        seed_invoices(3)
+        Invoice.objects.update(issue_date=date(2024, 3, 10))
+        Invoice.objects.filter(pk=Invoice.objects.values('pk')[:1]).update(issue_date=date(2024, 5, 2))
+
+        response, _ = self.changelist_queries()
+        self.assertContains(response, '?issue_date__month=3&amp;issue_date__year=2024')
+        self.assertContains(response, '?issue_date__month=5&amp;issue_date__year=2024')
+
+    def test_changelist_estimated_count(self):
+        """Test the unfiltered changelist uses the estimate on large tables"""
+        seed_invoices(5)
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url)
+            self.assertContains(response, '5 Notas Fiscais')
+            self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+            # Com filtro a contagem é exata
+            Invoice.objects.filter(pk__in=Invoice.objects.values('pk')[:2]).update(is_active=False)
+            response = self.client.get(self.url, {'is_active__exact': '0'})
+            self.assertContains(response, '2 Notas Fiscais')
+
+    def test_changelist_list_editable(self):
+        """Test saving is_active from the changelist keeps the rollup in sync"""
+        invoice, = seed_invoices(1)
+        response = self.client.post(self.url, {
+            'form-TOTAL_FORMS': '1', 'form-INITIAL_FORMS': '1',
+            'form-0-id': str(invoice.pk), '_save': 'Salvar',
+            # is_active desmarcado
+        })
+        self.assertEqual(response.status_code, 302)
+        invoice.refresh_from_db()
+        self.assertFalse(invoice.is_active)
+        self.assertEqual(
+            list(InvoiceDailyStat.objects.values_list('is_active', 'invoice_count')),
+            [(False, 1)]
+        )
+
+        # O formulário de edição continua com todas as colunas
+        response = self.client.get(reverse('admin:invoices_invoice_change', args=[invoice.pk]))
+        self.assertContains(response, invoice.service_description)
+
+    def test_mark_actions_touch_updated_at(self):
+        """Test the activate/deactivate actions refresh updated_at like a save would"""
+        invoices = seed_invoices(2)
+        stale = timezone.now() - timedelta(days=1)
+        Invoice.objects.update(updated_at=stale)
+
+        for action, is_active in [('mark_as_inactive', False), ('mark_as_active', True)]:
+            response = self.client.post(self.url, {
+                'action': action,
+                '_selected_action': [str(invoice.pk) for invoice in invoices],
+            })
+            self.assertEqual(response.status_code, 302)
+            for invoice in Invoice.objects.all():
+                self.assertEqual(invoice.is_active, is_active)
+                self.assertGreater(invoice.updated_at, stale)
+            Invoice.objects.update(updated_at=stale)
+
+    def read_csv(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(StringIO(content)))
+
+    def test_export_selected_csv_action(self):
+        """Test the admin action streams the selected invoices as formatted CSV"""
+        invoices = seed_invoices(3)
+        response = self.client.post(self.url, {
+            'action': 'export_selected_csv',
+            '_selected_action': [str(invoice.pk) for invoice in invoices[:2]],
+        })
+        rows = self.read_csv(response)
+
+        self.assertEqual(rows[0][:4], ['Número', 'Cliente', 'Tipo de Cliente', 'CPF/CNPJ'])
+        self.assertEqual(len(rows), 3)
+        row = dict(zip(rows[0], rows[-1]))
+        invoice = Invoice.objects.get(invoice_number=row['Número'])
+        self.assertEqual(row['Total'], format_currency(invoice.total_value))
+        self.assertEqual(row['CPF/CNPJ'], utils.format_document(invoice.document))
+        self.assertEqual(row['Emissão'], invoice.issue_date.strftime('%d/%m/%Y'))
+        self.assertEqual(row['Ativa'], 'Sim')
+
+    def test_export_filtered_changelist_csv(self):
+        """Test the changelist export follows the current filters and search"""
+        invoices = seed_invoices(6)
+        Invoice.objects.filter(pk__in=[invoice.pk for invoice in invoices[:2]]).update(is_active=False)
+
+        response = self.client.get(self.url)
+        export_url = reverse('admin:invoices_invoice_export_csv')
+        self.assertContains(response, export_url)
+
+        rows = self.read_csv(self.client.get(export_url, {'is_active__exact': '0'}))
+        self.assertEqual(
+            sorted(row[0] for row in rows[1:]),
+            sorted(invoice.invoice_number for invoice in invoices[:2])
+        )
+        self.assertEqual({row[-1] for row in rows[1:]}, {'Não'})
+
+        rows = self.read_csv(self.client.get(export_url, {'q': '"Cliente 5"'}))
+        self.assertEqual([row[1] for row in rows[1:]], ['Cliente 5'])
+
+        self.client.logout()
+        response = self.client.get(export_url)
+        self.assertEqual(response.status_code, 302)
+
+class InvoiceDailyStatTest(TestCase):
+    def setUp(self):
+        self.invoice_data = {
+            'client_type': 'pf',
+            'document': '123.456.789-09',
+            'name': 'Maria Souza',
+            'email': 'maria@email.com',
+            'phone': '(81) 98888-1234',
+            'address': 'Rua Teste, 10',
+            'neighborhood': 'Centro',
+            'city': 'Recife',
+            'state': 'PE',
+            'zip_code': '50000-000',
+            'service_description': 'Identidade visual',
+            'service_type': 'design',
+            'value': Decimal('200.00'),
+            'tax': Decimal('0.10'),
+            'payment_method': 'pix',
+            'issue_date': date.today(),
+            'due_date': date.today() + timedelta(days=10),
+        }
+
+    def snapshot(self):
+        return sorted(
+            InvoiceDailyStat.objects.filter(invoice_count__gt=0).values_list(
+                'day', 'service_type', 'client_type', 'state', 'is_active',
+                'invoice_count', 'value_sum', 'tax_sum'
+            )
+        )
+
+    def assertRollupMatchesRebuild(self):
+        incremental = self.snapshot()
+        InvoiceDailyStat.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_rollup_tracks_create_update_and_delete(self):
+        """Test incremental rollup updates match a full rebuild"""
+        first = Invoice.objects.create(**self.invoice_data)
+        second = Invoice.objects.create(**self.invoice_data | {'state': 'SP'})
+        self.assertEqual(
+            InvoiceDailyStat.objects.get(state='PE').value_sum,
+            Decimal('200.00')
+        )
+
+        first.value = Decimal('350.00')
+        first.issue_date = date.today() - timedelta(days=3)
+        first.save()
+        self.assertRollupMatchesRebuild()
+
+        second.is_active = False
+        second.save()
+        self.assertRollupMatchesRebuild()
+
+        first.delete()
+        self.assertRollupMatchesRebuild()
+        self.assertFalse(InvoiceDailyStat.objects.filter(state='PE').exists())
+
+    def test_rollup_tracks_queryset_update(self):
+        """Test bulk updates (as in admin actions) refresh the rollup"""
+        Invoice.objects.create(**self.invoice_data)
+        Invoice.objects.create(**self.invoice_data | {'service_type': 'dev'})
+
+        Invoice.objects.filter(service_type='dev').update(is_active=False)
+        self.assertEqual(
+            InvoiceDailyStat.objects.get(service_type='dev').is_active,
+            False
+        )
+        self.assertRollupMatchesRebuild()
+
+    def test_bulk_create_applies_deltas_without_rebuild(self):
+        """Test bulk_create adds summed contributions to the rollup instead of rebuilding days"""
+        Invoice.objects.create(**self.invoice_data)
+        batch = [
+            Invoice(**self.invoice_data | {'value': Decimal('100.00')}),
+            Invoice(**self.invoice_data | {'tax': None}),
+            Invoice(**self.invoice_data | {'state': 'SP'}),
+            Invoice(**self.invoice_data | {'issue_date': date.today() - timedelta(days=1)}),
+        ]
+
+        with mock.patch.object(InvoiceDailyStat, 'rebuild') as rebuild, \
+                CaptureQueriesContext(connection) as queries:
+            Invoice.objects.bulk_create(batch)
+        rebuild.assert_not_called()
+        # Leitura do rollup, bulk_update e bulk_create, e não uma consulta por chave
+        rollup_queries = [q for q in queries if 'invoice_daily_stats' in q['sql']]
+        self.assertEqual(len(rollup_queries), 3)
+
+        stat = InvoiceDailyStat.objects.get(day=date.today(), state='PE')
+        self.assertEqual(stat.invoice_count, 3)
+        self.assertEqual(stat.value_sum, Decimal('300.00'))
+        self.assertEqual(stat.tax_sum, Decimal('30.00'))
+        self.assertRollupMatchesRebuild()
+
+    def test_loading_invoices_defers_rollup_state(self):
+        """Test reads don't compute rollup state, and saves after a deferred load stay in sync"""
+        Invoice.objects.create(**self.invoice_data)
+        Invoice.objects.create(**self.invoice_data | {'state': 'SP'})
+
+        with mock.patch.object(Invoice, 'rollup_state') as rollup_state:
+            invoices = list(Invoice.objects.all())
+        rollup_state.assert_not_called()
+
+        first = next(invoice for invoice in invoices if invoice.state == 'PE')
+        first.value = Decimal('999.00')
+        first.save()
+        self.assertRollupMatchesRebuild()
+
+        # Campo do rollup adiado: o estado anterior vem do banco no pre_save
+        deferred = Invoice.objects.defer('value').get(state='SP')
+        deferred.state = 'RJ'
+        deferred.save()
+        self.assertRollupMatchesRebuild()
+        self.assertFalse(InvoiceDailyStat.objects.filter(state='SP').exists())
+
+    def test_rollup_total_matches_stored_total_without_tax(self):
+        """Test invoices without tax add nothing to the rollup total, as in total_value"""
+        Invoice.objects.create(**self.invoice_data)
+        untaxed = Invoice.objects.create(**self.invoice_data | {'tax': None})
+        Invoice.objects.create(**self.invoice_data | {'value': None})
+
+        expected = Invoice.objects.filter(is_active=True).aggregate(total=Sum('total_value'))['total']
+        self.assertEqual(compute_statistics({})['total_value'], expected)
+        self.assertRollupMatchesRebuild()
+
+        # Ganhar e perder a alíquota move o valor no rollup
+        untaxed.tax = Decimal('0.50')
+        untaxed.save()
+        self.assertEqual(compute_statistics({})['total_value'], Decimal('520.00'))
+        untaxed.tax = None
+        untaxed.save()
+        self.assertEqual(compute_statistics({})['total_value'], expected)
+        self.assertRollupMatchesRebuild()
+
+    def test_rebuild_command(self):
+        """Test the rebuild management command regenerates the rollup"""
+        Invoice.objects.create(**self.invoice_data)
+        InvoiceDailyStat.objects.all().delete()
+
+        call_command('rebuild_invoice_stats', stdout=StringIO())
+
+        stat = InvoiceDailyStat.objects.get()
+        self.assertEqual(stat.invoice_count, 1)
+        self.assertEqual(stat.tax_sum, Decimal('20.00'))
+
+
+class InvoiceNumberConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        self.invoice_data = {
+            'client_type': 'pj',
+            'document': '11.222.333/0001-81',
+            'name': 'Empresa Teste',
+            'email': 'contato@empresa.com',
+            'phone': '(81) 3333-4444',
+            'address': 'Av. Teste, 100',
+            'neighborhood': 'Boa Vista',
+            'city': 'Recife',
+            'state': 'PE',
+            'zip_code': '50000-000',
+            'service_description': 'Consultoria',
+            'service_type': 'consulting',
+            'value': Decimal('500.00'),
+            'tax': Decimal('0.05'),
+            'payment_method': 'transfer',
+            'issue_date': date.today(),
+            'due_date': date.today() + timedelta(days=15),
+        }
+
+    def _create_invoice(self, _):
+        try:
+            return Invoice.objects.create(**self.invoice_data).invoice_number
+        finally:
+            connection.close()
+
+    def test_parallel_creates_get_unique_numbers(self):
+        """Test many parallel creates never collide on invoice_number"""
+        total = 40
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            numbers = list(executor.map(self._create_invoice, range(total)))
+
+        year = date.today().year
+        self.assertEqual(len(set(numbers)), total)
+        self.assertEqual(
+            sorted(numbers),
+            [f"{year}-{n:06d}" for n in range(1, total + 1)]
+        )
+        self.assertEqual(Invoice.objects.count(), total)
+
 class InvoiceAPITest(APITestCase):
     def setUp(self):
         # Use the custom user model
@@ -74,7 +986,7 @@ class InvoiceAPITest(APITestCase):
         
         self.invoice_data = {
             'client_type': 'pf',
-            'document': '123.456.789-00',
+            'document': '123.456.789-09',
             'name': 'João Silva',
             'email': 'joao@email.com',
             'phone': '(11) 99999-1234',
@@ -102,6 +1014,35 @@ class InvoiceAPITest(APITestCase):
         self.assertEqual(response.data['name'], 'João Silva')
         self.assertIsNotNone(response.data['invoice_number'])
     
+    def test_create_invoice_rejects_invalid_check_digits(self):
+        """Test documents with wrong check digits are rejected"""
+        url = reverse('invoice-list')
+        for document, message in [
+            ('123.456.789-00', 'CPF inválido'),
+            ('11.222.333/0001-80', 'CNPJ inválido'),
+        ]:
+            response = self.client.post(url, self.invoice_data | {'document': document}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data['document'], [message])
+
+    def test_validate_documents_endpoint(self):
+        """Test batch document validation endpoint"""
+        url = reverse('validate-documents')
+        response = self.client.post(url, {'documents': [
+            '529.982.247-25', '52998224724', '11.222.333/0001-81', '111.111.111-11', 'abc'
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['type'], item['valid']) for item in response.data['results']],
+            [('cpf', True), ('cpf', False), ('cnpj', True), ('cpf', False), (None, False)]
+        )
+        self.assertEqual(response.data['valid_count'], 2)
+        self.assertEqual(response.data['invalid_count'], 3)
+
+        response = self.client.post(url, {'documents': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_list_invoices(self):
         """Test invoice listing via API"""
         Invoice.objects.create(**{
@@ -192,6 +1133,254 @@ class InvoiceAPITest(APITestCase):
         self.assertIn('active_invoices', response.data)
         self.assertIn('total_value', response.data)
     
+    def test_invoice_statistics_query_count(self):
+        """Test statistics read the rollup plus one overdue count"""
+        base = {
+            k: v for k, v in self.invoice_data.items()
+            if k not in ['issue_date', 'due_date']
+        } | {
+            'issue_date': date.today(),
+            'due_date': date.today() + timedelta(days=30)
+        }
+        Invoice.objects.create(**base)
+        Invoice.objects.create(**base | {'client_type': 'pj', 'service_type': 'design'})
+        Invoice.objects.create(**base | {'due_date': date.today() - timedelta(days=1)})
+        Invoice.objects.create(**base | {'is_active': False})
+
+        url = reverse('invoice-statistics')
+        # Token, agregação do rollup e contagem das vencidas
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        active = Invoice.objects.filter(is_active=True)
+        self.assertEqual(response.data['total_invoices'], 4)
+        self.assertEqual(response.data['active_invoices'], 3)
+        self.assertEqual(response.data['overdue_invoices'], 1)
+        self.assertEqual(
+            response.data['total_value'],
+            sum(invoice.total_value for invoice in active)
+        )
+        self.assertEqual(
+            response.data['client_types'],
+            {'pessoa_fisica': 2, 'pessoa_juridica': 1}
+        )
+        self.assertEqual(
+            response.data['service_types'],
+            {'dev': 2, 'design': 1, 'consulting': 0}
+        )
+
+        # Com o filtro de vencidas a agregação é feita direto nas notas
+        # (o token já está no cache de autenticação)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'overdue': 'true'})
+        self.assertEqual(response.data['total_invoices'], 1)
+        self.assertEqual(response.data['overdue_invoices'], 1)
+
+    def test_statistics_cache_hit_and_invalidation(self):
+        """Test statistics are cached until an invoice is written"""
+        base = {
+            k: v for k, v in self.invoice_data.items()
+            if k not in ['issue_date', 'due_date']
+        } | {
+            'issue_date': date.today(),
+            'due_date': date.today() + timedelta(days=30)
+        }
+        invoice = Invoice.objects.create(**base)
+        url = reverse('invoice-statistics')
+
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        # Token e estatísticas em cache: nenhuma consulta
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['total_invoices'], 1)
+
+        # Parâmetros equivalentes usam a mesma entrada; outros não
+        self.assertEqual(self.client.get(url, {'overdue': 'false'})['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(url, {'overdue': 'true'})['X-Cache'], 'MISS')
+
+        Invoice.objects.create(**base)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_invoices'], 2)
+
+        Invoice.objects.filter(pk=invoice.pk).update(is_active=False)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['active_invoices'], 1)
+
+        invoice.delete()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_invoices'], 1)
+    
+    def test_values_serializers_match_model_serializers(self):
+        """Test values()-based serializers render byte-identical JSON"""
+        base = {
+            k: v for k, v in self.invoice_data.items()
+            if k not in ['issue_date', 'due_date']
+        } | {
+            'issue_date': date.today(),
+            'due_date': date.today() + timedelta(days=30)
+        }
+        Invoice.objects.create(**base)
+        Invoice.objects.create(**base | {'value': Decimal('1234.56'), 'tax': Decimal('0.07')})
+        Invoice.objects.create(**base | {'value': Decimal('0.01'), 'tax': Decimal('99.99')})
+        Invoice.objects.create(**base | {'tax': None})
+        queryset = Invoice.objects.order_by('created_at', 'id')
+
+        for model_serializer, values_serializer in [
+            (InvoiceListSerializer, InvoiceListValuesSerializer),
+            (InvoiceSerializer, InvoiceValuesSerializer),
+        ]:
+            expected = JSONRenderer().render(model_serializer(queryset.all(), many=True).data)
+            rows = values_serializer.values_queryset(queryset.all())
+            self.assertEqual(
+                JSONRenderer().render(values_serializer(rows, many=True).data),
+                expected
+            )
+    
+    def test_total_value_filter_and_ordering(self):
+        """Test stored totals can be range-filtered, sorted and stay fresh after save"""
+        base = {
+            k: v for k, v in self.invoice_data.items()
+            if k not in ['issue_date', 'due_date']
+        } | {
+            'issue_date': date.today(),
+            'due_date': date.today() + timedelta(days=30)
+        }
+        cheap = Invoice.objects.create(**base | {'value': Decimal('100.00'), 'tax': Decimal('0.10')})
+        mid = Invoice.objects.create(**base | {'value': Decimal('500.00'), 'tax': Decimal('0.00')})
+        dear = Invoice.objects.create(**base | {'value': Decimal('400.00'), 'tax': Decimal('1.00')})
+        self.assertEqual(cheap.total_value, Decimal('110.00'))
+
+        url = reverse('invoice-list')
+        response = self.client.get(url, {'ordering': '-total_value'})
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [str(dear.pk), str(mid.pk), str(cheap.pk)]
+        )
+        response = self.client.get(url, {'total_value__gte': '200', 'total_value__lte': '600'})
+        self.assertEqual([item['id'] for item in response.data['results']], [str(mid.pk)])
+        response = self.client.get(url, {'tax_amount__gte': '1'})
+        self.assertEqual(
+            {item['id'] for item in response.data['results']},
+            {str(cheap.pk), str(dear.pk)}
+        )
+
+        cheap.value = Decimal('1000.00')
+        cheap.save()
+        self.assertEqual(cheap.total_value, Decimal('1100.00'))
+        self.assertEqual(cheap.tax_amount, Decimal('100.00'))
+    
+    def test_async_reads_match_sync_api(self):
+        """Test async list, detail and statistics return the sync responses"""
+        base = {
+            k: v for k, v in self.invoice_data.items()
+            if k not in ['issue_date', 'due_date']
+        } | {
+            'issue_date': date.today(),
+            'due_date': date.today() + timedelta(days=30)
+        }
+        invoices = [
+            Invoice.objects.create(**base | {'name': f'Cliente {index}', 'value': Decimal(100 + index)})
+            for index in range(5)
+        ]
+        Invoice.objects.create(**base | {'client_type': 'pj', 'document': '11.222.333/0001-81'})
+
+        pairs = [
+            (reverse('invoice-list'), reverse('async-invoice-list')),
+            (
+                reverse('invoice-detail', kwargs={'pk': invoices[0].pk}),
+                reverse('async-invoice-detail', kwargs={'pk': invoices[0].pk})
+            ),
+            (reverse('invoice-statistics'), reverse('async-invoice-statistics')),
+        ]
+        for params in [{}, {'client_type': 'pf', 'ordering': '-value', 'page_size': 2}, {'search': 'cliente'}]:
+            for sync_url, async_url in pairs:
+                expected = self.client.get(sync_url, params)
+                response = self.client.get(async_url, params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                # Só os links de paginação apontam para as rotas assíncronas
+                self.assertEqual(
+                    response.content.replace(b'/api/v1/async/', b'/api/v1/'),
+                    expected.content,
+                    async_url
+                )
+
+        # O cursor da próxima página também é o mesmo
+        params = {'ordering': '-value', 'page_size': 2}
+        next_url = json.loads(self.client.get(reverse('async-invoice-list'), params).content)['next']
+        response = self.client.get(next_url)
+        self.assertEqual(
+            [item['name'] for item in json.loads(response.content)['results']],
+            ['Cliente 3', 'Cliente 2']
+        )
+
+        # GET condicional
+        etag = self.client.get(pairs[1][1])['ETag']
+        response = self.client.get(pairs[1][1], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_async_reads_errors(self):
+        """Test async reads authenticate, validate filters and return 404"""
+        url = reverse('async-invoice-list')
+        self.assertEqual(self.client.get(url, {'client_type': 'xx'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'cursor': 'invalido'}).status_code, status.HTTP_404_NOT_FOUND)
+        missing = reverse('async-invoice-detail', kwargs={'pk': '00000000-0000-0000-0000-000000000000'})
+        self.assertEqual(self.client.get(missing).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        self.client.credentials()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalido')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_export_streams_csv(self):
+        """Test CSV export is streamed row by row"""
+        invoice = Invoice.objects.create(**{
+            k: v for k, v in self.invoice_data.items()
+            if k not in ['issue_date', 'due_date']
+        } | {
+            'issue_date': date.today(),
+            'due_date': date.today() + timedelta(days=30)
+        })
+
+        url = reverse('invoice-export')
+        response = self.client.get(url, {'format': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('id,invoice_number,client_type'))
+        self.assertIn(invoice.invoice_number, lines[1])
+
+    def test_export_streams_ndjson(self):
+        """Test NDJSON export emits one JSON object per invoice"""
+        for _ in range(3):
+            Invoice.objects.create(**{
+                k: v for k, v in self.invoice_data.items()
+                if k not in ['issue_date', 'due_date']
+            } | {
+                'issue_date': date.today(),
+                'due_date': date.today() + timedelta(days=30)
+            })
+
+        url = reverse('invoice-export')
+        response = self.client.get(url, {'format': 'ndjson'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['name'], 'João Silva')
+    
     def test_filter_invoices_by_client_type(self):
         """Test filtering invoices by client type"""
         Invoice.objects.create(**{
@@ -212,6 +1401,459 @@ class InvoiceAPITest(APITestCase):
         else:
             self.assertEqual(len(response.data), 1)
     
+    def _create_invoices(self, count, **overrides):
+        base = {
+            k: v for k, v in self.invoice_data.items()
+            if k not in ['issue_date', 'due_date']
+        } | {
+            'issue_date': date.today(),
+            'due_date': date.today() + timedelta(days=30)
+        }
+        return [Invoice.objects.create(**base | overrides) for _ in range(count)]
+
+    def _walk_pages(self, url, params):
+        ids, next_url = [], None
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            next_url = response.data['next']
+            if not next_url:
+                return ids, response
+            response = self.client.get(next_url)
+
+    def test_list_cursor_pagination_walks_all_pages(self):
+        """Test keyset pagination visits every invoice once, forwards and backwards"""
+        invoices = self._create_invoices(7)
+        # Empates em created_at são resolvidos pelo id
+        Invoice.objects.filter(pk__in=[i.pk for i in invoices[:4]]).update(
+            created_at=invoices[0].created_at
+        )
+        expected = [
+            str(pk) for pk in
+            Invoice.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        ]
+
+        url = reverse('invoice-list')
+        ids, last_page = self._walk_pages(url, {'page_size': 3})
+        self.assertEqual(ids, expected)
+
+        backwards = [item['id'] for item in last_page.data['results']]
+        response = last_page
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            backwards = [item['id'] for item in response.data['results']] + backwards
+        self.assertEqual(backwards, expected)
+
+    def test_list_cursor_pagination_other_orderings(self):
+        """Test keyset pagination over other ordering fields, including NULLs"""
+        self._create_invoices(3)
+        self._create_invoices(2, value=Decimal('50.00'))
+        self._create_invoices(2, value=None)
+
+        url = reverse('invoice-list')
+        for ordering in ['value', '-value', 'due_date', '-issue_date']:
+            ids, _ = self._walk_pages(url, {'page_size': 2, 'ordering': ordering})
+            self.assertEqual(len(ids), 7, ordering)
+            self.assertEqual(len(set(ids)), 7, ordering)
+
+        # NULLs ficam na ponta definida pelo banco (início na ordem crescente no SQLite)
+        nulls_largest = connection.features.nulls_order_largest
+        ids, _ = self._walk_pages(url, {'page_size': 2, 'ordering': 'value'})
+        null_ids = ids[-2:] if nulls_largest else ids[:2]
+        values = list(Invoice.objects.filter(pk__in=null_ids).values_list('value', flat=True))
+        self.assertEqual(values, [None, None])
+
+    def test_list_cursor_pagination_constant_queries(self):
+        """Test deep pages cost the same number of queries"""
+        self._create_invoices(6)
+        url = reverse('invoice-list')
+        response = self.client.get(url, {'page_size': 2})
+        next_url = response.data['next']
+        self.client.get(next_url)
+        # Chaves da página (validadores de cache) e a página; o token vem do cache
+        with self.assertNumQueries(2):
+            response = self.client.get(next_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_invalid_cursor(self):
+        """Test a malformed cursor returns 404"""
+        response = self.client.get(reverse('invoice-list'), {'cursor': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_bulk_create_invoices(self):
+        """Test bulk creation inserts valid rows and reports invalid ones"""
+        invalid = self.invoice_data | {'zip_code': '123'}
+        payload = [self.invoice_data, invalid, self.invoice_data, self.invoice_data]
+
+        url = reverse('invoice-bulk-create')
+        response = self.client.post(url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created_count'], 3)
+        self.assertEqual(response.data['error_count'], 1)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertIn('zip_code', response.data['errors'][0]['errors'])
+        self.assertEqual([item['index'] for item in response.data['created']], [0, 2, 3])
+
+        year = date.today().year
+        self.assertEqual(
+            sorted(Invoice.objects.values_list('invoice_number', flat=True)),
+            [f"{year}-{n:06d}" for n in range(1, 4)]
+        )
+        self.assertEqual(InvoiceDailyStat.objects.get().invoice_count, 3)
+
+    def test_bulk_create_query_count_does_not_grow(self):
+        """Test bulk creation uses a fixed number of queries"""
+        url = reverse('invoice-bulk-create')
+        # A primeira reserva do ano cria a sequência
+        self.client.post(url, [self.invoice_data], format='json')
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(url, [self.invoice_data] * 2, format='json')
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(url, [self.invoice_data] * 20, format='json')
+
+        self.assertEqual(response.data['created_count'], 20)
+        self.assertEqual(Invoice.objects.count(), 23)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_bulk_create_rejects_non_list(self):
+        """Test bulk creation requires a list"""
+        url = reverse('invoice-bulk-create')
+        response = self.client.post(url, self.invoice_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_bulk_update_by_ids(self):
+        """Test bulk update by id list runs a single UPDATE"""
+        invoices = self._create_invoices(3)
+        url = reverse('invoice-bulk-update')
+        payload = {
+            'ids': [str(invoices[0].pk), str(invoices[1].pk)],
+            'changes': {'is_active': False, 'payment_method': 'cash'},
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        updates = [q for q in context.captured_queries if q['sql'].startswith('UPDATE "invoices"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Invoice.objects.filter(is_active=False, payment_method='cash').count(), 2)
+        self.assertEqual(
+            InvoiceDailyStat.objects.get(is_active=True).invoice_count, 1
+        )
+
+    def test_bulk_update_by_filter(self):
+        """Test bulk update with a filter expression"""
+        self._create_invoices(2)
+        self._create_invoices(1, client_type='pj')
+        new_due_date = date.today() + timedelta(days=60)
+
+        url = reverse('invoice-bulk-update')
+        response = self.client.post(url, {
+            'filter': {'client_type': 'pf', 'is_active': True},
+            'changes': {'due_date': new_due_date.isoformat()},
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(Invoice.objects.filter(due_date=new_due_date).count(), 2)
+
+    def test_bulk_update_validation(self):
+        """Test bulk update rejects invalid requests"""
+        url = reverse('invoice-bulk-update')
+        invalid_payloads = [
+            {'changes': {'is_active': False}},
+            {'ids': [], 'changes': {'is_active': False}},
+            {'filter': {'name': 'João'}, 'changes': {'is_active': False}},
+            {'filter': {'state': 'XX'}, 'changes': {'is_active': False}},
+            {'filter': {'state': 'SP'}, 'changes': {}},
+            {'filter': {'state': 'SP'}, 'changes': {'name': 'Outro'}},
+            {'filter': {'state': 'SP'}, 'changes': {'due_date': '2000-01-01'}},
+        ]
+        for payload in invalid_payloads:
+            response = self.client.post(url, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, payload)
+
+    def test_bulk_update_invalid_period(self):
+        """Test malformed dates in the filter are a 400, not a server error"""
+        invoice = self._create_invoices(1)[0]
+        url = reverse('invoice-bulk-update')
+        for period in [{'start_date': 'nope'}, {'end_date': '2024-13-01'}]:
+            response = self.client.post(
+                url, {'filter': period, 'changes': {'is_active': False}}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, period)
+            self.assertIn(next(iter(period)), response.data['filter'])
+
+        response = self.client.post(url, {
+            'filter': {'start_date': invoice.issue_date.isoformat()},
+            'changes': {'is_active': False},
+        }, format='json')
+        self.assertEqual(response.data['updated'], 1)
+
+    def test_deactivate_updates_only_changed_columns(self):
+        """Test single-object actions save only is_active and updated_at"""
+        invoice = self._create_invoices(1)[0]
+        url = reverse('invoice-deactivate', kwargs={'pk': invoice.pk})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        update = next(q['sql'] for q in context.captured_queries if q['sql'].startswith('UPDATE "invoices"'))
+        self.assertIn('"is_active"', update)
+        self.assertNotIn('"name"', update)
+        invoice.refresh_from_db()
+        self.assertFalse(invoice.is_active)
+    
+    def test_list_conditional_get(self):
+        """Test the list answers If-None-Match with 304 before serializing"""
+        invoices = self._create_invoices(2)
+        url = reverse('invoice-list')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        # Só a agregação dos validadores (token em cache); nenhuma consulta da página
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Outros filtros têm outra representação
+        response = self.client.get(url, {'client_type': 'pf'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        invoices[0].name = 'Outro Nome'
+        invoices[0].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        invoices[1].delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_conditional_get(self):
+        """Test the detail honours If-None-Match and If-Modified-Since"""
+        invoice = self._create_invoices(1)[0]
+        url = reverse('invoice-detail', kwargs={'pk': invoice.pk})
+
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.post(reverse('invoice-deactivate', kwargs={'pk': invoice.pk}))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_active'])
+    
+    def test_invoice_pdf(self):
+        """Test the PDF is rendered once per invoice version"""
+        invoice = self._create_invoices(1)[0]
+        url = reverse('invoice-pdf', kwargs={'pk': invoice.pk})
+
+        with mock.patch.object(pdf, 'render_invoice_pdf', wraps=pdf.render_invoice_pdf) as render:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertIn(f'NF-{invoice.invoice_number}.pdf', response['Content-Disposition'])
+            self.assertTrue(response.content.startswith(b'%PDF-1.4'))
+            self.assertIn(f'(Nota Fiscal {invoice.invoice_number})'.encode(), response.content)
+
+            # Nota inalterada: vem do cache
+            self.assertEqual(self.client.get(url).content, response.content)
+            self.assertEqual(render.call_count, 1)
+
+            # Nota alterada (novo updated_at): gera de novo
+            self.client.post(reverse('invoice-deactivate', kwargs={'pk': invoice.pk}))
+            self.client.get(url)
+            self.assertEqual(render.call_count, 2)
+
+        response = self.client.get(reverse('invoice-pdf', kwargs={'pk': uuid.uuid4()}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invoice_pdf_batch(self):
+        """Test the batch endpoint returns one PDF per invoice in a zip"""
+        invoices = self._create_invoices(3)
+        url = reverse('invoice-pdf-batch')
+        ids = [str(invoice.pk) for invoice in invoices]
+
+        response = self.client.post(url, {'ids': ids + ids[:1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(BytesIO(response.content)) as archive:
+            self.assertEqual(
+                archive.namelist(),
+                [f'NF-{invoice.invoice_number}.pdf' for invoice in invoices]
+            )
+            single = self.client.get(reverse('invoice-pdf', kwargs={'pk': invoices[0].pk}))
+            self.assertEqual(archive.read(archive.namelist()[0]), single.content)
+
+        missing = str(uuid.uuid4())
+        response = self.client.post(url, {'ids': [ids[0], missing]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(missing, response.data['ids'][0])
+
+        response = self.client.post(url, {'ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invoice_pdf_without_value(self):
+        """Test invoices with null value and tax still render, alone and in a batch"""
+        invoice, other = self._create_invoices(1, value=None, tax=None) + self._create_invoices(1)
+
+        response = self.client.get(reverse('invoice-pdf', kwargs={'pk': invoice.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.content.startswith(b'%PDF-1.4'))
+
+        response = self.client.post(
+            reverse('invoice-pdf-batch'), {'ids': [str(invoice.pk), str(other.pk)]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with zipfile.ZipFile(BytesIO(response.content)) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
+
+        row = Invoice.objects.values(*pdf.PDF_FIELDS).get(pk=invoice.pk)
+        context = pdf.invoice_context(row)
+        self.assertEqual([context['value'], context['tax']], ['-', '-'])
+
+    def test_invoice_pdf_batch_process_pool(self):
+        """Test batches rendered in the process pool match inline rendering"""
+        invoices = self._create_invoices(4)
+        rows = list(Invoice.objects.filter(pk__in=[i.pk for i in invoices]).values(*pdf.PDF_FIELDS))
+        expected = [pdf.render_invoice_pdf(row) for row in rows]
+
+        with self.settings(INVOICE_PDF_POOL_MIN_BATCH=2, INVOICE_PDF_WORKERS=2):
+            with mock.patch.object(pdf, 'get_pool', wraps=pdf.get_pool) as get_pool:
+                self.assertEqual(pdf.render_pdfs(rows), expected)
+        self.assertTrue(get_pool.called)
+
+    def test_invoice_pdf_batch_broken_pool_renders_inline(self):
+        """Test a broken process pool is discarded and the batch rendered inline"""
+        invoices = self._create_invoices(3)
+        rows = list(Invoice.objects.filter(pk__in=[i.pk for i in invoices]).values(*pdf.PDF_FIELDS))
+        expected = [pdf.render_invoice_pdf(row) for row in rows]
+        broken = mock.Mock()
+        broken.map.side_effect = BrokenProcessPool('processo encerrado')
+
+        with self.settings(INVOICE_PDF_POOL_MIN_BATCH=2), mock.patch.object(pdf, '_pool', broken):
+            self.assertEqual(pdf.render_pdfs(rows), expected)
+            self.assertIsNone(pdf._pool)
+        broken.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+
+    def _metric(self, name, **labels):
+        """Value of a sample in the /metrics output (None when absent)"""
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rendered = ','.join(f'{key}="{value}"' for key, value in labels.items())
+        prefix = f'{name}{{{rendered}}} ' if labels else f'{name} '
+        for line in response.content.decode().splitlines():
+            if line.startswith(prefix):
+                return float(line[len(prefix):])
+        return None
+
+    def test_metrics_per_route(self):
+        """Test latency, query counts and DB time are recorded per route"""
+        self._create_invoices(2)
+        url = reverse('invoice-list')
+        # Aquece o cache do token: as duas requisições medidas fazem as mesmas consultas
+        self.client.get(url)
+        metrics.registry.clear()
+
+        self.client.get(url)
+        labels = {'route': 'invoice-list', 'method': 'GET'}
+        queries = self._metric('http_request_db_queries_sum', **labels)
+        self.assertGreater(queries, 0)
+        self.client.get(url)
+        self.client.get(reverse('invoice-statistics'))
+
+        self.assertEqual(self._metric('http_requests_total', **labels, status='200'), 2)
+        self.assertEqual(self._metric('http_request_duration_seconds_count', **labels), 2)
+        self.assertEqual(self._metric('http_request_duration_seconds_bucket', **labels, le='+Inf'), 2)
+        self.assertEqual(self._metric('http_request_db_queries_sum', **labels), 2 * queries)
+        self.assertGreater(self._metric('http_request_db_seconds_total', **labels), 0)
+        self.assertEqual(
+            self._metric('http_request_duration_seconds_count', route='invoice-statistics', method='GET'), 1
+        )
+        self.assertIsNotNone(self._metric('invoices_statistics_cache_misses_total'))
+
+        self.client.get('/nao-existe/')
+        self.assertEqual(
+            self._metric('http_requests_total', route='<unmatched>', method='GET', status='404'), 1
+        )
+
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_streaming_export(self):
+        """Test queries made while streaming the body are recorded"""
+        self._create_invoices(3)
+        metrics.registry.clear()
+
+        with self.settings(METRICS_QUERY_BUDGET=0):
+            with self.assertLogs('mei_backend.metrics', 'WARNING') as logs:
+                response = self.client.get(reverse('invoice-export'), {'format': 'csv'})
+                # Registrada só depois que o corpo foi enviado
+                self.assertIsNone(self._snapshot().get(('invoice-export', 'GET')))
+                content = b''.join(response.streaming_content)
+        self.assertEqual(len(content.splitlines()), 4)
+        self.assertIn('invoice-export', logs.output[0])
+
+        values = self._snapshot()[('invoice-export', 'GET')]
+        _, queries = values['queries']
+        self.assertGreater(queries, 0)
+        self.assertGreater(values['db_seconds'], 0)
+        self.assertEqual(values['responses'], {200: 1})
+
+        # Fechada sem ser lida: registrada uma única vez
+        response = self.client.get(reverse('invoice-export'), {'format': 'csv'})
+        # Como o cliente de testes: fechar a resposta não fecha a conexão do teste
+        request_finished.disconnect(close_old_connections)
+        try:
+            response.close()
+            response.close()
+        finally:
+            request_finished.connect(close_old_connections)
+        self.assertEqual(self._snapshot()[('invoice-export', 'GET')]['responses'], {200: 2})
+
+    def _snapshot(self):
+        return {(route, method): values for route, method, values in metrics.registry.snapshot()}
+
+    def test_metrics_query_budget(self):
+        """Test requests over the query budget log a warning"""
+        metrics.registry.clear()
+        url = reverse('invoice-list')
+        with self.settings(METRICS_QUERY_BUDGET=0):
+            with self.assertLogs('mei_backend.metrics', 'WARNING') as logs:
+                self.client.get(url)
+        self.assertIn('invoice-list', logs.output[0])
+        self.assertEqual(
+            self._metric('http_requests_over_query_budget_total', route='invoice-list', method='GET'), 1
+        )
+
+        with self.settings(METRICS_QUERY_BUDGET=100):
+            with self.assertNoLogs('mei_backend.metrics', 'WARNING'):
+                self.client.get(url)
+
+    async def test_metrics_async_route(self):
+        """Test queries made by async views are counted"""
+        metrics.registry.clear()
+        await sync_to_async(self._create_invoices)(1)
+        response = await self.async_client.get(
+            reverse('async-invoice-list'), headers={'Authorization': f'Token {self.token.key}'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        snapshot = {(route, method): values for route, method, values in metrics.registry.snapshot()}
+        _, queries = snapshot[('async-invoice-list', 'GET')]['queries']
+        self.assertGreater(queries, 0)
+
     def test_unauthenticated_access(self):
         """Test that unauthenticated users cannot access the API"""
         self.client.credentials()  # Remove authentication
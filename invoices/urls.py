@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 # Router para ViewSet
 router = DefaultRouter()
@@ -9,19 +9,37 @@ router.register(r'invoices', views.InvoiceViewSet, basename='invoice')
 urlpatterns = [
     # API endpoints
     path('api/v1/', include(router.urls)),
+    path('api/v1/documents/validate/', views.validate_documents, name='validate-documents'),
+    # Leituras assíncronas (ORM assíncrono), com os mesmos parâmetros e respostas
+    path('api/v1/async/invoices/', async_views.invoice_list, name='async-invoice-list'),
+    path(
+        'api/v1/async/invoices/statistics/',
+        async_views.invoice_statistics,
+        name='async-invoice-statistics'
+    ),
+    path('api/v1/async/invoices/<uuid:pk>/', async_views.invoice_detail, name='async-invoice-detail'),
 ]
 
 # URLs disponíveis:
 # GET    /api/v1/invoices/                 - Listar todas as notas fiscais
 # POST   /api/v1/invoices/                 - Criar nova nota fiscal
+# POST   /api/v1/invoices/bulk/            - Criar notas fiscais em lote (lista)
+# POST   /api/v1/invoices/bulk-update/     - Alterar notas em massa ({"ids"|"filter", "changes"})
 # GET    /api/v1/invoices/{id}/            - Detalhar nota fiscal específica
 # PUT    /api/v1/invoices/{id}/            - Atualizar nota fiscal completa
 # PATCH  /api/v1/invoices/{id}/            - Atualizar nota fiscal parcial
 # DELETE /api/v1/invoices/{id}/            - Deletar nota fiscal
 # POST   /api/v1/invoices/{id}/activate/   - Ativar nota fiscal
 # POST   /api/v1/invoices/{id}/deactivate/ - Desativar nota fiscal
+# GET    /api/v1/invoices/{id}/pdf/        - Nota fiscal em PDF
+# POST   /api/v1/invoices/pdf-batch/       - PDFs de várias notas em um zip ({"ids": [...]})
 # GET    /api/v1/invoices/statistics/      - Estatísticas das notas fiscais
 # GET    /api/v1/invoices/export/          - Exportar dados das notas fiscais
+#        (?format=csv ou ?format=ndjson para exportação em streaming)
+# GET    /api/v1/async/invoices/            - Listar (view assíncrona, para ASGI)
+# GET    /api/v1/async/invoices/{id}/       - Detalhar (view assíncrona)
+# GET    /api/v1/async/invoices/statistics/ - Estatísticas (view assíncrona)
+# POST   /api/v1/documents/validate/       - Validar CPFs/CNPJs em lote ({"documents": [...]})
 
 # Exemplos de uso com parâmetros de filtro:
 # GET /api/v1/invoices/?client_type=pf
@@ -29,7 +47,9 @@ urlpatterns = [
 # GET /api/v1/invoices/?payment_method=pix
 # GET /api/v1/invoices/?state=SP
 # GET /api/v1/invoices/?is_active=true
-# GET /api/v1/invoices/?search=joão
-# GET /api/v1/invoices/?ordering=-created_at
+# GET /api/v1/invoices/?search=joão   (busca textual ordenada por relevância)
+# GET /api/v1/invoices/?ordering=-created_at   (ou -total_value, tax_amount, ...)
+# GET /api/v1/invoices/?total_value__gte=100&total_value__lte=500
 # GET /api/v1/invoices/?start_date=2024-01-01&end_date=2024-12-31
 # GET /api/v1/invoices/?overdue=true
+# GET /api/v1/invoices/?page_size=100  (use os links next/previous da resposta para navegar)
@@ -1,41 +1,99 @@
 from django.core.exceptions import ValidationError
 import re
 
+from operator import mul
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele o lote é validado em Python puro
+    np = None
+
+# Remove tudo que não é dígito ASCII com bytes.translate (sem regex)
+NON_DIGITS = bytes(b for b in range(256) if not 0x30 <= b <= 0x39)
+
+# Pesos dos dígitos verificadores: (pesos do 1º dígito, pesos do 2º dígito)
+CPF_WEIGHTS = (tuple(range(10, 1, -1)), tuple(range(11, 1, -1)))
+CNPJ_WEIGHTS = (
+    (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2),
+    (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2),
+)
+DOCUMENT_TYPES = {11: ('cpf', CPF_WEIGHTS), 14: ('cnpj', CNPJ_WEIGHTS)}
+
+# Os dígitos são somados como bytes ('0' == 48); o deslocamento é descontado de uma vez
+DIGIT_OFFSETS = {
+    weights: 0x30 * sum(weights)
+    for _, pair in DOCUMENT_TYPES.values()
+    for weights in pair
+}
+
+# A partir deste tamanho de lote vale a pena montar a matriz do NumPy
+NUMPY_MIN_BATCH = 512
+
+
+def clean_document(document):
+    """Apenas os dígitos do documento, como bytes ASCII"""
+    return document.encode('utf-8', 'ignore').translate(None, NON_DIGITS)
+
+
+def check_digit(digits, weights):
+    """Dígito verificador (mesma regra para CPF e CNPJ)"""
+    remainder = (sum(map(mul, digits, weights)) - DIGIT_OFFSETS[weights]) % 11
+    return 0x30 if remainder < 2 else 0x30 + 11 - remainder
+
+
+def check_clean_document(digits):
+    """Valida um documento já limpo; retorna (tipo, válido)"""
+    document_type = DOCUMENT_TYPES.get(len(digits))
+    if document_type is None:
+        return None, False
+    kind, (first, second) = document_type
+    valid = (
+        digits.count(digits[0]) != len(digits)
+        and check_digit(digits, first) == digits[-2]
+        and check_digit(digits, second) == digits[-1]
+    )
+    return kind, valid
+
+
+def check_documents(documents):
+    """
+    Valida um lote de CPFs/CNPJs (formatados ou não).
+
+    Retorna uma lista de (tipo, válido) na ordem recebida, onde tipo é 'cpf',
+    'cnpj' ou None quando a quantidade de dígitos não corresponde a nenhum.
+    """
+    cleaned = [clean_document(document) for document in documents]
+    if np is None or len(cleaned) < NUMPY_MIN_BATCH:
+        return [check_clean_document(digits) for digits in cleaned]
+
+    results = [(None, False)] * len(cleaned)
+    for length, (kind, weights) in DOCUMENT_TYPES.items():
+        positions = [index for index, digits in enumerate(cleaned) if len(digits) == length]
+        if not positions:
+            continue
+        matrix = np.frombuffer(
+            b''.join(cleaned[index] for index in positions), dtype=np.uint8
+        ).reshape(len(positions), length).astype(np.int64) - 0x30
+        valid = ~(matrix == matrix[:, :1]).all(axis=1)
+        for offset, digit_weights in enumerate(weights):
+            size = len(digit_weights)
+            remainder = (matrix[:, :size] @ np.array(digit_weights)) % 11
+            expected = np.where(remainder < 2, 0, 11 - remainder)
+            valid &= expected == matrix[:, length - 2 + offset]
+        for index, is_valid in zip(positions, valid.tolist()):
+            results[index] = (kind, is_valid)
+    return results
+
+
 def validate_cpf(cpf):
     """Validação de CPF"""
-    cpf = re.sub(r'[^\d]', '', cpf)
-    
-    if len(cpf) != 11 or len(set(cpf)) == 1:
-        return False
-    
-    # Validação dos dígitos verificadores
-    for i in range(9, 11):
-        value = sum((int(cpf[num]) * ((i+1) - num) for num in range(0, i)))
-        digit = ((value * 10) % 11) % 10
-        if digit != int(cpf[i]):
-            return False
-    return True
+    kind, valid = check_clean_document(clean_document(cpf))
+    return kind == 'cpf' and valid
 
 def validate_cnpj(cnpj):
     """Validação de CNPJ"""
-    cnpj = re.sub(r'[^\d]', '', cnpj)
-    
-    if len(cnpj) != 14 or len(set(cnpj)) == 1:
-        return False
-    
-    # Validação dos dígitos verificadores
-    weights1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-    weights2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-    
-    def calculate_digit(cnpj_digits, weights):
-        total = sum(int(digit) * weight for digit, weight in zip(cnpj_digits, weights))
-        remainder = total % 11
-        return 0 if remainder < 2 else 11 - remainder
-    
-    digit1 = calculate_digit(cnpj[:12], weights1)
-    digit2 = calculate_digit(cnpj[:13], weights2)
-    
-    return int(cnpj[12]) == digit1 and int(cnpj[13]) == digit2
+    kind, valid = check_clean_document(clean_document(cnpj))
+    return kind == 'cnpj' and valid
 
 def format_currency(value):
     """Formata valor monetário para Real brasileiro"""
@@ -1,16 +1,37 @@
-from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action
+from rest_framework import viewsets, status
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
+from django.http import HttpResponse, QueryDict
 from django.utils import timezone
 from .models import Invoice
 from .serializers import (
     InvoiceSerializer,
     InvoiceCreateSerializer,
-    InvoiceListSerializer,
-    InvoiceUpdateSerializer
+    InvoiceListValuesSerializer,
+    InvoiceValuesSerializer,
+    InvoiceUpdateSerializer,
+    InvoiceBulkUpdateSerializer,
+    InvoicePDFBatchSerializer,
+    DocumentValidationSerializer
+)
+from .statistics import compute_statistics
+from .cache import statistics_cache
+from .utils import check_documents
+from .renderers import CSVRenderer, NDJSONRenderer, PDFRenderer, ZIPRenderer
+from .pdf import PDF_FIELDS, build_pdf_zip, pdf_filename, render_pdfs
+from .exports import STREAMING_CONTENT_TYPES, streaming_export_response
+from .filters import InvoiceFilter
+from .search import InvoiceSearchFilter, InvoiceOrderingFilter
+from .conditional import (
+    instance_validators,
+    list_validators,
+    not_modified_response,
+    set_validators
 )
 
 class InvoiceViewSet(viewsets.ModelViewSet):
@@ -19,29 +40,33 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     """
     queryset = Invoice.objects.all()
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['client_type', 'service_type', 'payment_method', 'state', 'is_active']
+    filter_backends = [DjangoFilterBackend, InvoiceSearchFilter, InvoiceOrderingFilter]
+    filterset_class = InvoiceFilter
     search_fields = ['name', 'email', 'document', 'invoice_number', 'service_description']
-    ordering_fields = ['created_at', 'issue_date', 'due_date', 'value']
+    ordering_fields = ['created_at', 'issue_date', 'due_date', 'value', 'total_value', 'tax_amount']
     ordering = ['-created_at']
+    bulk_max_items = 5000
+    bulk_batch_size = 500
 
     def get_serializer_class(self):
         """Retorna o serializer apropriado baseado na action"""
         if self.action == 'create':
             return InvoiceCreateSerializer
         elif self.action == 'list':
-            return InvoiceListSerializer
+            return InvoiceListValuesSerializer
         elif self.action in ['update', 'partial_update']:
             return InvoiceUpdateSerializer
         return InvoiceSerializer
     
     def get_queryset(self):
         """Filtra queryset baseado em parâmetros da query"""
-        queryset = Invoice.objects.all()
+        return self.filter_by_params(Invoice.objects.all(), self.request.query_params)
 
+    def filter_by_params(self, queryset, params):
+        """Aplica os filtros de período e de vencimento"""
         # Filtro por período
-        start_date = self.request.query_params.get('start_date', None)
-        end_date = self.request.query_params.get('end_date', None)
+        start_date = params.get('start_date', None)
+        end_date = params.get('end_date', None)
 
         if start_date:
             queryset = queryset.filter(issue_date__gte=start_date)
@@ -49,7 +74,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(issue_date__lte=end_date)
 
         # Filtro por vencimento
-        overdue = self.request.query_params.get('overdue', None)
+        overdue = params.get('overdue', None)
         if overdue == 'true':
             queryset = queryset.filter(
                 due_date__lt=timezone.now().date(),
@@ -58,6 +83,47 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        """Listar notas fiscais (responde 304 se nada mudou)"""
+        queryset = self.filter_queryset(self.get_queryset())
+        # Linhas como dicionários, sem instanciar os modelos
+        queryset = self.get_serializer_class().values_queryset(queryset)
+
+        # Com paginação keyset, os validadores vêm só das linhas da página
+        paginator = self.paginator
+        keyset = paginator is not None and hasattr(paginator, 'get_page_queryset')
+        if keyset:
+            queryset = paginator.get_page_queryset(queryset, request, view=self)
+
+        etag, last_modified = list_validators(request, queryset)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if keyset:
+            page = paginator.build_page(list(queryset))
+        else:
+            page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Detalhar nota fiscal (responde 304 se nada mudou)"""
+        instance = self.get_object()
+
+        etag, last_modified = instance_validators(request, instance)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, last_modified)
+    
     def create(self, request, *args, **kwargs):
         """Criar nova nota fiscal"""
         serializer = self.get_serializer(data=request.data)
@@ -83,12 +149,95 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         response_serializer = InvoiceSerializer(invoice)
         return Response(response_serializer.data)
     
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """Criar notas fiscais em lote"""
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'error': 'Envie uma lista de notas fiscais'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {'error': f'Máximo de {self.bulk_max_items} notas fiscais por requisição'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Valida todos os itens e separa os válidos dos inválidos
+        valid, errors = [], []
+        for index, item in enumerate(items):
+            serializer = InvoiceCreateSerializer(data=item, context=self.get_serializer_context())
+            if serializer.is_valid():
+                valid.append((index, Invoice(
+                    **InvoiceCreateSerializer.with_defaults(serializer.validated_data)
+                )))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        created = Invoice.objects.bulk_create(
+            [invoice for _, invoice in valid],
+            batch_size=self.bulk_batch_size
+        )
+
+        return Response(
+            {
+                'created_count': len(created),
+                'error_count': len(errors),
+                'created': [
+                    {'index': index, 'id': invoice.pk, 'invoice_number': invoice.invoice_number}
+                    for (index, _), invoice in zip(valid, created)
+                ],
+                'errors': errors,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+    
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """Alterar notas fiscais em massa (por ids ou por filtro)"""
+        serializer = InvoiceBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if 'ids' in serializer.validated_data:
+            queryset = Invoice.objects.filter(pk__in=serializer.validated_data['ids'])
+        else:
+            queryset = self.filter_by_expression(serializer.validated_data['filter'])
+
+        # Um único UPDATE; updated_at é informado porque update() ignora auto_now
+        updated = queryset.update(
+            **serializer.validated_data['changes'],
+            updated_at=timezone.now()
+        )
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
+
+    def filter_by_expression(self, expression):
+        """Queryset das notas que atendem a um filtro no formato dos parâmetros da listagem"""
+        queryset = Invoice.objects.all()
+        filterset_class = DjangoFilterBackend().get_filterset_class(self, queryset)
+        allowed = set(filterset_class.base_filters) | {'start_date', 'end_date', 'overdue'}
+        unknown = set(expression) - allowed
+        if unknown:
+            raise ValidationError({
+                'filter': [f"Filtro não suportado: {', '.join(sorted(unknown))}"]
+            })
+
+        params = QueryDict(mutable=True)
+        for key, value in expression.items():
+            params[key] = str(value).lower() if isinstance(value, bool) else str(value)
+
+        queryset = self.filter_by_params(queryset, params)
+        filterset = filterset_class(data=params, queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            raise ValidationError({'filter': filterset.errors})
+        return filterset.qs
+    
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
         """Ativar nota fiscal"""
         invoice = self.get_object()
         invoice.is_active = True
-        invoice.save()
+        invoice.save(update_fields=['is_active', 'updated_at'])
         return Response(
             {'message': 'Nota fiscal ativada com sucesso'},
             status=status.HTTP_200_OK
@@ -99,7 +248,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         """Desativar nota fiscal"""
         invoice = self.get_object()
         invoice.is_active = False
-        invoice.save()
+        invoice.save(update_fields=['is_active', 'updated_at'])
         return Response(
             {'message': 'Nota fiscal desativada com sucesso'},
             status=status.HTTP_200_OK
@@ -108,49 +257,93 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Estatísticas das notas fiscais"""
-        queryset = self.get_queryset()
-        
-        total_invoices = queryset.count()
-        active_invoices = queryset.filter(is_active=True).count()
-        overdue_invoices = queryset.filter(
-            due_date__lt=timezone.now().date(),
-            is_active=True
-        ).count()
-        
-        total_value = sum(invoice.total_value for invoice in queryset.filter(is_active=True))
-        
-        # Estatísticas por tipo de cliente
-        pf_count = queryset.filter(client_type='pf', is_active=True).count()
-        pj_count = queryset.filter(client_type='pj', is_active=True).count()
-        
-        # Estatísticas por tipo de serviço
-        service_stats = {}
-        for choice in Invoice.SERVICE_TYPE_CHOICES:
-            service_stats[choice[0]] = queryset.filter(
-                service_type=choice[0],
-                is_active=True
-            ).count()
-        
-        return Response({
-            'total_invoices': total_invoices,
-            'active_invoices': active_invoices,
-            'overdue_invoices': overdue_invoices,
-            'total_value': total_value,
-            'client_types': {
-                'pessoa_fisica': pf_count,
-                'pessoa_juridica': pj_count
-            },
-            'service_types': service_stats
-        })
+        data, hit = statistics_cache.get_or_compute(request.query_params, compute_statistics)
+        return Response(data, headers={'X-Cache': 'HIT' if hit else 'MISS'})
     
-    @action(detail=False, methods=['get'])
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer, NDJSONRenderer]
+    )
     def export(self, request):
         """Exportar notas fiscais (dados para relatório)"""
         queryset = self.get_queryset()
-        serializer = InvoiceSerializer(queryset, many=True)
+
+        # ?format=csv ou ?format=ndjson: envia as linhas em streaming
+        export_format = request.accepted_renderer.format
+        if export_format in STREAMING_CONTENT_TYPES:
+            return streaming_export_response(queryset, export_format)
+
+        serializer = InvoiceValuesSerializer(
+            InvoiceValuesSerializer.values_queryset(queryset),
+            many=True
+        )
         
         return Response({
             'invoices': serializer.data,
             'total_count': queryset.count(),
             'export_date': timezone.now().isoformat()
-        })
\ No newline at end of file
+        })
+
+    @action(
+        detail=True,
+        methods=['get'],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, PDFRenderer]
+    )
+    def pdf(self, request, pk=None):
+        """Nota fiscal em PDF (gerado uma única vez por versão da nota)"""
+        invoice = self.get_object()
+        row = {field: getattr(invoice, field) for field in PDF_FIELDS}
+        content, = render_pdfs([row])
+
+        response = HttpResponse(content, content_type=PDFRenderer.media_type)
+        response['Content-Disposition'] = f'inline; filename="{pdf_filename(row)}"'
+        return response
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='pdf-batch',
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, ZIPRenderer]
+    )
+    def pdf_batch(self, request):
+        """PDFs de várias notas fiscais em um arquivo zip"""
+        serializer = InvoicePDFBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        rows = {
+            row['id']: row
+            for row in Invoice.objects.filter(pk__in=ids).values(*PDF_FIELDS)
+        }
+        missing = [str(pk) for pk in ids if pk not in rows]
+        if missing:
+            raise ValidationError({
+                'ids': [f"Notas fiscais não encontradas: {', '.join(missing)}"]
+            })
+
+        response = HttpResponse(
+            build_pdf_zip([rows[pk] for pk in ids]),
+            content_type=ZIPRenderer.media_type
+        )
+        response['Content-Disposition'] = 'attachment; filename="notas-fiscais.zip"'
+        return response
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def validate_documents(request):
+    """Validar um lote de CPFs/CNPJs"""
+    serializer = DocumentValidationSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    documents = serializer.validated_data['documents']
+    results = [
+        {'document': document, 'type': kind, 'valid': valid}
+        for document, (kind, valid) in zip(documents, check_documents(documents))
+    ]
+    valid_count = sum(result['valid'] for result in results)
+    return Response({
+        'results': results,
+        'valid_count': valid_count,
+        'invalid_count': len(results) - valid_count,
+    })
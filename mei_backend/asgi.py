@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+As leituras em /api/v1/async/invoices/ são views assíncronas: servidas por
+um servidor ASGI (ex.: `uvicorn mei_backend.asgi:application`), atendem
+muitos leitores simultâneos em um único processo.
 """
 
 import os
@@ -0,0 +1,316 @@
+"""
+Métricas por rota, mantidas em memória e expostas em `/metrics`.
+
+`MetricsMiddleware` mede cada requisição e, com `connection.execute_wrapper`,
+conta as consultas ao banco e o tempo gasto nelas. Os valores são agregados
+pelo nome da rota resolvida (`invoice-list`, `invoice-statistics`, `login`,
+...) e o endpoint `/metrics` os publica no formato texto do Prometheus.
+
+Cada processo tem os seus contadores (o Prometheus soma as instâncias). Em
+respostas em streaming, a requisição é registrada ao fim do envio do corpo,
+com as consultas feitas durante o streaming.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+logger = logging.getLogger(__name__)
+
+# Limites (le) dos histogramas
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Requisições que não resolveram nenhuma rota (404)
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Contagens acumuladas por limite, terminando em +Inf"""
+        total = 0
+        for bound, count in zip((*self.buckets, float('inf')), self.counts):
+            total += count
+            yield bound, total
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.over_budget = 0
+        self.responses = {}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, method, status, duration, queries, db_seconds, over_budget=False):
+        with self._lock:
+            metrics = self._routes.get((route, method))
+            if metrics is None:
+                metrics = self._routes[(route, method)] = RouteMetrics()
+            metrics.latency.observe(duration)
+            metrics.queries.observe(queries)
+            metrics.db_seconds += db_seconds
+            metrics.over_budget += over_budget
+            metrics.responses[status] = metrics.responses.get(status, 0) + 1
+
+    def snapshot(self):
+        """Cópia dos valores atuais, ordenada por rota e método"""
+        with self._lock:
+            return [
+                (route, method, {
+                    'latency': (list(metrics.latency.cumulative()), metrics.latency.sum),
+                    'queries': (list(metrics.queries.cumulative()), metrics.queries.sum),
+                    'db_seconds': metrics.db_seconds,
+                    'over_budget': metrics.over_budget,
+                    'responses': dict(metrics.responses),
+                })
+                for (route, method), metrics in sorted(self._routes.items())
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = MetricsRegistry()
+
+
+class QueryCollector:
+    """execute_wrapper que conta as consultas e soma o tempo no banco"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class RecordedStream:
+    """
+    Corpo de uma resposta em streaming que conta as consultas feitas ao
+    gerá-lo e registra a requisição quando a resposta é fechada.
+    """
+
+    def __init__(self, content, collector, finish):
+        self.content = content
+        self.collector = collector
+        self.finish = finish
+        self.iterator = None
+
+    def __iter__(self):
+        self.iterator = self.stream()
+        return self.iterator
+
+    def stream(self):
+        # O wrapper é instalado na thread que consome o corpo: a do servidor
+        # WSGI ou, no ASGI, a que o Django usa para iteradores síncronos
+        with connection.execute_wrapper(self.collector):
+            yield from self.content
+
+    def close(self):
+        if self.iterator is not None:
+            self.iterator.close()
+        self.finish()
+
+
+class AsyncRecordedStream:
+    """Versão de `RecordedStream` para corpos assíncronos"""
+
+    def __init__(self, content, collector, finish):
+        # Consultas feitas de forma assíncrona durante o streaming não passam
+        # pelo wrapper: só o tempo total entra
+        self.content = content
+        self.finish = finish
+
+    async def __aiter__(self):
+        async for chunk in self.content:
+            yield chunk
+
+    def close(self):
+        self.finish()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.view_name or match.route or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Registra latência, consultas e tempo no banco de cada requisição.
+
+    Fica no início de `MIDDLEWARE` para medir também os demais middlewares.
+    Requisições acima de `METRICS_QUERY_BUDGET` consultas geram um aviso no
+    log `mei_backend.metrics`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        collector = QueryCollector()
+        start = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+        return self.process_metrics(request, response, start, collector)
+
+    async def __acall__(self, request):
+        # As consultas rodam na thread de sync_to_async da requisição, que tem
+        # a sua própria conexão: o wrapper é instalado (e removido) nela
+        collector = QueryCollector()
+        stack = ExitStack()
+        start = time.perf_counter()
+        await sync_to_async(self.install)(stack, collector)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.process_metrics(request, response, start, collector)
+
+    @staticmethod
+    def install(stack, collector):
+        stack.enter_context(connection.execute_wrapper(collector))
+
+    def process_metrics(self, request, response, start, collector):
+        """Registra a requisição já ou, em streaming, ao fechar a resposta"""
+        if not response.streaming:
+            self.record(request, response, time.perf_counter() - start, collector)
+            return response
+
+        recorded = False
+
+        def finish():
+            nonlocal recorded
+            if not recorded:
+                recorded = True
+                self.record(request, response, time.perf_counter() - start, collector)
+
+        stream_class = AsyncRecordedStream if response.is_async else RecordedStream
+        response.streaming_content = stream_class(response.streaming_content, collector, finish)
+        return response
+
+    def record(self, request, response, duration, collector):
+        route = route_name(request)
+        budget = getattr(settings, 'METRICS_QUERY_BUDGET', None)
+        over_budget = budget is not None and collector.count > budget
+        if over_budget:
+            logger.warning(
+                'Requisição acima do orçamento de consultas: %s %s (%s) fez %d consultas '
+                '(orçamento: %d, %.1f ms no banco, %.1f ms no total)',
+                request.method, request.path, route, collector.count, budget,
+                collector.duration * 1000, duration * 1000
+            )
+        registry.record(
+            route, request.method, response.status_code, duration,
+            collector.count, collector.duration, over_budget
+        )
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics():
+    """Métricas no formato texto do Prometheus (versão 0.0.4)"""
+    from invoices.cache import statistics_cache
+
+    snapshot = registry.snapshot()
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    def sample(name, labels, value):
+        rendered = ','.join(f'{key}="{escape_label(label)}"' for key, label in labels.items())
+        lines.append(f'{name}{{{rendered}}} {format_value(value)}' if rendered else f'{name} {format_value(value)}')
+
+    def histogram(name, field):
+        for route, method, values in snapshot:
+            labels = {'route': route, 'method': method}
+            buckets, total = values[field]
+            for bound, count in buckets:
+                sample(f'{name}_bucket', {**labels, 'le': format_value(bound)}, count)
+            sample(f'{name}_sum', labels, total)
+            sample(f'{name}_count', labels, buckets[-1][1])
+
+    family('http_requests_total', 'counter', 'Requisições por rota, método e status.')
+    for route, method, values in snapshot:
+        for status, count in sorted(values['responses'].items()):
+            sample('http_requests_total', {'route': route, 'method': method, 'status': status}, count)
+
+    family('http_request_duration_seconds', 'histogram', 'Latência das requisições por rota.')
+    histogram('http_request_duration_seconds', 'latency')
+
+    family('http_request_db_queries', 'histogram', 'Consultas ao banco por requisição.')
+    histogram('http_request_db_queries', 'queries')
+
+    family('http_request_db_seconds_total', 'counter', 'Tempo gasto em consultas ao banco por rota.')
+    for route, method, values in snapshot:
+        sample('http_request_db_seconds_total', {'route': route, 'method': method}, values['db_seconds'])
+
+    family(
+        'http_requests_over_query_budget_total', 'counter',
+        'Requisições acima de METRICS_QUERY_BUDGET consultas.'
+    )
+    for route, method, values in snapshot:
+        sample('http_requests_over_query_budget_total', {'route': route, 'method': method}, values['over_budget'])
+
+    counters = statistics_cache.counters()
+    family('invoices_statistics_cache_hits_total', 'counter', 'Acertos do cache de estatísticas.')
+    sample('invoices_statistics_cache_hits_total', {}, counters['hits'])
+    family('invoices_statistics_cache_misses_total', 'counter', 'Falhas do cache de estatísticas.')
+    sample('invoices_statistics_cache_misses_total', {}, counters['misses'])
+
+    return '\n'.join(lines) + '\n'
+
+
+@require_GET
+def metrics_view(request):
+    """Endpoint lido pelo Prometheus; restrito a `METRICS_ALLOWED_IPS`"""
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 import os
 from dotenv import load_dotenv
@@ -58,13 +59,19 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
+        # BasicAuthentication; com BASIC_AUTH_CACHE, sem hash a cada requisição
+        'accounts.authentication.CachedBasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',  # Certifique-se de que isso está aqui
+        # TokenAuthentication com cache em memória e prazo de validade
+        'accounts.authentication.CachedTokenAuthentication',
     ],
+    # Paginação por cursor (keyset): custo constante em qualquer página
+    'DEFAULT_PAGINATION_CLASS': 'invoices.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 MIDDLEWARE = [
+    'mei_backend.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -125,6 +132,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'mei_backend.metrics': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
         '__main__': {  # ou o nome do seu app
             'handlers': ['console'],
             'level': 'DEBUG',
@@ -151,6 +163,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'mei_backend.wsgi.application'
+ASGI_APPLICATION = 'mei_backend.asgi.application'
 
 
 # Database
@@ -160,10 +173,60 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Escritores concorrentes aguardam o lock em vez de falhar
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        'TEST': {
+            # Banco em arquivo para que os testes de concorrência usem
+            # conexões independentes (o banco em memória é compartilhado)
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Localmente: locmem (padrão) ou arquivo, ex.:
+#   CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#   CACHE_LOCATION=/var/tmp/mei_backend_cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'mei-backend'),
+    }
+}
+
+# Cache do endpoint de estatísticas (invalidado a cada escrita de notas)
+STATISTICS_CACHE_ALIAS = 'default'
+STATISTICS_CACHE_TIMEOUT = int(os.getenv('STATISTICS_CACHE_TIMEOUT', 300))
+
+# PDFs das notas: cache por (id, updated_at) e pool de processos para lotes
+INVOICE_PDF_CACHE_ALIAS = 'default'
+INVOICE_PDF_CACHE_TIMEOUT = int(os.getenv('INVOICE_PDF_CACHE_TIMEOUT', 86400))
+INVOICE_PDF_WORKERS = int(os.getenv('INVOICE_PDF_WORKERS', 2))  # processos por worker do servidor
+INVOICE_PDF_POOL_MIN_BATCH = 8
+
+# Tokens de login: validade (horas) e cache em memória por processo
+TOKEN_EXPIRY = timedelta(hours=int(os.getenv('TOKEN_EXPIRY_HOURS', 24)))
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 1024))
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', 60))
+# Opcional: reaproveita as credenciais Basic já conferidas (mesmo TTL e tamanho)
+BASIC_AUTH_CACHE = os.getenv('BASIC_AUTH_CACHE', 'false').lower() in ('1', 'true', 'yes')
+
+# Métricas por rota em /metrics (formato Prometheus)
+# Requisições com mais consultas que o orçamento geram um aviso no log
+METRICS_QUERY_BUDGET = int(os.getenv('METRICS_QUERY_BUDGET', 20))
+# IPs autorizados a ler /metrics ('*' libera para todos)
+METRICS_ALLOWED_IPS = (
+    None if os.getenv('METRICS_ALLOWED_IPS') == '*'
+    else os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 